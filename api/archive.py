@@ -0,0 +1,161 @@
+"""
+Cold storage for old interview results.
+
+``manage.py archive_results`` moves whole sessions whose newest result is
+older than RESULT_ARCHIVE_AFTER_DAYS out of InterviewResult into
+ArchivedSession rows. Each holds the session's review rows as one
+compressed JSON document. This keeps the hot table and its indexes small.
+Dashboards read the UserStats/UserStatBucket rollups, not raw results,
+so they are unaffected. Session review merges archived rows back in.
+"""
+
+import gzip
+import json
+from collections import defaultdict
+from datetime import datetime
+
+from django.db import transaction
+from django.db.models import Max, OuterRef, Subquery
+
+from .models import ArchivedSession, InterviewResult, SessionPlanItem
+from .textstore import delete_unused
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+DELETE_CHUNK_SIZE = 500
+
+
+def codec_available(codec):
+    return codec == "gzip" or (codec == "zstd" and zstandard is not None)
+
+
+def compress(raw, codec):
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=10).compress(raw)
+    return gzip.compress(raw, compresslevel=9)
+
+
+def decompress(data, codec):
+    data = bytes(data)
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read zstd archives")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+# ============================================================
+# REVIEW ROWS
+# ============================================================
+
+def for_review(results):
+    """Join in what a session review shows: bank question text, improved answer, plan position."""
+    return results.select_related("bank_question", "improved_answer_blob").defer(
+        "bank_question__embedding", "bank_question__text_hash", "improved_answer_blob__digest"
+    ).annotate(
+        position=Subquery(
+            SessionPlanItem.objects.filter(
+                plan__session_id=OuterRef("session_id"), question_id=OuterRef("bank_question_id")
+            ).values("position")[:1]
+        )
+    )
+
+
+def review_row(result):
+    return {
+        "question": result.question_text,
+        "question_id": result.bank_question_id,
+        "position": result.position,
+        "answer": result.answer,
+        "score": result.score,
+        "strengths": result.strengths,
+        "weaknesses": result.weaknesses,
+        "improved_answer": result.improved_answer_text,
+        "created_at": result.created_at,
+    }
+
+
+def archived_rows(session_id):
+    rows = []
+    for archive in ArchivedSession.objects.filter(session_id=session_id).order_by("first_at"):
+        for row in json.loads(decompress(archive.data, archive.codec)):
+            row["created_at"] = datetime.fromisoformat(row["created_at"])
+            rows.append(row)
+    return rows
+
+
+# ============================================================
+# ARCHIVING
+# ============================================================
+
+def stale_sessions(cutoff, after="", limit=500):
+    """Session ids (in order, above ``after``) whose newest result is older than ``cutoff``."""
+    return list(
+        InterviewResult.objects.filter(session_id__gt=after)
+        .values("session_id")
+        .annotate(last=Max("created_at"))
+        .filter(last__lt=cutoff)
+        .order_by("session_id")
+        .values_list("session_id", flat=True)[:limit]
+    )
+
+
+def archive_sessions(session_ids, codec, cutoff=None):
+    """
+    Move every result of ``session_ids`` into ArchivedSession rows, one per
+    (session, user). With ``cutoff``, sessions that got a newer result since
+    they were listed are skipped. Returns (sessions archived, results
+    archived, raw bytes, compressed bytes).
+    """
+    with transaction.atomic():
+        if cutoff is not None:
+            # Re-check inside the transaction: the batch was listed outside it
+            session_ids = (
+                InterviewResult.objects.filter(session_id__in=session_ids)
+                .values("session_id")
+                .annotate(last=Max("created_at"))
+                .filter(last__lt=cutoff)
+                .values_list("session_id", flat=True)
+            )
+
+        results = list(
+            for_review(InterviewResult.objects.filter(session_id__in=session_ids))
+            .order_by("session_id", "user_id", "created_at")
+        )
+
+        groups = defaultdict(list)
+        for r in results:
+            groups[(r.session_id, r.user_id)].append(r)
+
+        archives = []
+        raw_total = 0
+        for (session_id, user_id), group in groups.items():
+            rows = [dict(review_row(r), created_at=r.created_at.isoformat()) for r in group]
+            raw = json.dumps(rows, separators=(",", ":")).encode("utf-8")
+            raw_total += len(raw)
+            archives.append(ArchivedSession(
+                session_id=session_id,
+                user_id=user_id,
+                codec=codec,
+                data=compress(raw, codec),
+                result_count=len(group),
+                raw_size=len(raw),
+                first_at=group[0].created_at,
+                last_at=group[-1].created_at,
+            ))
+        ArchivedSession.objects.bulk_create(archives)
+
+        # Only the rows archived above, never ones written since
+        ids = [r.id for r in results]
+        for i in range(0, len(ids), DELETE_CHUNK_SIZE):
+            InterviewResult.objects.filter(id__in=ids[i:i + DELETE_CHUNK_SIZE]).delete()
+
+    # Improved answers no remaining result points at. Swept in separate
+    # transactions that skip blobs a new result is being written with
+    delete_unused({r.improved_answer_blob_id for r in results if r.improved_answer_blob_id})
+
+    sessions = len({session_id for session_id, _ in groups})
+    return sessions, len(results), raw_total, sum(len(a.data) for a in archives)
@@ -0,0 +1,253 @@
+"""
+Content-addressed cache for AI evaluations.
+
+Entries are keyed on a hash of the evaluation model plus the normalized
+question and answer text. Identical (or whitespace/case-only different)
+submissions therefore reuse one LLM result. The backend is picked by
+EVALUATION_CACHE["BACKEND"]:
+
+- "locmem": per-process LRU dict
+- "file": one JSON file per entry, shared by every process on the host
+- "django": any configured Django cache alias
+- "none": caching disabled
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+from . import llm, metrics
+
+
+def _normalize(text):
+    return " ".join((text or "").lower().split())
+
+
+def evaluation_key(question, answer):
+    raw = "\x00".join([llm.model_for("evaluate"), _normalize(question), _normalize(answer)])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+# ============================================================
+# BACKENDS
+# ============================================================
+
+class LocMemBackend:
+    def __init__(self, ttl, max_entries, **options):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires, value = item
+            if expires < time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        evicted = 0
+        with self._lock:
+            self._data[key] = (time.time() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                evicted += 1
+        return evicted
+
+
+class FileBackend:
+    """
+    Stores each entry as ``<key>.json``. A hit touches the file's mtime, so
+    eviction can drop the least recently used files first.
+    """
+
+    PRUNE_EVERY = 50
+
+    def __init__(self, ttl, max_entries, location, **options):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.location = str(location)
+        self._writes = 0
+        os.makedirs(self.location, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.location, f"{key}.json")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                item = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if item["expires"] < time.time():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return item["value"]
+
+    def set(self, key, value):
+        # Write to a temp file and rename so readers never see a partial entry
+        fd, tmp = tempfile.mkstemp(dir=self.location, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"expires": time.time() + self.ttl, "value": value}, f)
+        os.replace(tmp, self._path(key))
+
+        self._writes += 1
+        if self._writes % self.PRUNE_EVERY == 0:
+            return self._prune()
+        return 0
+
+    def _prune(self):
+        entries = []
+        for name in os.listdir(self.location):
+            if not name.endswith(".json"):
+                continue
+            try:
+                entries.append((os.path.getmtime(os.path.join(self.location, name)), name))
+            except OSError:
+                pass
+
+        excess = len(entries) - self.max_entries
+        if excess <= 0:
+            return 0
+
+        entries.sort()
+        for _, name in entries[:excess]:
+            try:
+                os.remove(os.path.join(self.location, name))
+            except OSError:
+                pass
+        return excess
+
+
+class DjangoCacheBackend:
+    """Delegates to a Django cache alias; LRU/culling is the cache's own policy."""
+
+    def __init__(self, ttl, alias="default", **options):
+        self.ttl = ttl
+        self.cache = caches[alias]
+
+    def get(self, key):
+        return self.cache.get(f"evaluation:{key}")
+
+    def set(self, key, value):
+        self.cache.set(f"evaluation:{key}", value, self.ttl)
+        return 0
+
+
+BACKENDS = {
+    "locmem": LocMemBackend,
+    "file": FileBackend,
+    "django": DjangoCacheBackend,
+}
+
+
+# ============================================================
+# EVALUATION CACHE
+# ============================================================
+
+class EvaluationCache:
+    def __init__(self, backend):
+        self.backend = backend
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, question, answer):
+        if self.backend is None:
+            return None
+
+        value = self.backend.get(evaluation_key(question, answer))
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return dict(value) if value is not None else None
+
+    def set(self, question, answer, data):
+        if self.backend is None:
+            return
+
+        evicted = self.backend.set(evaluation_key(question, answer), data)
+        if evicted:
+            with self._lock:
+                self.evictions += evicted
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": settings.EVALUATION_CACHE["BACKEND"],
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            }
+
+
+_evaluation_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_evaluation_cache():
+    global _evaluation_cache
+    if _evaluation_cache is None:
+        with _cache_lock:
+            if _evaluation_cache is None:
+                config = dict(settings.EVALUATION_CACHE)
+                name = config.pop("BACKEND")
+                backend = None
+                if name != "none":
+                    options = {k.lower(): v for k, v in config.items()}
+                    backend = BACKENDS[name](**options)
+                _evaluation_cache = EvaluationCache(backend)
+    return _evaluation_cache
+
+
+@metrics.collector
+def _cache_metrics():
+    cache = _evaluation_cache
+    if cache is None:
+        return []
+    stats = cache.stats()
+    return [
+        ("interview_evaluation_cache_total", "counter", "Evaluation cache lookups and evictions.", [
+            ({"result": "hit"}, stats["hits"]),
+            ({"result": "miss"}, stats["misses"]),
+            ({"result": "eviction"}, stats["evictions"]),
+        ]),
+    ]
+
+
+@receiver(setting_changed)
+def _reset_cache(setting, **kwargs):
+    global _evaluation_cache
+    if setting == "EVALUATION_CACHE":
+        _evaluation_cache = None
@@ -0,0 +1,60 @@
+"""
+Cheap text embeddings for near-duplicate detection.
+
+Questions are turned into a hashed bag of features (words, word pairs and
+character trigrams) folded into EMBEDDING_DIM buckets and L2-normalized,
+so the dot product of two embeddings is their cosine similarity. No
+model download, pure Python, roughly 0.1 ms per question.
+
+Changing EMBEDDING_DIM or the features invalidates stored embeddings;
+run ``manage.py embed_questions --all`` afterwards.
+"""
+
+import math
+import re
+import zlib
+from array import array
+
+EMBEDDING_DIM = 256
+
+_WORD = re.compile(r"[a-z0-9+#]+")
+
+# Filler that every generated question shares; it says nothing about the topic
+_STOPWORDS = frozenset("""
+    a an and are as at be by can could describe did do does explain for from give how i in is it
+    its me of on or please question should tell that the their there these this to type types
+    use used using various was we what when where which why will with would you your
+""".split())
+
+
+def _stem(word):
+    for suffix in ("ing", "es", "ed", "s"):
+        if len(word) > 4 and word.endswith(suffix):
+            return word[:-len(suffix)]
+    return word
+
+
+def _features(text):
+    words = [_stem(w) for w in _WORD.findall((text or "").lower()) if w not in _STOPWORDS]
+
+    for w in words:
+        yield w, 1.0
+        padded = f" {w} "
+        for i in range(len(padded) - 2):
+            yield "#" + padded[i:i + 3], 0.5
+    for a, b in zip(words, words[1:]):
+        yield a + " " + b, 0.75
+
+
+def question_embedding(text):
+    """Return the embedding of ``text`` as float32 bytes (empty text gives a zero vector)."""
+    vec = [0.0] * EMBEDDING_DIM
+    for feature, weight in _features(text):
+        h = zlib.crc32(feature.encode("utf-8"))
+        # Top bit picks the sign so colliding features tend to cancel out
+        vec[h % EMBEDDING_DIM] += -weight if h & 0x80000000 else weight
+
+    norm = math.sqrt(sum(v * v for v in vec))
+    if norm:
+        vec = [v / norm for v in vec]
+    return array("f", vec).tobytes()
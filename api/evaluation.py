@@ -0,0 +1,141 @@
+from . import llm, metrics, singleflight
+from .cache import evaluation_key, get_evaluation_cache
+from django.db import transaction
+
+from .llmjson import JSONExtractError, extract_json
+from .models import InterviewResult, Question
+from .questions import bank_question_for_text
+from .stats import record_result
+from .textstore import store_text
+
+
+EVALUATION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "score": {"type": "integer", "minimum": 0, "maximum": 10, "default": 0},
+        "strengths": {"type": "string", "default": ""},
+        "weaknesses": {"type": "string", "default": ""},
+        "improved_answer": {"type": "string", "default": ""},
+    },
+    "required": ["score", "strengths", "weaknesses", "improved_answer"],
+}
+
+
+class EvaluationError(Exception):
+    """Raised when the model call fails or its output can't be parsed."""
+
+    def __init__(self, payload, status=500):
+        super().__init__(payload.get("error"))
+        self.payload = payload
+        self.status = status
+
+
+# ============================================================
+# AI Prompt — Always produce FULL correct answer
+# ============================================================
+
+def build_evaluation_prompt(question, answer):
+    return f"""
+You are an interview evaluator. Follow these rules STRICTLY and output ONLY VALID JSON.
+
+1. If the given answer is meaningless, random, incorrect, or unrelated:
+   - score = 0
+   - strengths = "None"
+   - weaknesses = "Answer is meaningless, random, or incorrect"
+   - improved_answer = "Write the full correct and ideal answer to the question."
+
+2. If the answer is partially correct:
+   - Give a fair score between 1 and 7
+   - Identify strengths and weaknesses
+   - improved_answer must contain the correct, complete explanation.
+
+3. If the answer is fully correct:
+   - Give a score between 8 and 10
+   - improved_answer must still give an improved, professional version.
+
+Your improved_answer MUST ALWAYS contain the full correct explanation the candidate should have given.
+
+Evaluate:
+
+Question: {question}
+Answer: {answer}
+
+Return JSON ONLY:
+{{
+  "score": number,
+  "strengths": "string",
+  "weaknesses": "string",
+  "improved_answer": "string"
+}}
+"""
+
+
+def parse_evaluation(raw):
+    """The evaluation object in the model output, repaired and validated against EVALUATION_SCHEMA."""
+    try:
+        return extract_json(raw, EVALUATION_SCHEMA)
+    except JSONExtractError as e:
+        raise EvaluationError({"error": "AI returned invalid JSON", "raw": raw, "details": str(e)})
+
+
+def run_evaluation(question, answer):
+    cache = get_evaluation_cache()
+    cached = cache.get(question, answer)
+    if cached is not None:
+        return cached
+
+    def evaluate():
+        # Call Llama model
+        try:
+            ai = llm.chat(
+                "evaluate", build_evaluation_prompt(question, answer), format=llm.json_format(EVALUATION_SCHEMA)
+            )
+        except llm.LLMOverloaded as e:
+            raise EvaluationError(e.payload(), status=e.status)
+        except llm.LLMError as e:
+            raise EvaluationError({"error": "AI model error", "details": str(e)})
+
+        with metrics.phase("parse_evaluation"):
+            data = parse_evaluation(ai["message"]["content"])
+        cache.set(question, answer, data)
+        return data
+
+    # Double-submits and identical answers in flight share one model call
+    data = singleflight.do(
+        "evaluate:" + evaluation_key(question, answer),
+        evaluate,
+        recheck=lambda: cache.get(question, answer),
+    )
+    return dict(data)
+
+
+def resolve_bank_question(question_id):
+    """The bank question for a client-supplied id. Raises EvaluationError (400) for unknown ids."""
+    try:
+        question = Question.objects.defer("embedding").filter(id=int(question_id)).first()
+    except (TypeError, ValueError):
+        question = None
+    if question is None:
+        raise EvaluationError({"error": "Unknown question_id"}, status=400)
+    return question
+
+
+def save_evaluation(user, session_id, question, answer, data, skill=None, bank_question=None):
+    # Bank questions are stored as a reference; only ad-hoc text is copied
+    if bank_question is None and question:
+        bank_question = bank_question_for_text(question)
+
+    with transaction.atomic():
+        result = InterviewResult.objects.create(
+            user=user,
+            session_id=session_id,
+            question="" if bank_question is not None else question,
+            answer=answer,
+            score=data["score"],
+            strengths=data.get("strengths", ""),
+            weaknesses=data.get("weaknesses", ""),
+            improved_answer_blob=store_text(data.get("improved_answer", "")),
+            bank_question=bank_question,
+        )
+        record_result(result, skill)
+    return result
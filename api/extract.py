@@ -0,0 +1,109 @@
+"""
+Resume text extraction.
+
+Only depends on PyMuPDF and the standard library, never on Django, so it
+can run in a separate worker process.
+"""
+
+import io
+import zipfile
+from xml.etree.ElementTree import iterparse
+
+WORD_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+
+def _read_pdf(source, max_chars, max_pages):
+    import fitz  # PyMuPDF (fast)
+
+    if isinstance(source, str):
+        pdf = fitz.open(source)  # PyMuPDF reads pages lazily from the file
+    else:
+        pdf = fitz.open(stream=source, filetype="pdf")
+
+    parts = []
+    size = 0
+    with pdf:
+        for index in range(min(pdf.page_count, max_pages)):
+            page_text = pdf.load_page(index).get_text() + "\n"
+            parts.append(page_text)
+            size += len(page_text)
+            if size >= max_chars:
+                break
+
+    return "".join(parts)
+
+
+# Run content python-docx turns into text, besides w:t and w:br
+_RUN_CHARS = {WORD_NS + "tab": "\t", WORD_NS + "ptab": "\t", WORD_NS + "cr": "\n", WORD_NS + "noBreakHyphen": "-"}
+
+
+def _run_text(run):
+    parts = []
+    for node in run:
+        if node.tag == WORD_NS + "t":
+            parts.append(node.text or "")
+        elif node.tag == WORD_NS + "br":
+            # Line breaks only; page and column breaks have no text
+            if node.get(WORD_NS + "type", "textWrapping") == "textWrapping":
+                parts.append("\n")
+        elif node.tag in _RUN_CHARS:
+            parts.append(_RUN_CHARS[node.tag])
+    return "".join(parts)
+
+
+def _paragraph_text(paragraph):
+    parts = []
+    for child in paragraph:
+        if child.tag == WORD_NS + "r":
+            parts.append(_run_text(child))
+        elif child.tag == WORD_NS + "hyperlink":
+            parts.extend(_run_text(run) for run in child if run.tag == WORD_NS + "r")
+    return "".join(parts)
+
+
+def _read_docx(source, max_chars):
+    # Stream word/document.xml paragraph by paragraph instead of building the
+    # whole python-docx object tree, so we can stop at the character budget.
+    # Same text as python-docx's Document.paragraphs: top-level body
+    # paragraphs only (no tables or text boxes), with tabs and line breaks.
+    archive = zipfile.ZipFile(source if isinstance(source, str) else io.BytesIO(source))
+
+    parts = []
+    size = 0
+    depth = 0
+    with archive, archive.open("word/document.xml") as xml:
+        for event, elem in iterparse(xml, events=("start", "end")):
+            if event == "start":
+                depth += 1
+                continue
+            depth -= 1
+
+            # w:document > w:body > block; anything below a block is read with it
+            if depth != 2:
+                continue
+            if elem.tag == WORD_NS + "p":
+                para = _paragraph_text(elem) + "\n"
+                parts.append(para)
+                size += len(para)
+            elem.clear()
+            if size >= max_chars:
+                break
+
+    return "".join(parts)
+
+
+def extract_text(source, file_name, max_chars=3000, max_pages=20):
+    """
+    Return at most ``max_chars`` characters of text from a PDF or DOCX.
+
+    ``source`` is a file path or the raw bytes. Reading stops as soon as
+    the character budget is filled or ``max_pages`` PDF pages were read.
+    """
+    if file_name.endswith(".pdf"):
+        text = _read_pdf(source, max_chars, max_pages)
+    elif file_name.endswith(".docx"):
+        text = _read_docx(source, max_chars)
+    else:
+        raise ValueError("Unsupported file format")
+
+    return text[:max_chars]
@@ -0,0 +1,180 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import llm
+from .evaluation import EvaluationError, run_evaluation, save_evaluation
+from .models import EvaluationJob
+from .sse import sse_event
+
+
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.EVALUATION_WORKERS,
+            thread_name_prefix="evaluation",
+        )
+    return _executor
+
+
+def enqueue_evaluation(user, session_id, question, answer, bank_question=None, skill=None):
+    """
+    Store an evaluation job and hand it to the in-process worker pool once
+    the surrounding transaction commits. With EVALUATION_WORKERS = 0 the
+    job just waits in the table for ``manage.py run_evaluation_worker``.
+
+    The in-process pool is not durable: jobs it hasn't finished when the
+    process exits stay in the table, and only the worker command picks
+    them up again (see reclaim_stale_jobs).
+    """
+    job = EvaluationJob.objects.create(
+        user=user,
+        session_id=session_id,
+        question=question or "",
+        answer=answer or "",
+        bank_question=bank_question,
+        skill=skill or "",
+    )
+
+    if settings.EVALUATION_WORKERS > 0:
+        transaction.on_commit(lambda: _get_executor().submit(_process_in_thread, job.id))
+
+    return job
+
+
+def _process_in_thread(job_id):
+    try:
+        process_job(job_id)
+    finally:
+        # Worker threads don't go through the request cycle, so nothing else closes this
+        connection.close()
+
+
+class _Reclaimed(Exception):
+    """The job was handed to another runner while this one was still on it."""
+
+
+def process_job(job_id):
+    # Claiming with a conditional UPDATE keeps two workers from running the same job.
+    # The claim time marks this run, so a reclaimed job can't be finished twice.
+    claimed_at = timezone.now()
+    claimed = EvaluationJob.objects.filter(
+        id=job_id, status=EvaluationJob.STATUS_PENDING
+    ).update(status=EvaluationJob.STATUS_RUNNING, updated_at=claimed_at)
+    if not claimed:
+        return
+
+    job = EvaluationJob.objects.get(id=job_id)
+
+    try:
+        # Queued jobs already returned 202; let them wait for a model slot
+        with llm.background():
+            data = run_evaluation(job.question, job.answer)
+
+        with transaction.atomic():
+            result = save_evaluation(
+                job.user,
+                job.session_id,
+                job.question,
+                job.answer,
+                data,
+                skill=job.skill or None,
+                bank_question=job.bank_question,
+            )
+            if not _finish(job_id, claimed_at, status=EvaluationJob.STATUS_DONE, result=data, interview_result=result):
+                raise _Reclaimed
+    except _Reclaimed:
+        pass
+    except EvaluationError as e:
+        _finish(job_id, claimed_at, status=EvaluationJob.STATUS_FAILED, error=e.payload)
+    except Exception as e:
+        _finish(job_id, claimed_at, status=EvaluationJob.STATUS_FAILED,
+                error={"error": "Evaluation failed", "details": str(e)})
+
+
+def _finish(job_id, claimed_at, **fields):
+    """Record the outcome of the run claimed at ``claimed_at``, unless the job was reclaimed since."""
+    return EvaluationJob.objects.filter(
+        id=job_id, status=EvaluationJob.STATUS_RUNNING, updated_at=claimed_at
+    ).update(updated_at=timezone.now(), **fields)
+
+
+def reclaim_stale_jobs(timeout=None):
+    """
+    Put jobs stuck in ``running`` for longer than EVALUATION_JOB_TIMEOUT
+    seconds back in the queue: their worker died (process restart, crash)
+    before finishing them. Returns how many were reclaimed.
+    """
+    timeout = settings.EVALUATION_JOB_TIMEOUT if timeout is None else timeout
+    cutoff = timezone.now() - timedelta(seconds=timeout)
+    return EvaluationJob.objects.filter(
+        status=EvaluationJob.STATUS_RUNNING, updated_at__lt=cutoff
+    ).update(status=EvaluationJob.STATUS_PENDING, updated_at=timezone.now())
+
+
+def run_pending_jobs(limit=None):
+    """Reclaim stale jobs, then process queued jobs oldest first. Returns how many were picked up."""
+    reclaim_stale_jobs()
+
+    ids = EvaluationJob.objects.filter(
+        status=EvaluationJob.STATUS_PENDING
+    ).order_by("created_at").values_list("id", flat=True)
+
+    if limit:
+        ids = ids[:limit]
+
+    count = 0
+    for job_id in list(ids):
+        process_job(job_id)
+        count += 1
+    return count
+
+
+def job_payload(job):
+    payload = {"job_id": str(job.id), "status": job.status}
+    if job.status == EvaluationJob.STATUS_DONE:
+        payload["result"] = job.result
+    elif job.status == EvaluationJob.STATUS_FAILED:
+        payload["error"] = job.error
+    return payload
+
+
+async def stream_job_events(job_id, poll_interval=0.5, timeout=300):
+    """
+    Server-sent events for a job: a ``status`` event on every change, then
+    ``done``/``failed``. Waits on the event loop, so an open stream doesn't
+    hold a server thread.
+    """
+    deadline = time.monotonic() + timeout
+    last_status = None
+    get_job = sync_to_async(lambda: EvaluationJob.objects.filter(id=job_id).first())
+
+    while True:
+        job = await get_job()
+        if job is None:
+            yield sse_event("error", {"error": "Job not found"})
+            return
+
+        if job.status != last_status:
+            last_status = job.status
+            yield sse_event("status", {"job_id": str(job.id), "status": job.status})
+
+        if job.status in (EvaluationJob.STATUS_DONE, EvaluationJob.STATUS_FAILED):
+            yield sse_event(job.status, job_payload(job))
+            return
+
+        if time.monotonic() > deadline:
+            yield sse_event("timeout", {"job_id": str(job.id), "status": job.status})
+            return
+
+        await asyncio.sleep(poll_interval)
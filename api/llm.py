@@ -0,0 +1,526 @@
+"""
+Single entry point for every LLM call the API makes.
+
+Calls are grouped by kind ("question", "evaluate", "resume"). Each kind
+gets its own model, timeout and retry policy from settings. All Ollama
+clients share one keep-alive connection pool. Set LLM_BACKEND = "mock" to
+get fast, deterministic answers without a running Ollama server.
+
+Every call first passes admission control: a per-process limit on calls
+in flight, per-kind caps, a priority order for who gets the next free
+slot and bounded wait queues. When a queue is full or the wait times out
+the call fails fast with LLMOverloaded instead of piling up.
+"""
+
+import asyncio
+import bisect
+import contextvars
+import hashlib
+import itertools
+import json
+import math
+import random
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+
+import httpx
+import ollama
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+from . import metrics
+
+
+class LLMError(Exception):
+    pass
+
+
+class LLMOverloaded(LLMError):
+    """
+    Raised when admission control turns a call away. ``status`` is 429 when
+    the wait queue was full and 503 when the wait timed out.
+    """
+
+    def __init__(self, message, status, retry_after):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+    def payload(self):
+        return {"error": "AI model busy", "details": str(self), "retry_after": self.retry_after}
+
+
+def _setting(name, kind):
+    values = getattr(settings, name)
+    return values.get(kind, values["default"])
+
+
+def model_for(kind):
+    return _setting("LLM_MODELS", kind)
+
+
+def timeout_for(kind):
+    return _setting("LLM_TIMEOUTS", kind)
+
+
+def _is_retryable(exc):
+    if isinstance(exc, ollama.ResponseError):
+        return exc.status_code == 429 or exc.status_code >= 500
+    return isinstance(exc, (ConnectionError, httpx.TransportError))
+
+
+def _backoff(attempt):
+    delay = settings.LLM_RETRY_BACKOFF * (2 ** attempt)
+    return delay + random.uniform(0, delay / 2)
+
+
+# ============================================================
+# OLLAMA BACKEND
+# ============================================================
+
+class OllamaBackend:
+    def __init__(self, host, max_connections):
+        self.host = host
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+        )
+        self._transport = httpx.HTTPTransport(limits=self.limits)
+        self._clients = {}
+        self._async_clients = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def _client(self, kind):
+        client = self._clients.get(kind)
+        if client is None:
+            with self._lock:
+                client = self._clients.get(kind)
+                if client is None:
+                    # Per-kind clients only differ in timeout; the transport (and its pool) is shared
+                    client = ollama.Client(
+                        host=self.host,
+                        timeout=timeout_for(kind),
+                        transport=self._transport,
+                    )
+                    self._clients[kind] = client
+        return client
+
+    def _async_client(self, kind):
+        # httpx async pools are bound to the event loop that created them
+        loop = asyncio.get_running_loop()
+        per_loop = self._async_clients.setdefault(loop, {})
+        if "transport" not in per_loop:
+            per_loop["transport"] = httpx.AsyncHTTPTransport(limits=self.limits)
+        if kind not in per_loop:
+            per_loop[kind] = ollama.AsyncClient(
+                host=self.host,
+                timeout=timeout_for(kind),
+                transport=per_loop["transport"],
+            )
+        return per_loop[kind]
+
+    def chat(self, kind, model, messages, format=None):
+        return self._client(kind).chat(model=model, messages=messages, format=format)
+
+    async def stream(self, kind, model, messages, format=None):
+        """Yield the response chunks as they arrive; the last one carries the token counts."""
+        response = await self._async_client(kind).chat(model=model, messages=messages, stream=True, format=format)
+        async for chunk in response:
+            yield chunk
+
+
+# ============================================================
+# MOCK BACKEND
+# ============================================================
+
+class MockBackend:
+    """Answers instantly with output derived from a hash of the prompt."""
+
+    def _content(self, kind, messages):
+        prompt = messages[-1]["content"]
+        seed = int(hashlib.sha1(prompt.encode("utf-8")).hexdigest()[:8], 16)
+
+        if kind == "evaluate":
+            return json.dumps({
+                "score": seed % 11,
+                "strengths": "Mock strengths.",
+                "weaknesses": "Mock weaknesses.",
+                "improved_answer": f"Mock improved answer {seed}.",
+            })
+
+        if kind == "resume":
+            return json.dumps({
+                "ats_score": seed % 101,
+                "best_fit_role": "software engineer",
+                "top_skills": "python, django, sql",
+                "strengths": "Mock strengths.",
+                "weaknesses": "Mock weaknesses.",
+                "skills_missing": "docker, kubernetes",
+                "summary": "Mock summary.",
+            })
+
+        return f"Mock interview question {seed}?"
+
+    def _response(self, kind, model, messages):
+        content = self._content(kind, messages)
+        return {
+            "model": model,
+            "message": {"role": "assistant", "content": content},
+            "done": True,
+            "prompt_eval_count": len(messages[-1]["content"].split()),
+            "eval_count": len(content.split()),
+        }
+
+    def chat(self, kind, model, messages, format=None):
+        return self._response(kind, model, messages)
+
+    async def stream(self, kind, model, messages, format=None):
+        final = self._response(kind, model, messages)
+        content = final["message"]["content"]
+        for i in range(0, len(content), 16):
+            yield {"model": model, "message": {"role": "assistant", "content": content[i:i + 16]}, "done": False}
+        yield {**final, "message": {"role": "assistant", "content": ""}}
+
+
+# ============================================================
+# ADMISSION CONTROL
+# ============================================================
+
+# Set inside background() so queued work waits for a slot instead of being
+# rejected. Holds the longest wait for a slot, math.inf for no limit.
+_background = contextvars.ContextVar("llm_background", default=None)
+
+BACKGROUND_PRIORITY = 100
+
+
+@contextmanager
+def background(max_wait=None):
+    """
+    Run LLM calls as background work: lowest priority, never rejected for a
+    full queue. Waiting for a slot is unbounded unless ``max_wait`` seconds
+    are given, after which the call fails with LLMOverloaded (503).
+    """
+    token = _background.set(math.inf if max_wait is None else max_wait)
+    try:
+        yield
+    finally:
+        _background.reset(token)
+
+
+class _KindStats:
+    def __init__(self):
+        self.running = 0
+        self.queued = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.service_avg = None
+
+
+class Limiter:
+    """
+    Hands out LLM slots. Waiters are kept sorted by (priority, arrival); when
+    a slot frees up it goes to the first waiter whose kind is under its cap.
+    """
+
+    def __init__(self, max_concurrency):
+        self.max_concurrency = max_concurrency
+        self._cond = threading.Condition()
+        self._waiting = []
+        self._seq = itertools.count()
+        self._running = 0
+        self._stats = {}
+
+    def _kind(self, kind):
+        stats = self._stats.get(kind)
+        if stats is None:
+            stats = self._stats[kind] = _KindStats()
+        return stats
+
+    def _can_run(self, kind):
+        return (
+            self._running < self.max_concurrency
+            and self._kind(kind).running < _setting("LLM_CONCURRENCY", kind)
+        )
+
+    def _is_next(self, ticket):
+        for waiting in self._waiting:
+            if self._can_run(waiting[2]):
+                return waiting is ticket
+        return False
+
+    def _retry_after(self, kind):
+        stats = self._kind(kind)
+        service = stats.service_avg or 5.0
+        cap = _setting("LLM_CONCURRENCY", kind)
+        return max(1, min(60, math.ceil(service * (stats.queued + 1) / cap)))
+
+    def acquire(self, kind):
+        max_wait = _background.get()
+        bg = max_wait is not None
+        priority = BACKGROUND_PRIORITY if bg else _setting("LLM_PRIORITIES", kind)
+        if bg:
+            timeout = None if max_wait == math.inf else max_wait
+        else:
+            timeout = _setting("LLM_QUEUE_TIMEOUTS", kind)
+        stats = self._kind(kind)
+        start = time.monotonic()
+
+        with self._cond:
+            if not bg and stats.queued >= _setting("LLM_QUEUE_LIMITS", kind) and not self._can_run(kind):
+                stats.rejected += 1
+                raise LLMOverloaded(f"Too many queued {kind} calls", 429, self._retry_after(kind))
+
+            ticket = (priority, next(self._seq), kind)
+            bisect.insort(self._waiting, ticket)
+            stats.queued += 1
+            try:
+                while not self._is_next(ticket):
+                    remaining = None if timeout is None else timeout - (time.monotonic() - start)
+                    if remaining is not None and remaining <= 0:
+                        stats.timed_out += 1
+                        raise LLMOverloaded(f"Timed out waiting for a {kind} slot", 503, self._retry_after(kind))
+                    self._cond.wait(remaining)
+            finally:
+                self._waiting.remove(ticket)
+                stats.queued -= 1
+                # Whoever is next may have been blocked behind this ticket
+                self._cond.notify_all()
+
+            waited = time.monotonic() - start
+            metrics.LLM_WAIT_SECONDS.observe(waited, kind)
+            self._running += 1
+            stats.running += 1
+            stats.admitted += 1
+            stats.wait_total += waited
+            stats.wait_max = max(stats.wait_max, waited)
+        return time.monotonic()
+
+    def release(self, kind, started):
+        elapsed = time.monotonic() - started
+        with self._cond:
+            self._running -= 1
+            stats = self._kind(kind)
+            stats.running -= 1
+            stats.service_avg = elapsed if stats.service_avg is None else 0.8 * stats.service_avg + 0.2 * elapsed
+            self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            return {
+                "max_concurrency": self.max_concurrency,
+                "running": self._running,
+                "queued": len(self._waiting),
+                "kinds": {
+                    kind: {
+                        "running": s.running,
+                        "queued": s.queued,
+                        "admitted": s.admitted,
+                        "rejected": s.rejected,
+                        "timed_out": s.timed_out,
+                        "avg_wait_ms": round(s.wait_total * 1000 / s.admitted, 1) if s.admitted else 0.0,
+                        "max_wait_ms": round(s.wait_max * 1000, 1),
+                    }
+                    for kind, s in sorted(self._stats.items())
+                },
+            }
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_limiter():
+    """The process-wide limiter, or None when LLM_MAX_CONCURRENCY is 0."""
+    global _limiter
+    if _limiter is None and settings.LLM_MAX_CONCURRENCY > 0:
+        with _limiter_lock:
+            if _limiter is None:
+                _limiter = Limiter(settings.LLM_MAX_CONCURRENCY)
+    return _limiter
+
+
+@metrics.collector
+def _limiter_metrics():
+    limiter = _limiter
+    if limiter is None:
+        return []
+    kinds = limiter.stats()["kinds"]
+    return [
+        ("interview_llm_running", "gauge", "LLM calls in flight.",
+         [({"kind": k}, s["running"]) for k, s in kinds.items()]),
+        ("interview_llm_queued", "gauge", "LLM calls waiting for a slot.",
+         [({"kind": k}, s["queued"]) for k, s in kinds.items()]),
+        ("interview_llm_rejected_total", "counter", "LLM calls turned away by admission control.",
+         [({"kind": k, "reason": "queue_full"}, s["rejected"]) for k, s in kinds.items()]
+         + [({"kind": k, "reason": "timeout"}, s["timed_out"]) for k, s in kinds.items()]),
+    ]
+
+
+@contextmanager
+def _slot(kind):
+    limiter = get_limiter()
+    if limiter is None:
+        yield
+        return
+    started = limiter.acquire(kind)
+    try:
+        yield
+    finally:
+        limiter.release(kind, started)
+
+
+class Reservation:
+    """
+    A limiter slot taken ahead of a stream, so admission errors can still
+    be answered with a status code. release() may be called more than once.
+    """
+
+    def __init__(self, limiter, kind, started):
+        self._limiter = limiter
+        self._kind = kind
+        self._started = started
+        self._released = threading.Lock()
+
+    def release(self):
+        if self._limiter is not None and self._released.acquire(blocking=False):
+            self._limiter.release(self._kind, self._started)
+
+
+async def reserve(kind):
+    """Wait for a slot for a ``kind`` stream. Raises LLMOverloaded if turned away."""
+    limiter = get_limiter()
+    started = await _acquire_async(limiter, kind) if limiter else None
+    return Reservation(limiter, kind, started)
+
+
+async def _acquire_async(limiter, kind):
+    # Waiting for a slot blocks, so do it off the event loop
+    future = asyncio.ensure_future(asyncio.to_thread(limiter.acquire, kind))
+    try:
+        return await asyncio.shield(future)
+    except asyncio.CancelledError:
+        # The client went away while we waited; hand the slot back once we get it
+        future.add_done_callback(
+            lambda f: f.cancelled() or f.exception() or limiter.release(kind, f.result())
+        )
+        raise
+
+
+# ============================================================
+# PUBLIC API
+# ============================================================
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                if settings.LLM_BACKEND == "mock":
+                    _backend = MockBackend()
+                elif settings.LLM_BACKEND == "ollama":
+                    _backend = OllamaBackend(settings.OLLAMA_HOST, settings.LLM_MAX_CONNECTIONS)
+                else:
+                    raise LLMError(f"Unknown LLM_BACKEND {settings.LLM_BACKEND!r}")
+    return _backend
+
+
+@receiver(setting_changed)
+def _reset_backend(setting, **kwargs):
+    global _backend, _limiter
+    if setting.startswith("LLM_") or setting == "OLLAMA_HOST":
+        _backend = None
+        _limiter = None
+
+
+def json_format(schema):
+    """The ``format`` for a call whose output should be an object matching ``schema``."""
+    if settings.LLM_JSON_FORMAT == "schema":
+        return schema
+    if settings.LLM_JSON_FORMAT == "json":
+        return "json"
+    return None
+
+
+def chat(kind, prompt, format=None):
+    """
+    Run one chat completion for ``kind`` and return the raw response.
+
+    Connection failures, timeouts and 429/5xx answers are retried with
+    exponential backoff, up to LLM_RETRIES extra attempts. Raises
+    LLMOverloaded if admission control turns the call away.
+    """
+    backend = get_backend()
+    model = model_for(kind)
+    messages = [{"role": "user", "content": prompt}]
+
+    with _slot(kind):
+        start = time.perf_counter()
+        attempt = 0
+        while True:
+            try:
+                response = backend.chat(kind, model, messages, format=format)
+            except Exception as e:
+                if attempt >= settings.LLM_RETRIES or not _is_retryable(e):
+                    metrics.record_llm(kind, model, time.perf_counter() - start, outcome="error")
+                    raise LLMError(str(e)) from e
+                time.sleep(_backoff(attempt))
+                attempt += 1
+            else:
+                metrics.record_llm(kind, model, time.perf_counter() - start, response)
+                return response
+
+
+async def stream(kind, prompt, format=None, reservation=None):
+    """
+    Yield the response for ``kind`` token by token.
+
+    Pass a ``reservation`` from reserve() to use a slot taken before the
+    response started; it is released when the stream ends. Only failures
+    before the first token are retried. After that the client has already
+    seen part of the output.
+    """
+    backend = get_backend()
+    model = model_for(kind)
+    messages = [{"role": "user", "content": prompt}]
+
+    if reservation is None:
+        reservation = await reserve(kind)
+    start = time.perf_counter()
+    outcome = "error"
+    final = None
+    try:
+        attempt = 0
+        while True:
+            started = False
+            try:
+                async for chunk in backend.stream(kind, model, messages, format=format):
+                    started = True
+                    if chunk.get("done"):
+                        final = chunk
+                    token = chunk["message"]["content"]
+                    if token:
+                        yield token
+                outcome = "ok"
+                return
+            except GeneratorExit:
+                # The caller stopped reading because it has what it needs
+                outcome = "ok"
+                raise
+            except Exception as e:
+                if started or attempt >= settings.LLM_RETRIES or not _is_retryable(e):
+                    raise LLMError(str(e)) from e
+                await asyncio.sleep(_backoff(attempt))
+                attempt += 1
+    finally:
+        metrics.record_llm(kind, model, time.perf_counter() - start, final, outcome=outcome)
+        reservation.release()
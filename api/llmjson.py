@@ -0,0 +1,318 @@
+"""
+Pull one JSON object out of LLM output.
+
+Models wrap their JSON in prose or code fences, leave trailing commas,
+use single quotes or Python literals, and get cut off mid-string when
+they hit a token limit. JSONExtractor scans output chunk by chunk as it
+arrives and stops at the first balanced top-level object. repair()
+rewrites the usual defects, and validate() checks the result against a
+small JSON Schema subset.
+
+The same schemas go to Ollama as the call's ``format`` (see
+llm.json_format), which constrains generation to that shape in the first
+place.
+"""
+
+import json
+import math
+import re
+
+
+class JSONExtractError(ValueError):
+    """No usable JSON object could be recovered from the text."""
+
+
+# Characters that change the scanner's state
+_SCAN = re.compile(r"[\"'\\{}\[\]]")
+_decoder = json.JSONDecoder()
+
+
+class JSONExtractor:
+    """
+    Incremental scanner for the first top-level JSON object in a stream.
+
+    ``feed()`` each chunk as it arrives. It returns True once the object's
+    closing brace has been seen, so a streaming caller can stop reading.
+    ``result()`` parses what was collected, repairing it if needed (a
+    truncated object is closed off).
+    """
+
+    def __init__(self):
+        self._parts = []
+        self._started = False
+        self._done = False
+        self._depth = 0
+        self._quote = None
+        self._escape = False
+
+    @property
+    def done(self):
+        return self._done
+
+    def feed(self, chunk):
+        if self._done or not chunk:
+            return self._done
+
+        start = 0
+        if not self._started:
+            start = chunk.find("{")
+            if start == -1:
+                return False
+            self._started = True
+
+        depth, quote = self._depth, self._quote
+        # Index of the character a pending backslash escapes (0: the previous chunk ended with one)
+        escaped = 0 if self._escape else -1
+        for m in _SCAN.finditer(chunk, start):
+            i, c = m.start(), m.group()
+            if i == escaped:
+                continue
+            if quote:
+                if c == "\\":
+                    escaped = i + 1
+                elif c == quote:
+                    quote = None
+            elif c in "\"'":
+                quote = c
+            elif c in "{[":
+                depth += 1
+            elif c in "}]":
+                depth -= 1
+                if depth == 0:
+                    self._parts.append(chunk[start:m.end()])
+                    self._done = True
+                    return True
+
+        self._parts.append(chunk[start:])
+        self._depth, self._quote, self._escape = depth, quote, escaped == len(chunk)
+        return False
+
+    def text(self):
+        return "".join(self._parts)
+
+    def result(self):
+        if not self._started:
+            raise JSONExtractError("no JSON object in the output")
+        return loads(self.text())
+
+
+def loads(text):
+    """json.loads, falling back to repair() for the defects models commonly produce."""
+    try:
+        return json.loads(text)
+    except ValueError:
+        pass
+    try:
+        return json.loads(repair(text))
+    except ValueError as e:
+        raise JSONExtractError(f"unparseable JSON: {e}") from e
+
+
+def extract_json(text, schema=None):
+    """
+    The first JSON object in ``text`` that parses (after repair) and, when
+    a ``schema`` is given, validates. Raises JSONExtractError otherwise.
+    """
+    error = JSONExtractError("no JSON object in the output")
+    start = text.find("{")
+    attempts = 0
+    while start != -1 and attempts < 5:
+        attempts += 1
+        try:
+            # Well-formed output (with or without text around it) never reaches the scanner
+            data = _decoder.raw_decode(text, start)[0]
+        except ValueError:
+            extractor = JSONExtractor()
+            extractor.feed(text[start:])
+            data = None
+        try:
+            if data is None:
+                data = extractor.result()
+            return validate(data, schema) if schema else data
+        except JSONExtractError as e:
+            error = e
+        # A brace in the prose before the real object; try the next one
+        start = text.find("{", start + 1)
+    raise error
+
+
+# ============================================================
+# REPAIR
+# ============================================================
+
+_TOKEN = re.compile(
+    r'"((?:[^"\\]|\\.)*)("?)'        # 1, 2: double-quoted string, possibly unterminated
+    r"|'((?:[^'\\]|\\.)*)('?)"       # 3, 4: single-quoted string
+    r"|([{}\[\],:])"                 # 5: punctuation
+    r"|([^\s{}\[\],:\"']+)",         # 6: bareword (number, literal, unquoted key)
+    re.S,
+)
+_ESCAPE = re.compile(r'\\(.)|(["\x00-\x1f])', re.S)
+_NUMBER = re.compile(r"-?\d+(\.\d+)?([eE][+-]?\d+)?")
+_PUNCT = set("{}[],:")
+_LITERALS = {"true": "true", "false": "false", "null": "null", "True": "true", "False": "false", "None": "null"}
+
+
+def _fix_escape(m):
+    escaped, raw = m.groups()
+    if escaped is not None:
+        if escaped in '"\\/bfnrtu':
+            return m.group()
+        if escaped == "'":
+            return "'"
+        # \_ or \( from markdown: keep the backslash as a literal character
+        return "\\\\" + _fix_escape_char(escaped)
+    return _fix_escape_char(raw)
+
+
+def _fix_escape_char(c):
+    return json.dumps(c)[1:-1]
+
+
+def _string(body):
+    return '"' + _ESCAPE.sub(_fix_escape, body) + '"'
+
+
+def _trim(out, in_object):
+    """Drop what can't end a container: trailing commas, a key without a value."""
+    while out:
+        last = out[-1]
+        if last == ",":
+            out.pop()
+        elif last == ":":
+            out.pop()
+            if out:
+                out.pop()
+        elif in_object and last.startswith('"') and len(out) > 1 and out[-2] in ",{":
+            out.pop()
+        else:
+            break
+
+
+def repair(text):
+    """
+    Rewrite almost-JSON into JSON: single-quoted strings, raw newlines and
+    stray escapes inside strings, unquoted keys, Python literals, trailing
+    or doubled commas, and output cut off before the closing brackets.
+    """
+    out = []
+    stack = []
+
+    for m in _TOKEN.finditer(text):
+        dq_body, dq_end, sq_body, sq_end, punct, word = m.groups()
+
+        if dq_body is not None:
+            out.append(_string(dq_body))
+        elif sq_body is not None:
+            out.append(_string(sq_body))
+        elif punct in ("{", "["):
+            stack.append("}" if punct == "{" else "]")
+            out.append(punct)
+        elif punct in ("}", "]"):
+            if not stack:
+                break
+            _trim(out, stack[-1] == "}")
+            out.append(stack.pop())
+            if not stack:
+                break
+        elif punct == ",":
+            if out and out[-1] not in ",{[":
+                out.append(",")
+        elif punct == ":":
+            if out and not out[-1].startswith('"'):
+                out[-1] = json.dumps(out[-1])
+            out.append(":")
+        elif word is not None:
+            if word in _LITERALS:
+                out.append(_LITERALS[word])
+            elif _NUMBER.fullmatch(word):
+                out.append(word)
+            elif out and out[-1] not in ",:{[" and not out[-1].startswith('"'):
+                # Unquoted text running on: "score": seven out of ten
+                out[-1] = out[-1] + " " + word
+            else:
+                out.append(word)
+
+    while stack:
+        _trim(out, stack[-1] == "}")
+        out.append(stack.pop())
+
+    # Barewords that are still not JSON values become strings
+    return "".join(
+        tok if tok in _PUNCT or tok.startswith('"') or tok in _LITERALS.values() or _NUMBER.fullmatch(tok)
+        else json.dumps(tok)
+        for tok in out
+    )
+
+
+# ============================================================
+# SCHEMA VALIDATION
+# ============================================================
+
+def _number(value, integer):
+    if isinstance(value, bool):
+        raise ValueError
+    if isinstance(value, str):
+        m = _NUMBER.search(value)
+        if not m:
+            raise ValueError
+        value = m.group()
+    try:
+        value = float(value)
+    except OverflowError:  # an int too large for a float
+        raise ValueError
+    # Infinity, NaN and 1e400 parse as floats but are no usable score
+    if not math.isfinite(value):
+        raise ValueError
+    return int(round(value)) if integer else value
+
+
+def _coerce(value, prop):
+    kind = prop.get("type")
+    if kind in ("integer", "number"):
+        value = _number(value, kind == "integer")
+        if "minimum" in prop:
+            value = max(prop["minimum"], value)
+        if "maximum" in prop:
+            value = min(prop["maximum"], value)
+        return value
+    if kind == "string":
+        if isinstance(value, list):
+            return ", ".join(str(v) for v in value)
+        if isinstance(value, dict):
+            return json.dumps(value)
+        return str(value)
+    return value
+
+
+def validate(data, schema):
+    """
+    Check ``data`` against an object schema (``properties`` with
+    ``type``/``minimum``/``maximum``, ``required``) and coerce it where
+    the intent is clear: "7/10" becomes 7, out-of-range numbers are
+    clamped, lists become comma-separated strings. A missing field with
+    a ``default`` gets the default instead of failing.
+    """
+    if not isinstance(data, dict):
+        raise JSONExtractError("expected a JSON object")
+
+    cleaned = dict(data)
+    problems = []
+    required = set(schema.get("required", ()))
+
+    for name, prop in schema["properties"].items():
+        value = data.get(name)
+        if value is None:
+            if "default" in prop:
+                cleaned[name] = prop["default"]
+            elif name in required:
+                problems.append(f"missing {name}")
+            continue
+        try:
+            cleaned[name] = _coerce(value, prop)
+        except (TypeError, ValueError):
+            problems.append(f"{name} is not a valid {prop.get('type')}")
+
+    if problems:
+        raise JSONExtractError("; ".join(problems))
+    return cleaned
@@ -0,0 +1,24 @@
+from contextlib import contextmanager
+
+from django.db import connection
+
+
+@contextmanager
+def bench_database(name=None):
+    """
+    Run a benchmark against a freshly migrated throwaway database so the
+    real one is never touched. Pass ``name`` to put a SQLite test database
+    in a file instead of memory, e.g. when several threads write to it.
+    """
+    old_name = connection.settings_dict["NAME"]
+    test_settings = connection.settings_dict.setdefault("TEST", {})
+    old_test_name = test_settings.get("NAME")
+    if name:
+        test_settings["NAME"] = name
+
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        test_settings["NAME"] = old_test_name
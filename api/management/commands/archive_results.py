@@ -0,0 +1,62 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from django.utils import timezone
+
+from api.archive import archive_sessions, codec_available, stale_sessions
+from api.models import InterviewResult
+
+
+class Command(BaseCommand):
+    help = (
+        "Move sessions whose newest result is older than --days out of InterviewResult "
+        "into compressed ArchivedSession rows. Dashboard rollups are kept as they are, "
+        "and session review reads archived rows back transparently."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=None,
+                            help="Archive sessions idle this long (default: RESULT_ARCHIVE_AFTER_DAYS)")
+        parser.add_argument("--codec", default=None, choices=["gzip", "zstd"],
+                            help="Compression (default: RESULT_ARCHIVE_CODEC)")
+        parser.add_argument("--batch", type=int, default=200, help="Sessions per transaction")
+        parser.add_argument("--dry-run", action="store_true", help="Only count what would be archived")
+
+    def handle(self, *args, **options):
+        days = options["days"] if options["days"] is not None else settings.RESULT_ARCHIVE_AFTER_DAYS
+        codec = options["codec"] or settings.RESULT_ARCHIVE_CODEC
+        if not codec_available(codec):
+            raise CommandError(f"Codec {codec!r} is not available (zstd needs the zstandard package)")
+
+        cutoff = timezone.now() - timedelta(days=days)
+
+        sessions = results = raw = compressed = 0
+        after = ""
+        while True:
+            batch = stale_sessions(cutoff, after, options["batch"])
+            if not batch:
+                break
+            after = batch[-1]
+
+            if options["dry_run"]:
+                sessions += len(batch)
+                results += InterviewResult.objects.filter(session_id__in=batch).aggregate(n=Count("id"))["n"]
+                continue
+
+            archived, n, raw_size, packed = archive_sessions(batch, codec, cutoff)
+            sessions += archived
+            results += n
+            raw += raw_size
+            compressed += packed
+
+        if options["dry_run"]:
+            self.stdout.write(f"Would archive {results} results in {sessions} sessions older than {days} days")
+            return
+
+        ratio = f" ({raw / compressed:.1f}x)" if compressed else ""
+        self.stdout.write(self.style.SUCCESS(
+            f"Archived {results} results in {sessions} sessions: "
+            f"{raw / 1024:.0f} KiB of review data stored as {compressed / 1024:.0f} KiB {codec}{ratio}"
+        ))
@@ -0,0 +1,140 @@
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, connections
+
+from api.evaluation import save_evaluation
+from api.stats import dashboard_payload
+
+from ._bench import bench_database
+
+EVALUATION = {"score": 7, "strengths": "Clear.", "weaknesses": "Brief.", "improved_answer": "A fuller answer."}
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark concurrent evaluate_answer-style writes (result insert plus dashboard "
+        "rollups) with dashboard reads alongside, for each database mode."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--modes", default=None,
+                            help="SQLite: comma-separated from default,tuned (default: both). "
+                                 "Ignored for other engines, which run the configured database as is.")
+        parser.add_argument("--writers", type=int, default=8)
+        parser.add_argument("--writes", type=int, default=100, help="Writes per writer thread")
+        parser.add_argument("--readers", type=int, default=2)
+
+    def handle(self, *args, **options):
+        if connection.vendor == "sqlite":
+            modes = (options["modes"] or "default,tuned").split(",")
+            tuned = dict(settings.DATABASES["default"].get("OPTIONS", {}))
+            variants = {"default": {}, "tuned": tuned}
+            unknown = set(modes) - set(variants)
+            if unknown:
+                raise CommandError(f"Unknown modes: {', '.join(sorted(unknown))}")
+        else:
+            modes = [connection.vendor]
+            variants = {connection.vendor: None}
+
+        self.stdout.write(
+            f"{'mode':<10} {'writes/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7} {'reads/s':>8}"
+        )
+        for mode in modes:
+            row = self._run(variants[mode], options)
+            self.stdout.write(
+                f"{mode:<10} {row['writes_per_s']:>9.1f} {row['p50']:>8.2f} {row['p95']:>8.2f} "
+                f"{row['p99']:>8.2f} {row['errors']:>7} {row['reads_per_s']:>8.1f}"
+            )
+
+    def _run(self, db_options, options):
+        settings_dict = connections.settings["default"]
+        old_options = settings_dict.get("OPTIONS", {})
+        name = None
+        if db_options is not None:
+            # Swap the connection options for this run; every thread's connection reads this dict
+            connections.close_all()
+            settings_dict["OPTIONS"] = db_options
+            name = os.path.join(tempfile.mkdtemp(prefix="bench-db-"), "bench.sqlite3")
+
+        try:
+            with bench_database(name):
+                users = [
+                    User.objects.create_user(username=f"writer{i}", password=None)
+                    for i in range(options["writers"])
+                ]
+                return self._contend(users, options)
+        finally:
+            if db_options is not None:
+                connections.close_all()
+                settings_dict["OPTIONS"] = old_options
+
+    def _contend(self, users, options):
+        latencies = []
+        errors = []
+        reads = [0]
+        lock = threading.Lock()
+        stop = threading.Event()
+
+        def writer(user):
+            mine = []
+            for i in range(options["writes"]):
+                start = time.perf_counter()
+                try:
+                    save_evaluation(user, f"bench-{user.id}-{i % 5}", f"Question {i}", "Answer", EVALUATION, "python")
+                except OperationalError as e:
+                    with lock:
+                        errors.append(str(e))
+                    continue
+                mine.append(time.perf_counter() - start)
+            with lock:
+                latencies.extend(mine)
+            connection.close()
+
+        def reader():
+            n = 0
+            while not stop.is_set():
+                try:
+                    dashboard_payload(users[n % len(users)])
+                    n += 1
+                except OperationalError as e:
+                    with lock:
+                        errors.append(str(e))
+            with lock:
+                reads[0] += n
+            connection.close()
+
+        writers = [threading.Thread(target=writer, args=(u,)) for u in users]
+        readers = [threading.Thread(target=reader) for _ in range(options["readers"])]
+
+        start = time.perf_counter()
+        for t in readers + writers:
+            t.start()
+        for t in writers:
+            t.join()
+        elapsed = time.perf_counter() - start
+        stop.set()
+        for t in readers:
+            t.join()
+
+        ms = sorted(x * 1000 for x in latencies) or [0.0]
+
+        def pct(p):
+            return ms[min(len(ms) - 1, int(p / 100 * len(ms)))]
+
+        if errors:
+            self.stderr.write(f"  {len(errors)} errors, e.g. {errors[0]}")
+        return {
+            "writes_per_s": len(latencies) / elapsed,
+            "p50": statistics.median(ms),
+            "p95": pct(95),
+            "p99": pct(99),
+            "errors": len(errors),
+            "reads_per_s": reads[0] / elapsed,
+        }
@@ -0,0 +1,69 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from rest_framework.test import APIRequestFactory
+
+from api.models import Question, question_text_hash
+from api.questions import pick_random_question
+from api.views import get_question
+
+from ._bench import bench_database
+
+
+class Command(BaseCommand):
+    help = "Benchmark get_question latency as the question bank grows (uses a throwaway database)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", default="1000,10000,50000",
+                            help="Comma-separated bank sizes to measure")
+        parser.add_argument("--requests", type=int, default=200,
+                            help="Requests timed per bank size")
+
+    def handle(self, *args, **options):
+        sizes = [int(s) for s in options["sizes"].split(",") if s]
+        n_requests = options["requests"]
+        factory = APIRequestFactory()
+
+        self.stdout.write(f"{'bank size':>10} {'view ms':>10} {'pick ms':>10} {'list() ms':>10}")
+
+        with bench_database():
+            seeded = 0
+            for size in sizes:
+                Question.objects.bulk_create(
+                    [
+                        Question(
+                            text=f"Benchmark question {i}",
+                            text_hash=question_text_hash(f"Benchmark question {i}"),
+                            role="backend developer",
+                            skill=random.choice(["python", "django", "mysql"]),
+                            level=random.choice(["easy", "medium", "hard"]),
+                        )
+                        for i in range(seeded, size)
+                    ],
+                    batch_size=2000,
+                )
+                seeded = size
+
+                qs = Question.objects.filter(role="backend developer", skill="python", level="easy")
+
+                start = time.perf_counter()
+                for _ in range(n_requests):
+                    get_question(factory.get(
+                        "/api/get_question/",
+                        {"role": "backend developer", "skill": "python", "level": "easy"},
+                    ))
+                view_ms = (time.perf_counter() - start) * 1000 / n_requests
+
+                start = time.perf_counter()
+                for _ in range(n_requests):
+                    pick_random_question(qs)
+                pick_ms = (time.perf_counter() - start) * 1000 / n_requests
+
+                # Old behaviour, for comparison
+                start = time.perf_counter()
+                for _ in range(min(n_requests, 20)):
+                    random.choice(list(qs))
+                list_ms = (time.perf_counter() - start) * 1000 / min(n_requests, 20)
+
+                self.stdout.write(f"{size:>10} {view_ms:>10.3f} {pick_ms:>10.3f} {list_ms:>10.3f}")
@@ -0,0 +1,82 @@
+import json
+import os
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.evaluation import EVALUATION_SCHEMA
+from api.llmjson import JSONExtractError, JSONExtractor, extract_json, validate
+from api.resume import RESUME_SCHEMA
+
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "testdata", "llm_json_corpus.json")
+SCHEMAS = {"evaluate": EVALUATION_SCHEMA, "resume": RESUME_SCHEMA}
+
+
+def _old_parse(raw, schema):
+    # What evaluate_answer and analyze_resume used to do: strip fences, slice first "{" to last "}"
+    raw = raw.strip().replace("```json", "").replace("```", "")
+    data = json.loads(raw[raw.find("{"):raw.rfind("}") + 1])
+    if "score" in schema["properties"]:
+        try:
+            data["score"] = max(0, min(10, int(data.get("score", 0))))
+        except (TypeError, ValueError):
+            data["score"] = 0
+    return data
+
+
+def _new_parse(raw, schema):
+    return extract_json(raw, schema)
+
+
+def _streamed(raw, schema, chunk=4):
+    # Token-sized chunks as they arrive from the model, then the full-text path if needed
+    extractor = JSONExtractor()
+    for i in range(0, len(raw), chunk):
+        if extractor.feed(raw[i:i + chunk]):
+            break
+    try:
+        return validate(extractor.result(), schema)
+    except JSONExtractError:
+        return extract_json(raw, schema)
+
+
+def _recovered(parse, case):
+    try:
+        data = parse(case["raw"], SCHEMAS[case["kind"]])
+    except ValueError:
+        return bool(case.get("error"))
+    if case.get("error"):
+        return False
+    return all(data.get(k) == v for k, v in case["expect"].items())
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the old fence-strip-and-slice JSON parsing with api.llmjson on the "
+        "corpus of malformed model outputs used by the tests."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=500, help="Passes over the corpus for timing")
+
+    def handle(self, *args, **options):
+        with open(CORPUS_PATH) as f:
+            corpus = json.load(f)
+
+        self.stdout.write(f"{'parser':<10} {'correct':>9} {'us/output':>10}")
+        for name, parse in (("old", _old_parse), ("new", _new_parse), ("streamed", _streamed)):
+            correct = sum(_recovered(parse, case) for case in corpus)
+
+            start = time.perf_counter()
+            for _ in range(options["repeat"]):
+                for case in corpus:
+                    try:
+                        parse(case["raw"], SCHEMAS[case["kind"]])
+                    except ValueError:
+                        pass
+            per_output = (time.perf_counter() - start) / (options["repeat"] * len(corpus)) * 1e6
+
+            self.stdout.write(f"{name:<10} {f'{correct}/{len(corpus)}':>9} {per_output:>10.1f}")
+
+        failed = [case["name"] for case in corpus if not _recovered(_old_parse, case)]
+        self.stdout.write(f"old parser gets wrong: {', '.join(failed)}")
@@ -0,0 +1,106 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.embedding import question_embedding
+from api.models import Question, question_text_hash
+from api.questions import save_question_if_new
+from api.similarity import QuestionIndex
+
+from ._bench import bench_database
+
+TEMPLATES = [
+    "What is {a} in {s}?",
+    "Explain the difference between {a} and {b} in {s}.",
+    "How would you use {a} together with {b}?",
+    "When should you avoid {a} in a {s} project?",
+    "Describe a bug you fixed that involved {a}.",
+    "How does {a} affect {b} performance?",
+]
+TOPICS = [
+    "closures", "promises", "the event loop", "hooks", "context", "decorators", "generators",
+    "transactions", "indexes", "joins", "middleware", "signals", "migrations", "caching",
+    "threads", "garbage collection", "immutability", "recursion", "memoization", "pagination",
+    "serialization", "dependency injection", "unit tests", "flexbox", "grid layout", "streams",
+]
+ROLES = ["frontend developer", "backend developer", "full stack developer", "data scientist"]
+SKILLS = ["javascript", "react", "python", "django", "java", "mysql", "html", "css"]
+LEVELS = ["easy", "medium", "hard"]
+
+
+def _text(i):
+    a, b = random.sample(TOPICS, 2)
+    return f"{random.choice(TEMPLATES).format(a=a, b=b, s=random.choice(SKILLS))} (#{i})"
+
+
+def _ms(samples):
+    samples = sorted(samples)
+    return statistics.median(samples) * 1000, samples[int(len(samples) * 0.95)] * 1000
+
+
+class Command(BaseCommand):
+    help = "Benchmark building and querying the question similarity index (uses a throwaway database)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--size", type=int, default=100000, help="Questions in the bank")
+        parser.add_argument("--queries", type=int, default=500, help="Lookups timed per measurement")
+
+    def handle(self, *args, **options):
+        size = options["size"]
+        n_queries = options["queries"]
+        random.seed(1)
+
+        with bench_database():
+            texts = [_text(i) for i in range(size)]
+
+            start = time.perf_counter()
+            embeddings = [question_embedding(t) for t in texts]
+            embed_s = time.perf_counter() - start
+
+            Question.objects.bulk_create(
+                [
+                    Question(
+                        text=t,
+                        text_hash=question_text_hash(t),
+                        embedding=e,
+                        role=random.choice(ROLES),
+                        skill=random.choice(SKILLS),
+                        level=random.choice(LEVELS),
+                    )
+                    for t, e in zip(texts, embeddings)
+                ],
+                batch_size=2000,
+            )
+
+            index = QuestionIndex()
+            start = time.perf_counter()
+            index.sync()
+            build_s = time.perf_counter() - start
+            matrix_mb = sum(p.matrix.nbytes for p in index._partitions.values()) / 1e6
+
+            self.stdout.write(f"questions:          {size}")
+            self.stdout.write(f"embedding:          {embed_s * 1e6 / size:.1f} us/question")
+            self.stdout.write(f"index build:        {build_s:.2f} s ({matrix_mb:.1f} MB of vectors)")
+
+            probes = [_text(size + i) for i in range(n_queries)]
+
+            def timed(fn):
+                samples = []
+                for text in probes:
+                    start = time.perf_counter()
+                    fn(text)
+                    samples.append(time.perf_counter() - start)
+                return "p50 {:.3f} ms  p95 {:.3f} ms".format(*_ms(samples))
+
+            self.stdout.write("nearest, one combo: " + timed(
+                lambda t: index.nearest(t, "backend developer", "python", "medium")))
+            self.stdout.write("nearest, all combos:" + timed(lambda t: index.nearest(t, "", "", "")))
+
+            asked = random.sample(texts, 10)
+            self.stdout.write("unlike 10 asked:    " + timed(
+                lambda t: index.unlike(asked, "backend developer", "python", "medium", 0.7)))
+
+            self.stdout.write("save_question_if_new:" + timed(
+                lambda t: save_question_if_new(t, "backend developer", "python", "medium")))
@@ -0,0 +1,78 @@
+import os
+import tempfile
+import time
+import tracemalloc
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from docx import Document
+
+from api.extract import extract_text
+
+LINE = "Senior backend engineer with Python, Django, PostgreSQL and AWS experience. "
+
+
+def _full_read(path, file_name):
+    # What analyze_resume used to do: read everything, concatenate, then truncate
+    text = ""
+    if file_name.endswith(".pdf"):
+        import fitz
+        with open(path, "rb") as f:
+            pdf = fitz.open(stream=f.read(), filetype="pdf")
+        for page in pdf:
+            text += page.get_text() + "\n"
+    else:
+        doc = Document(path)
+        for para in doc.paragraphs:
+            text += para.text + "\n"
+    return text[:settings.RESUME_MAX_CHARS]
+
+
+def _measure(fn, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn(*args)
+    elapsed = (time.perf_counter() - start) * 1000
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 1024
+
+
+class Command(BaseCommand):
+    help = "Benchmark resume text extraction on large generated PDF and DOCX files."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--pages", default="10,50,200",
+                            help="Comma-separated PDF page counts (DOCX gets 40 paragraphs per page)")
+
+    def handle(self, *args, **options):
+        import fitz
+
+        self.stdout.write(
+            f"{'file':>14} {'size KB':>9} {'old ms':>9} {'new ms':>9} {'old peak KB':>12} {'new peak KB':>12}"
+        )
+
+        with tempfile.TemporaryDirectory() as tmp:
+            for pages in [int(p) for p in options["pages"].split(",") if p]:
+                pdf_path = os.path.join(tmp, f"resume_{pages}.pdf")
+                pdf = fitz.open()
+                for _ in range(pages):
+                    pdf.new_page().insert_textbox(fitz.Rect(36, 36, 576, 806), LINE * 40, fontsize=9)
+                pdf.save(pdf_path)
+
+                docx_path = os.path.join(tmp, f"resume_{pages}.docx")
+                doc = Document()
+                for _ in range(pages * 40):
+                    doc.add_paragraph(LINE)
+                doc.save(docx_path)
+
+                for path in (pdf_path, docx_path):
+                    name = os.path.basename(path)
+                    old_ms, old_peak = _measure(_full_read, path, name)
+                    new_ms, new_peak = _measure(
+                        extract_text, path, name, settings.RESUME_MAX_CHARS, settings.RESUME_MAX_PAGES
+                    )
+                    self.stdout.write(
+                        f"{name:>14} {os.path.getsize(path) / 1024:>9.0f} {old_ms:>9.1f} {new_ms:>9.1f}"
+                        f" {old_peak:>12.0f} {new_peak:>12.0f}"
+                    )
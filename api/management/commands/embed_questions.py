@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+
+from api import similarity
+from api.embedding import question_embedding
+from api.models import Question
+
+CHUNK_SIZE = 2000
+
+
+class Command(BaseCommand):
+    help = (
+        "Compute embeddings for bank questions that have none (or all of them with --all). "
+        "Running processes rebuild their similarity index, at the latest after QUESTION_INDEX_MAX_AGE."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--all", action="store_true", help="Recompute every embedding")
+
+    def handle(self, *args, **options):
+        qs = Question.objects.only("id", "text")
+        if not options["all"]:
+            qs = qs.filter(embedding__isnull=True)
+
+        done = 0
+        batch = []
+        for q in qs.iterator(chunk_size=CHUNK_SIZE):
+            q.embedding = question_embedding(q.text)
+            batch.append(q)
+            if len(batch) >= CHUNK_SIZE:
+                Question.objects.bulk_update(batch, ["embedding"])
+                done += len(batch)
+                batch = []
+
+        if batch:
+            Question.objects.bulk_update(batch, ["embedding"])
+            done += len(batch)
+
+        # bulk_update sends no signals
+        similarity.bump_version()
+
+        self.stdout.write(self.style.SUCCESS(f"Embedded {done} questions"))
@@ -0,0 +1,34 @@
+import csv
+import json
+import sys
+
+from django.core.management.base import BaseCommand
+
+from api.models import Question
+
+FIELDS = ["text", "role", "skill", "level"]
+
+
+class Command(BaseCommand):
+    help = "Export the question bank as .jsonl or .csv (same columns import_questions reads)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", nargs="?", help="Output file (default: stdout)")
+        parser.add_argument("--format", choices=["jsonl", "csv"], default="jsonl")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        out = open(path, "w", encoding="utf-8", newline="") if path else sys.stdout
+
+        try:
+            rows = Question.objects.order_by("id").values(*FIELDS).iterator(chunk_size=2000)
+            if options["format"] == "csv":
+                writer = csv.DictWriter(out, fieldnames=FIELDS)
+                writer.writeheader()
+                writer.writerows(rows)
+            else:
+                for row in rows:
+                    out.write(json.dumps(row) + "\n")
+        finally:
+            if path:
+                out.close()
@@ -0,0 +1,23 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.question_io import CHUNK_SIZE, import_questions, read_rows
+
+
+class Command(BaseCommand):
+    help = "Bulk import bank questions from a .csv or .jsonl file (columns: text, role, skill, level)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        try:
+            with open(path, "rb") as f:
+                report = import_questions(read_rows(f, path), chunk_size=options["chunk_size"])
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(json.dumps(report, indent=2))
@@ -0,0 +1,428 @@
+import io
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import subprocess
+import tempfile
+import threading
+import time
+import warnings
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from django.utils import timezone
+from docx import Document
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from api.embedding import question_embedding
+from api.models import (
+    EvaluationJob,
+    InterviewResult,
+    Question,
+    ResumeAnalysis,
+    UserProfile,
+    UserStatBucket,
+    UserStats,
+    question_text_hash,
+)
+from api.views import DEFAULT_ROLES, DEFAULT_SKILLS
+
+from ._bench import bench_database
+
+LEVELS = ["easy", "medium", "hard"]
+PASSWORD = "loadtest-password"
+TOPICS = [
+    "closures", "promises", "the event loop", "hooks", "decorators", "generators", "transactions",
+    "indexes", "joins", "middleware", "migrations", "caching", "threads", "recursion", "pagination",
+]
+
+
+class Route:
+    def __init__(self, name, method, build, ok=(200,), weight=1.0):
+        self.name = name
+        self.method = method
+        self.build = build
+        self.ok = ok
+        self.weight = weight
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def _docx(text):
+    doc = Document()
+    for line in text.split("\n"):
+        doc.add_paragraph(line)
+    out = io.BytesIO()
+    doc.save(out)
+    return out.getvalue()
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5,
+            cwd=settings.BASE_DIR,
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway database, hit every API route with a mock LLM at the given "
+        "concurrency and report latency percentiles, throughput and queries per request."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--questions", type=int, default=20000)
+        parser.add_argument("--users", type=int, default=500)
+        parser.add_argument("--results", type=int, default=50000)
+        parser.add_argument("--requests", type=int, default=200, help="Requests per route (scaled by route weight)")
+        parser.add_argument("--concurrency", type=int, default=8)
+        parser.add_argument("--routes", default="", help="Comma-separated route names to run (default: all)")
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--output", help="Write the JSON report to this file")
+        parser.add_argument("--baseline", help="Compare against a previous JSON report")
+        parser.add_argument("--max-regression", type=float, default=20.0,
+                            help="Fail if a route's p95 grows by more than this percentage over the baseline")
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options["baseline"]:
+            with open(options["baseline"], encoding="utf-8") as f:
+                baseline = json.load(f)
+
+        request_log = logging.getLogger("api.requests")
+        old_level = request_log.level
+        request_log.setLevel(logging.WARNING)
+
+        overrides = override_settings(
+            LLM_BACKEND="mock",
+            QUESTION_PREWARM_WORKERS=0,
+            EVALUATION_WORKERS=0,
+            EVALUATION_CACHE={**settings.EVALUATION_CACHE, "BACKEND": "locmem"},
+        )
+
+        db_file = os.path.join(tempfile.mkdtemp(prefix="loadtest-"), "loadtest.sqlite3")
+        setup_test_environment()
+        try:
+            with overrides, bench_database(db_file if connection.vendor == "sqlite" else None), \
+                    warnings.catch_warnings():
+                # The test client is WSGI, so Django warns about every streamed async body
+                warnings.filterwarnings("ignore", message=r"StreamingHttpResponse must consume")
+                rng = random.Random(options["seed"])
+                start = time.perf_counter()
+                fixtures = self._seed(rng, options)
+                self.stdout.write(f"Seeded in {time.perf_counter() - start:.1f}s")
+
+                routes = self._routes(fixtures, rng, options["requests"])
+                wanted = {r.strip() for r in options["routes"].split(",") if r.strip()}
+                if wanted:
+                    routes = [r for r in routes if r.name in wanted]
+
+                results = {}
+                self.stdout.write(
+                    f"{'route':<28} {'n':>5} {'err':>4} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'rps':>8} {'q/req':>6}"
+                )
+                for route in routes:
+                    stats = self._run(route, max(1, int(options["requests"] * route.weight)), options["concurrency"])
+                    results[route.name] = stats
+                    self.stdout.write(
+                        f"{route.name:<28} {stats['requests']:>5} {stats['errors']:>4} {stats['p50_ms']:>8.2f} "
+                        f"{stats['p95_ms']:>8.2f} {stats['p99_ms']:>8.2f} {stats['rps']:>8.1f} {stats['queries_per_request']:>6.1f}"
+                    )
+        finally:
+            teardown_test_environment()
+            request_log.setLevel(old_level)
+
+        report = {
+            "meta": {
+                "commit": _git_commit(),
+                "created_at": timezone.now().isoformat(),
+                "python": platform.python_version(),
+                "database": connection.vendor,
+                "questions": options["questions"],
+                "users": options["users"],
+                "results": options["results"],
+                "requests": options["requests"],
+                "concurrency": options["concurrency"],
+                "seed": options["seed"],
+            },
+            "routes": results,
+        }
+
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(f"Report written to {options['output']}")
+
+        if baseline:
+            self._compare(report, baseline, options["max_regression"])
+
+    # ============================================================
+    # SEEDING
+    # ============================================================
+
+    def _seed(self, rng, options):
+        combos = [(r, s, l) for r in DEFAULT_ROLES for s in DEFAULT_SKILLS for l in LEVELS]
+
+        questions = []
+        for i in range(options["questions"]):
+            role, skill, level = combos[i % len(combos)]
+            text = f"How do {rng.choice(TOPICS)} relate to {rng.choice(TOPICS)} in {skill}? (#{i})"
+            questions.append(Question(
+                text=text, role=role, skill=skill, level=level,
+                text_hash=question_text_hash(text), embedding=question_embedding(text),
+            ))
+        Question.objects.bulk_create(questions, batch_size=2000)
+
+        password = make_password(PASSWORD)
+        User.objects.bulk_create(
+            [User(username=f"load{i}", email=f"load{i}@example.com", password=password) for i in range(options["users"])],
+            batch_size=1000,
+        )
+        users = list(User.objects.filter(username__startswith="load").order_by("id"))
+        UserProfile.objects.bulk_create(
+            [UserProfile(user=u, full_name=f"Load User {i}", mobile="0000000000", role=rng.choice(DEFAULT_ROLES))
+             for i, u in enumerate(users)],
+            batch_size=1000,
+        )
+
+        # Results plus the dashboard rollups record_result would have built
+        now = timezone.now()
+        results, totals, buckets = [], {}, {}
+        seeded_at = defaultdict(list)
+        for i in range(options["results"]):
+            user = users[i % len(users)]
+            q = questions[rng.randrange(len(questions))]
+            score = rng.randint(0, 10)
+            # Whole hours, so spreading the timestamps out below takes a bounded number of updates
+            at = now - timedelta(days=rng.randint(0, 60), hours=rng.randint(0, 23))
+            session_id = f"load-{user.id}-{i % 7}"
+            result = InterviewResult(
+                user=user, session_id=session_id, bank_question=q, answer="A seeded answer.", score=score,
+                strengths="", weaknesses="", improved_answer="",
+            )
+            results.append(result)
+            seeded_at[at].append(result)
+
+            t = totals.setdefault(user.id, [0, 0, score, score])
+            t[0] += 1
+            t[1] += score
+            t[2] = max(t[2], score)
+            t[3] = min(t[3], score)
+            for kind, key in (("skill", q.skill), ("day", at.date().isoformat()), ("session", session_id)):
+                b = buckets.setdefault((user.id, kind, key), [0, 0, at, at])
+                b[0] += 1
+                b[1] += score
+                b[2] = min(b[2], at)
+                b[3] = max(b[3], at)
+
+        InterviewResult.objects.bulk_create(results, batch_size=2000)
+        # auto_now_add stamped every row "now"; move them back to their seeded times
+        for at, group in seeded_at.items():
+            ids = [r.id for r in group]
+            for i in range(0, len(ids), 2000):
+                InterviewResult.objects.filter(id__in=ids[i:i + 2000]).update(created_at=at)
+        UserStats.objects.bulk_create(
+            [UserStats(user_id=u, total_attempts=n, total_score=s, best_score=b, worst_score=w)
+             for u, (n, s, b, w) in totals.items()],
+            batch_size=1000,
+        )
+        UserStatBucket.objects.bulk_create(
+            [UserStatBucket(user_id=u, kind=k, key=key, attempts=n, total_score=s, first_at=f, last_at=l)
+             for (u, k, key), (n, s, f, l) in buckets.items()],
+            batch_size=1000,
+        )
+
+        jobs = EvaluationJob.objects.bulk_create([
+            EvaluationJob(
+                user=users[i % len(users)], session_id=f"load-job-{i}", question="Q", answer="A",
+                status=EvaluationJob.STATUS_DONE, result={"score": 5},
+            )
+            for i in range(50)
+        ])
+
+        resume = ResumeAnalysis.objects.create(
+            content_hash="0" * 64, file_name="seed.docx", text="Python developer", model="mock",
+            analysis={"ats_score": 70, "best_fit_role": "backend developer", "top_skills": "python"},
+        )
+
+        return {
+            "combos": combos,
+            "tokens": [str(RefreshToken.for_user(u).access_token) for u in users[:50]],
+            "sessions": [f"load-{u.id}-{n}" for u in users[:50] for n in range(7)],
+            "job_ids": [str(j.id) for j in jobs],
+            "resume_id": resume.content_hash,
+            "question_texts": [q.text for q in questions[:500]],
+        }
+
+    # ============================================================
+    # ROUTES
+    # ============================================================
+
+    def _routes(self, fx, rng, n_requests):
+        tokens, combos, sessions = fx["tokens"], fx["combos"], fx["sessions"]
+
+        def auth(i):
+            return {"HTTP_AUTHORIZATION": f"Bearer {tokens[i % len(tokens)]}"}
+
+        def combo(i):
+            role, skill, level = combos[i % len(combos)]
+            return {"role": role, "skill": skill, "level": level}
+
+        def evaluation(i):
+            return {
+                "question": fx["question_texts"][i % len(fx["question_texts"])],
+                "answer": f"Load test answer number {i}",
+                "session_id": sessions[i % len(sessions)],
+            }
+
+        # Unique documents so every upload goes through extraction and the model
+        resumes = [_docx(f"Resume {i}\nPython and Django developer\nProject {rng.random()}")
+                   for i in range(max(1, n_requests))]
+
+        def upload(i, name="resume.docx"):
+            f = io.BytesIO(resumes[i % len(resumes)])
+            f.name = name
+            return f
+
+        csv_body = "text,role,skill,level\n" + "".join(
+            f"Imported question {{i}}-{n},backend developer,python,easy\n" for n in range(20)
+        )
+
+        def import_file(i):
+            f = io.BytesIO(csv_body.replace("{i}", str(i)).encode())
+            f.name = "questions.csv"
+            return f
+
+        return [
+            Route("register", "post", lambda i: ("/api/register/", {"data": {
+                "full_name": "New User", "username": f"new{i}-{rng.random()}", "email": f"new{i}-{rng.random()}@example.com",
+                "password": PASSWORD, "mobile": "0000000000", "role": "backend developer"}}), weight=0.25),
+            Route("login", "post", lambda i: ("/api/login/", {"data": {"username": f"load{i % 50}", "password": PASSWORD}}),
+                  weight=0.25),
+            Route("token_login", "post", lambda i: ("/api/auth/login/", {"data": {"username": f"load{i % 50}", "password": PASSWORD}}),
+                  weight=0.25),
+            Route("profile", "get", lambda i: ("/api/profile/", {"extra": auth(i)})),
+            Route("dashboard", "get", lambda i: ("/api/dashboard/", {"extra": auth(i)})),
+            Route("roles", "get", lambda i: ("/api/roles/", {})),
+            Route("skills", "get", lambda i: ("/api/skills/", {})),
+            Route("get_question_bank", "get", lambda i: ("/api/get_question/", {"data": combo(i)})),
+            Route("get_question_session", "get", lambda i: ("/api/get_question/", {
+                "data": {**combo(i), "session_id": sessions[i % len(sessions)]}})),
+            Route("get_question_ai", "get", lambda i: ("/api/get_question/", {
+                "data": {"role": f"load role {i}", "skill": "python", "level": "easy"}})),
+            Route("get_question_stream", "get", lambda i: ("/api/get_question/stream/", {
+                "data": {"role": f"stream role {i}", "skill": "python", "level": "easy"}})),
+            Route("evaluate", "post", lambda i: ("/api/evaluate/", {"data": evaluation(i), "extra": auth(i)})),
+            Route("evaluate_async", "post", lambda i: ("/api/evaluate/", {
+                "data": {**evaluation(i), "async": "true"}, "extra": auth(i)}), ok=(202,)),
+            Route("evaluate_stream", "post", lambda i: ("/api/evaluate/stream/", {
+                "data": json.dumps(evaluation(i + 100000)), "content_type": "application/json", "extra": auth(i)})),
+            Route("evaluation_job", "get", lambda i: (f"/api/evaluate/jobs/{fx['job_ids'][i % 50]}/", {})),
+            Route("evaluation_job_stream", "get", lambda i: (f"/api/evaluate/jobs/{fx['job_ids'][i % 50]}/stream/", {})),
+            Route("analyze_resume", "post", lambda i: ("/api/analyze_resume/", {"data": {"resume": upload(i)}}), weight=0.25),
+            Route("analyze_resume_batch", "post", lambda i: ("/api/analyze_resume/batch/", {
+                "data": {"resumes": [upload(3 * i + k, f"r{k}.docx") for k in range(3)]}}), weight=0.1),
+            Route("get_resume_analysis", "get", lambda i: (f"/api/analyze_resume/{fx['resume_id']}/", {})),
+            Route("session_start", "post", lambda i: ("/api/session/start/", {
+                "data": {**combo(i), "session_id": f"plan-{i}-{rng.random()}", "count": 5}})),
+            Route("session_questions", "get", lambda i: ("/api/session/questions/", {
+                "data": {"session_id": sessions[i % len(sessions)]}})),
+            Route("admin_add_question", "post", lambda i: ("/api/admin/add-question/", {"data": {
+                "text": f"Added question {i} {rng.random()}", "role": "backend developer", "skill": "python", "level": "easy"}})),
+            Route("admin_list_questions", "get", lambda i: ("/api/admin/list-questions/", {"data": {"limit": 100}})),
+            Route("admin_import_questions", "post", lambda i: ("/api/admin/import-questions/", {
+                "data": {"file": import_file(i)}}), weight=0.25),
+            Route("admin_export_questions", "get", lambda i: ("/api/admin/export-questions/", {}), weight=0.05),
+            Route("admin_list_users", "get", lambda i: ("/api/admin/list-users/", {"data": {"limit": 100}})),
+            Route("admin_cache_stats", "get", lambda i: ("/api/admin/cache-stats/", {})),
+            Route("admin_llm_stats", "get", lambda i: ("/api/admin/llm-stats/", {})),
+            Route("metrics", "get", lambda i: ("/metrics", {})),
+        ]
+
+    # ============================================================
+    # RUNNING
+    # ============================================================
+
+    def _run(self, route, n, concurrency):
+        local = threading.local()
+
+        def one(i):
+            client = getattr(local, "client", None)
+            if client is None:
+                client = local.client = Client()
+
+            path, kwargs = route.build(i)
+            kwargs = dict(kwargs)
+            extra = kwargs.pop("extra", {})
+
+            with CaptureQueriesContext(connection) as ctx:
+                start = time.perf_counter()
+                response = getattr(client, route.method)(path, **kwargs, **extra)
+                if response.streaming:
+                    b"".join(response)
+                elapsed = time.perf_counter() - start
+            return elapsed, len(ctx.captured_queries), response.status_code in route.ok, response.status_code
+
+        wall_start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            samples = list(pool.map(one, range(n)))
+        wall = time.perf_counter() - wall_start
+
+        latencies = sorted(s[0] * 1000 for s in samples)
+        failures = [s[3] for s in samples if not s[2]]
+        return {
+            "requests": n,
+            "errors": len(failures),
+            "error_statuses": sorted(set(failures)),
+            "p50_ms": round(_percentile(latencies, 50), 3),
+            "p95_ms": round(_percentile(latencies, 95), 3),
+            "p99_ms": round(_percentile(latencies, 99), 3),
+            "mean_ms": round(statistics.fmean(latencies), 3),
+            "rps": round(n / wall, 1) if wall else 0.0,
+            "queries_per_request": round(statistics.fmean(s[1] for s in samples), 2),
+        }
+
+    def _compare(self, report, baseline, max_regression):
+        self.stdout.write("")
+        self.stdout.write(f"{'route':<28} {'p95 base':>9} {'p95 now':>9} {'change':>8} {'rps base':>9} {'rps now':>9} {'q/req':>11}")
+
+        regressions = []
+        for name, now in report["routes"].items():
+            base = baseline.get("routes", {}).get(name)
+            if not base:
+                continue
+            change = (now["p95_ms"] - base["p95_ms"]) / base["p95_ms"] * 100 if base["p95_ms"] else 0.0
+            queries = f"{base['queries_per_request']:g}->{now['queries_per_request']:g}"
+            self.stdout.write(
+                f"{name:<28} {base['p95_ms']:>9.2f} {now['p95_ms']:>9.2f} {change:>+7.1f}% "
+                f"{base['rps']:>9.1f} {now['rps']:>9.1f} {queries:>11}"
+            )
+            if change > max_regression:
+                regressions.append(f"{name}: p95 {base['p95_ms']:.2f} -> {now['p95_ms']:.2f} ms ({change:+.1f}%)")
+            if now["queries_per_request"] - base["queries_per_request"] >= 1:
+                regressions.append(
+                    f"{name}: queries per request {base['queries_per_request']:g} -> {now['queries_per_request']:g}"
+                )
+
+        if regressions:
+            raise CommandError("Regressions against baseline:\n  " + "\n  ".join(regressions))
+        self.stdout.write(self.style.SUCCESS("No regressions against baseline"))
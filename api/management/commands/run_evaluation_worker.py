@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.jobs import run_pending_jobs
+
+
+class Command(BaseCommand):
+    help = "Process queued async evaluation jobs (use with EVALUATION_WORKERS=0)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true",
+                            help="Drain the queue once and exit")
+        parser.add_argument("--interval", type=float, default=1.0,
+                            help="Seconds to sleep when the queue is empty")
+
+    def handle(self, *args, **options):
+        while True:
+            processed = run_pending_jobs()
+            if processed:
+                self.stdout.write(f"Processed {processed} job(s)")
+
+            if options["once"]:
+                return
+
+            if not processed:
+                time.sleep(options["interval"])
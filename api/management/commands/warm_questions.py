@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+
+from api import llm
+from api.models import QuestionDemand
+from api.prewarm import refill, stock, stock_target
+from api.views import DEFAULT_ROLES, DEFAULT_SKILLS
+
+
+class Command(BaseCommand):
+    help = (
+        "Top up the question bank to QUESTION_STOCK_TARGET for every default "
+        "role/skill/level plus every combination users have requested."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--levels", default="easy,medium,hard")
+        parser.add_argument("--demand-only", action="store_true",
+                            help="Only refill combinations recorded in QuestionDemand")
+        parser.add_argument("--limit", type=int, default=None,
+                            help="Max questions to generate per combination")
+
+    def handle(self, *args, **options):
+        levels = [l.strip() for l in options["levels"].split(",") if l.strip()]
+
+        # Most requested first, so a partial run helps the most users
+        combos = list(
+            QuestionDemand.objects.order_by("-requests").values_list("role", "skill", "level")
+        )
+        if not options["demand_only"]:
+            combos += [(r, s, l) for r in DEFAULT_ROLES for s in DEFAULT_SKILLS for l in levels]
+
+        total = 0
+        for combo in dict.fromkeys(combos):
+            try:
+                with llm.background():
+                    added = refill(*combo, limit=options["limit"])
+            except llm.LLMError as e:
+                self.stderr.write(f"{'|'.join(combo)}: {e}")
+                continue
+            total += added
+            if added:
+                self.stdout.write(
+                    f"{'|'.join(combo)}: +{added} ({stock(*combo)}/{stock_target(*combo)})"
+                )
+
+        self.stdout.write(self.style.SUCCESS(f"Generated {total} questions"))
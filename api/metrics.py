@@ -0,0 +1,229 @@
+"""
+In-process metrics: counters and histograms rendered in the Prometheus
+text format at /metrics, plus per-request accounting for the structured
+request log line written by api.middleware.MetricsMiddleware.
+
+Recording is a dict lookup and a few additions under a lock, cheap
+enough to leave on in production. Each process keeps its own numbers;
+scrape every worker (or run one per container) for a full picture.
+"""
+
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+
+def _labels(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(
+        '{}="{}"'.format(n, str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for n, v in zip(names, values)
+    )
+    return "{" + pairs + "}"
+
+
+class Counter:
+    type = "counter"
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            yield self.name + _labels(self.labelnames, labels), value
+
+
+class Histogram:
+    type = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def samples(self):
+        with self._lock:
+            items = sorted((k, (list(v[0]), v[1], v[2])) for k, v in self._values.items())
+        names = self.labelnames + ("le",)
+        for labels, (counts, total, count) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                yield self.name + "_bucket" + _labels(names, labels + (bound,)), cumulative
+            yield self.name + "_bucket" + _labels(names, labels + ("+Inf",)), count
+            yield self.name + "_sum" + _labels(self.labelnames, labels), total
+            yield self.name + "_count" + _labels(self.labelnames, labels), count
+
+
+_registry = []
+_collectors = []
+
+
+def counter(name, help, labels=()):
+    metric = Counter(name, help, labels)
+    _registry.append(metric)
+    return metric
+
+
+def histogram(name, help, labels=(), buckets=LATENCY_BUCKETS):
+    metric = Histogram(name, help, labels, buckets)
+    _registry.append(metric)
+    return metric
+
+
+def collector(fn):
+    """
+    Register ``fn() -> [(name, type, help, [(labels_dict, value), ...])]``,
+    called at scrape time for gauges read from other modules.
+    """
+    _collectors.append(fn)
+    return fn
+
+
+REQUESTS = counter("interview_requests_total", "HTTP requests handled.", ("view", "method", "status"))
+REQUEST_SECONDS = histogram("interview_request_seconds", "Time spent in the view.", ("view",))
+REQUEST_QUERIES = histogram("interview_request_db_queries", "Database queries per request.", ("view",), COUNT_BUCKETS)
+DB_QUERY_SECONDS = histogram("interview_db_query_seconds", "Database query latency.", (), QUERY_BUCKETS)
+PHASE_SECONDS = histogram("interview_phase_seconds", "Time spent in instrumented phases.", ("phase",))
+LLM_SECONDS = histogram("interview_llm_seconds", "LLM call latency, excluding the admission wait.", ("kind", "model"))
+LLM_CALLS = counter("interview_llm_calls_total", "LLM calls by outcome.", ("kind", "outcome"))
+LLM_TOKENS = counter("interview_llm_tokens_total", "Tokens reported by the model.", ("kind", "type"))
+LLM_WAIT_SECONDS = histogram("interview_llm_queue_wait_seconds", "Time spent waiting for an LLM slot.", ("kind",))
+
+
+def render():
+    lines = []
+    for metric in _registry:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.type}")
+        for name, value in metric.samples():
+            lines.append(f"{name} {value}")
+
+    for fn in _collectors:
+        for name, type_, help, samples in fn():
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {type_}")
+            for labels, value in samples:
+                lines.append(f"{name}{_labels(tuple(labels), tuple(labels.values()))} {value}")
+
+    return "\n".join(lines) + "\n"
+
+
+# ============================================================
+# PER-REQUEST ACCOUNTING
+# ============================================================
+
+class RequestMetrics:
+    __slots__ = ("db_queries", "db_seconds", "phases", "llm_calls", "tokens")
+
+    def __init__(self):
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.phases = {}
+        self.llm_calls = 0
+        self.tokens = 0
+
+
+_current = contextvars.ContextVar("request_metrics", default=None)
+
+
+def start_request(current=None):
+    """
+    Make a request's metrics current. Pass an existing ``current`` to make
+    it current again, e.g. while a streamed body is being produced.
+    """
+    if current is None:
+        current = RequestMetrics()
+    return current, _current.set(current)
+
+
+def end_request(token):
+    _current.reset(token)
+
+
+def current():
+    return _current.get()
+
+
+def _add_phase(name, seconds):
+    PHASE_SECONDS.observe(seconds, name)
+    request = _current.get()
+    if request is not None:
+        request.phases[name] = request.phases.get(name, 0.0) + seconds
+
+
+@contextmanager
+def phase(name):
+    """Time a block as ``name`` in interview_phase_seconds and the request log line."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _add_phase(name, time.perf_counter() - start)
+
+
+def record_llm(kind, model, seconds, response=None, outcome="ok"):
+    LLM_SECONDS.observe(seconds, kind, model)
+    LLM_CALLS.inc(kind, outcome)
+    _add_phase("llm_" + kind, seconds)
+    request = _current.get()
+    if request is not None:
+        request.llm_calls += 1
+
+    if response:
+        prompt_tokens = response.get("prompt_eval_count") or 0
+        completion_tokens = response.get("eval_count") or 0
+        LLM_TOKENS.inc(kind, "prompt", amount=prompt_tokens)
+        LLM_TOKENS.inc(kind, "completion", amount=completion_tokens)
+        if request is not None:
+            request.tokens += prompt_tokens + completion_tokens
+
+
+def db_execute_wrapper(execute, sql, params, many, context):
+    """Installed on every connection; counts and times queries for the current request."""
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - start
+        DB_QUERY_SECONDS.observe(elapsed)
+        request = _current.get()
+        if request is not None:
+            request.db_queries += 1
+            request.db_seconds += elapsed
+
+
+def enabled():
+    return settings.METRICS_ENABLED
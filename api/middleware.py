@@ -0,0 +1,130 @@
+import json
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from . import metrics
+
+logger = logging.getLogger("api.requests")
+
+_END = object()
+
+
+class MetricsMiddleware:
+    """
+    Records request count, latency and DB queries per view, and writes one
+    JSON log line per request to the ``api.requests`` logger. Streaming
+    responses are finished when their last chunk has been sent.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not metrics.enabled():
+            return self.get_response(request)
+
+        start = time.perf_counter()
+        current, token = metrics.start_request()
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics.end_request(token)
+        return self._finish(request, response, current, start)
+
+    async def __acall__(self, request):
+        if not metrics.enabled():
+            return await self.get_response(request)
+
+        start = time.perf_counter()
+        current, token = metrics.start_request()
+        try:
+            response = await self.get_response(request)
+        finally:
+            metrics.end_request(token)
+        return self._finish(request, response, current, start)
+
+    def _finish(self, request, response, current, start):
+        def done():
+            self._record(request, response, current, start)
+
+        if not response.streaming:
+            done()
+            return response
+
+        # The view has returned, but queries and model calls made while the
+        # body is produced still belong to this request
+        content = response.streaming_content
+        if response.is_async:
+            async def wrapped():
+                iterator = aiter(content)
+                try:
+                    while True:
+                        _, token = metrics.start_request(current)
+                        try:
+                            chunk = await anext(iterator)
+                        except StopAsyncIteration:
+                            return
+                        finally:
+                            metrics.end_request(token)
+                        yield chunk
+                finally:
+                    try:
+                        if hasattr(iterator, "aclose"):
+                            await iterator.aclose()
+                    finally:
+                        done()
+        else:
+            def wrapped():
+                iterator = iter(content)
+                try:
+                    while True:
+                        _, token = metrics.start_request(current)
+                        try:
+                            chunk = next(iterator, _END)
+                        finally:
+                            metrics.end_request(token)
+                        if chunk is _END:
+                            return
+                        yield chunk
+                finally:
+                    try:
+                        if hasattr(iterator, "close"):
+                            iterator.close()
+                    finally:
+                        done()
+
+        response.streaming_content = wrapped()
+        return response
+
+    def _record(self, request, response, current, start):
+        elapsed = time.perf_counter() - start
+        match = getattr(request, "resolver_match", None)
+        view = match.route if match else "unmatched"
+
+        metrics.REQUESTS.inc(view, request.method, response.status_code)
+        metrics.REQUEST_SECONDS.observe(elapsed, view)
+        metrics.REQUEST_QUERIES.observe(current.db_queries, view)
+
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps({
+                "method": request.method,
+                "path": request.path,
+                "view": view,
+                "status": response.status_code,
+                "ms": round(elapsed * 1000, 1),
+                "db_queries": current.db_queries,
+                "db_ms": round(current.db_seconds * 1000, 1),
+                "llm_calls": current.llm_calls,
+                "llm_tokens": current.tokens,
+                "phases_ms": {k: round(v * 1000, 1) for k, v in current.phases.items()},
+            }))
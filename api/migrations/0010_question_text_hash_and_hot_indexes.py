@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:19
+
+import hashlib
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_text_hash(apps, schema_editor):
+    Question = apps.get_model("api", "Question")
+
+    batch = []
+    for q in Question.objects.only("id", "text").iterator(chunk_size=2000):
+        normalized = " ".join((q.text or "").lower().split())
+        q.text_hash = hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+        batch.append(q)
+        if len(batch) >= 2000:
+            Question.objects.bulk_update(batch, ["text_hash"])
+            batch = []
+
+    if batch:
+        Question.objects.bulk_update(batch, ["text_hash"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_question_role_skill_level_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='question',
+            name='text_hash',
+            field=models.CharField(blank=True, default='', editable=False, max_length=40),
+        ),
+        migrations.RunPython(backfill_text_hash, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='interviewresult',
+            index=models.Index(fields=['user', 'score'], name='result_user_score_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='interviewresult',
+            index=models.Index(fields=['session_id', 'created_at'], name='result_session_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='question',
+            index=models.Index(fields=['text_hash', 'role', 'skill', 'level'], name='question_text_hash_idx'),
+        ),
+    ]
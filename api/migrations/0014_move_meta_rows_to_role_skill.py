@@ -0,0 +1,65 @@
+from django.db import migrations
+from django.db.models import Count
+
+
+def forwards(apps, schema_editor):
+    Question = apps.get_model("api", "Question")
+    Role = apps.get_model("api", "Role")
+    Skill = apps.get_model("api", "Skill")
+
+    bank = Question.objects.exclude(level="meta")
+
+    role_counts = dict(
+        bank.exclude(role="").values_list("role").annotate(n=Count("id")).values_list("role", "n")
+    )
+    skill_counts = dict(
+        bank.exclude(skill="").values_list("skill").annotate(n=Count("id")).values_list("skill", "n")
+    )
+
+    # Roles/skills that only existed as [auto-role:...]/[auto-skill:...] rows
+    meta = Question.objects.filter(level="meta")
+    for role in meta.exclude(role="").values_list("role", flat=True).distinct():
+        role_counts.setdefault(role, 0)
+    for skill in meta.exclude(skill="").values_list("skill", flat=True).distinct():
+        skill_counts.setdefault(skill, 0)
+
+    Role.objects.bulk_create(
+        [Role(name=name, question_count=n) for name, n in role_counts.items()],
+        batch_size=500,
+        ignore_conflicts=True,
+    )
+    Skill.objects.bulk_create(
+        [Skill(name=name, question_count=n) for name, n in skill_counts.items()],
+        batch_size=500,
+        ignore_conflicts=True,
+    )
+
+    meta.delete()
+
+
+def backwards(apps, schema_editor):
+    Question = apps.get_model("api", "Question")
+    Role = apps.get_model("api", "Role")
+    Skill = apps.get_model("api", "Skill")
+
+    Question.objects.bulk_create(
+        [
+            Question(text=f"[auto-role:{name}]", role=name, skill="", level="meta")
+            for name in Role.objects.filter(question_count=0).values_list("name", flat=True)
+        ] + [
+            Question(text=f"[auto-skill:{name}]", role="", skill=name, level="meta")
+            for name in Skill.objects.filter(question_count=0).values_list("name", flat=True)
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_role_skill'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, backwards),
+    ]
@@ -0,0 +1,66 @@
+import hashlib
+
+from django.db import migrations
+
+
+def backfill(apps, schema_editor):
+    InterviewResult = apps.get_model("api", "InterviewResult")
+    Question = apps.get_model("api", "Question")
+    UserStats = apps.get_model("api", "UserStats")
+    UserStatBucket = apps.get_model("api", "UserStatBucket")
+
+    skills = dict(Question.objects.exclude(text_hash="").values_list("text_hash", "skill"))
+
+    totals = {}
+    buckets = {}
+
+    results = InterviewResult.objects.filter(user__isnull=False).only(
+        "user_id", "session_id", "question", "score", "created_at"
+    )
+    for r in results.iterator(chunk_size=2000):
+        normalized = " ".join((r.question or "").lower().split())
+        skill = skills.get(hashlib.sha1(normalized.encode("utf-8")).hexdigest()) or "general"
+
+        t = totals.setdefault(r.user_id, [0, 0, r.score, r.score])
+        t[0] += 1
+        t[1] += r.score
+        t[2] = max(t[2], r.score)
+        t[3] = min(t[3], r.score)
+
+        for kind, key in (("skill", skill), ("day", r.created_at.date().isoformat()), ("session", r.session_id)):
+            b = buckets.setdefault((r.user_id, kind, key), [0, 0, r.created_at, r.created_at])
+            b[0] += 1
+            b[1] += r.score
+            b[2] = min(b[2], r.created_at)
+            b[3] = max(b[3], r.created_at)
+
+    UserStats.objects.bulk_create(
+        [
+            UserStats(user_id=user_id, total_attempts=n, total_score=total, best_score=best, worst_score=worst)
+            for user_id, (n, total, best, worst) in totals.items()
+        ],
+        batch_size=500,
+    )
+    UserStatBucket.objects.bulk_create(
+        [
+            UserStatBucket(user_id=user_id, kind=kind, key=key, attempts=n, total_score=total, first_at=first, last_at=last)
+            for (user_id, kind, key), (n, total, first, last) in buckets.items()
+        ],
+        batch_size=500,
+    )
+
+
+def clear(apps, schema_editor):
+    apps.get_model("api", "UserStatBucket").objects.all().delete()
+    apps.get_model("api", "UserStats").objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_user_stats'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, clear),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0016_backfill_user_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuestionDemand',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('role', models.CharField(max_length=100)),
+                ('skill', models.CharField(max_length=100)),
+                ('level', models.CharField(max_length=50)),
+                ('requests', models.PositiveIntegerField(default=0)),
+                ('last_requested_at', models.DateTimeField(blank=True, null=True)),
+                ('last_generated_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('role', 'skill', 'level'), name='demand_role_skill_level_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,82 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:33
+
+import math
+import re
+import zlib
+from array import array
+
+from django.db import migrations, models
+
+# Frozen copy of api.embedding as of this migration, so later changes to
+# the live module can't change what this backfill computes.
+EMBEDDING_DIM = 256
+
+_WORD = re.compile(r"[a-z0-9+#]+")
+
+_STOPWORDS = frozenset("""
+    a an and are as at be by can could describe did do does explain for from give how i in is it
+    its me of on or please question should tell that the their there these this to type types
+    use used using various was we what when where which why will with would you your
+""".split())
+
+
+def _stem(word):
+    for suffix in ("ing", "es", "ed", "s"):
+        if len(word) > 4 and word.endswith(suffix):
+            return word[:-len(suffix)]
+    return word
+
+
+def _features(text):
+    words = [_stem(w) for w in _WORD.findall((text or "").lower()) if w not in _STOPWORDS]
+
+    for w in words:
+        yield w, 1.0
+        padded = f" {w} "
+        for i in range(len(padded) - 2):
+            yield "#" + padded[i:i + 3], 0.5
+    for a, b in zip(words, words[1:]):
+        yield a + " " + b, 0.75
+
+
+def question_embedding(text):
+    vec = [0.0] * EMBEDDING_DIM
+    for feature, weight in _features(text):
+        h = zlib.crc32(feature.encode("utf-8"))
+        vec[h % EMBEDDING_DIM] += -weight if h & 0x80000000 else weight
+
+    norm = math.sqrt(sum(v * v for v in vec))
+    if norm:
+        vec = [v / norm for v in vec]
+    return array("f", vec).tobytes()
+
+
+def backfill_embedding(apps, schema_editor):
+    Question = apps.get_model("api", "Question")
+
+    batch = []
+    for q in Question.objects.only("id", "text").iterator(chunk_size=2000):
+        q.embedding = question_embedding(q.text)
+        batch.append(q)
+        if len(batch) >= 2000:
+            Question.objects.bulk_update(batch, ["embedding"])
+            batch = []
+
+    if batch:
+        Question.objects.bulk_update(batch, ["embedding"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0017_questiondemand'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='question',
+            name='embedding',
+            field=models.BinaryField(null=True, editable=False),
+        ),
+        migrations.RunPython(backfill_embedding, migrations.RunPython.noop),
+    ]
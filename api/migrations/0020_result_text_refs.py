@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0019_session_plans'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TextBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('digest', models.CharField(max_length=64, unique=True)),
+                ('text', models.TextField()),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='interviewresult',
+            name='improved_answer',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AlterField(
+            model_name='interviewresult',
+            name='question',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='interviewresult',
+            name='improved_answer_blob',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='api.textblob'),
+        ),
+    ]
@@ -0,0 +1,100 @@
+import hashlib
+from collections import defaultdict
+
+from django.db import migrations
+
+BATCH = 2000
+
+
+# Frozen copies of api.models.question_text_hash and api.textstore.text_digest
+# as of this migration, so later changes to them can't change this backfill.
+def question_text_hash(text):
+    normalized = " ".join((text or "").lower().split())
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+
+def text_digest(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _chunks(InterviewResult, fields):
+    """Rows in primary-key order, BATCH at a time, so memory stays flat on big tables."""
+    last_id = 0
+    while True:
+        rows = list(
+            InterviewResult.objects.filter(id__gt=last_id)
+            .order_by("id")
+            .values_list("id", *fields)[:BATCH]
+        )
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1][0]
+
+
+def link_text(apps, schema_editor):
+    InterviewResult = apps.get_model("api", "InterviewResult")
+    Question = apps.get_model("api", "Question")
+    TextBlob = apps.get_model("api", "TextBlob")
+
+    for rows in _chunks(InterviewResult, ["question", "improved_answer", "bank_question_id"]):
+        # Exact text matches only, so the text shown for a result never changes
+        hashes = {question_text_hash(q) for _, q, _, bank_id in rows if q and not bank_id}
+        bank = {}
+        for qid, text in Question.objects.filter(text_hash__in=hashes).order_by("-id").values_list("id", "text"):
+            bank[text] = qid
+
+        answers = {text_digest(a): a for _, _, a, _ in rows if a}
+        TextBlob.objects.bulk_create(
+            [TextBlob(digest=d, text=t) for d, t in answers.items()], ignore_conflicts=True
+        )
+        blobs = dict(TextBlob.objects.filter(digest__in=answers).values_list("digest", "id"))
+
+        # Results for the same question or answer get identical values, so
+        # one UPDATE per distinct value beats bulk_update's per-row CASE
+        by_question = defaultdict(list)
+        by_blob = defaultdict(list)
+        for result_id, question, answer, bank_id in rows:
+            bank_id = bank_id or bank.get(question)
+            if bank_id and question:
+                by_question[bank_id].append(result_id)
+            if answer:
+                by_blob[blobs[text_digest(answer)]].append(result_id)
+
+        for bank_id, ids in by_question.items():
+            InterviewResult.objects.filter(id__in=ids).update(bank_question_id=bank_id, question="")
+        for blob_id, ids in by_blob.items():
+            InterviewResult.objects.filter(id__in=ids).update(improved_answer_blob_id=blob_id, improved_answer="")
+
+
+def unlink_text(apps, schema_editor):
+    InterviewResult = apps.get_model("api", "InterviewResult")
+    Question = apps.get_model("api", "Question")
+    TextBlob = apps.get_model("api", "TextBlob")
+
+    for rows in _chunks(InterviewResult, ["question", "bank_question_id", "improved_answer_blob_id"]):
+        by_question = defaultdict(list)
+        by_blob = defaultdict(list)
+        for result_id, question, bank_id, blob_id in rows:
+            if bank_id and not question:
+                by_question[bank_id].append(result_id)
+            if blob_id:
+                by_blob[blob_id].append(result_id)
+
+        for bank_id, text in Question.objects.filter(id__in=by_question).values_list("id", "text"):
+            InterviewResult.objects.filter(id__in=by_question[bank_id]).update(question=text)
+        for blob_id, text in TextBlob.objects.filter(id__in=by_blob).values_list("id", "text"):
+            InterviewResult.objects.filter(id__in=by_blob[blob_id]).update(
+                improved_answer=text, improved_answer_blob_id=None
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0020_result_text_refs'),
+    ]
+
+    operations = [
+        migrations.RunPython(link_text, unlink_text),
+    ]
@@ -1,6 +1,18 @@
+import hashlib
+import uuid
+
 from django.db import models
 from django.contrib.auth.models import User
 
+from .embedding import question_embedding
+
+
+def question_text_hash(text):
+    """Hash of the case- and whitespace-normalized question text, used for duplicate checks."""
+    normalized = " ".join((text or "").lower().split())
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+
 class UserProfile(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
     full_name = models.CharField(max_length=200)
@@ -16,21 +28,249 @@ class Question(models.Model):
     role = models.CharField(max_length=100, blank=True)
     skill = models.CharField(max_length=100, blank=True)
     level = models.CharField(max_length=50, blank=True)
+    text_hash = models.CharField(max_length=40, blank=True, default="", editable=False)
+    # float32 vector from api.embedding, for near-duplicate checks
+    embedding = models.BinaryField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["role", "skill", "level"], name="question_role_skill_level_idx"),
+            models.Index(fields=["text_hash", "role", "skill", "level"], name="question_text_hash_idx"),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.text_hash = question_text_hash(self.text)
+        self.embedding = question_embedding(self.text)
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return self.text[:50]
 
 
+class QuestionDemand(models.Model):
+    """How often each (role, skill, level) is asked for, used to pre-generate stock."""
+
+    role = models.CharField(max_length=100)
+    skill = models.CharField(max_length=100)
+    level = models.CharField(max_length=50)
+    requests = models.PositiveIntegerField(default=0)
+    last_requested_at = models.DateTimeField(null=True, blank=True)
+    last_generated_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["role", "skill", "level"], name="demand_role_skill_level_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.role} / {self.skill} / {self.level}"
+
+
+class Role(models.Model):
+    name = models.CharField(max_length=100, unique=True)
+    question_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.name
+
+
+class Skill(models.Model):
+    name = models.CharField(max_length=100, unique=True)
+    question_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.name
+
+
+class TextBlob(models.Model):
+    """Long text stored once per distinct content, keyed by its SHA-256."""
+
+    digest = models.CharField(max_length=64, unique=True)
+    text = models.TextField()
+
+    def __str__(self):
+        return self.digest[:12]
+
+
 class InterviewResult(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
     session_id = models.CharField(max_length=200, default="unknown")
-    question = models.TextField()
+    # Free text only for ad-hoc questions; bank questions are referenced by bank_question
+    question = models.TextField(blank=True)
     answer = models.TextField()
     score = models.IntegerField()
     strengths = models.TextField()
     weaknesses = models.TextField()
-    improved_answer = models.TextField()
+    # Rows saved before improved_answer_blob existed keep their text here
+    improved_answer = models.TextField(blank=True)
+    bank_question = models.ForeignKey(Question, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    improved_answer_blob = models.ForeignKey(
+        TextBlob, on_delete=models.PROTECT, null=True, blank=True, related_name="+"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "score"], name="result_user_score_idx"),
+            models.Index(fields=["session_id", "created_at"], name="result_session_created_idx"),
+        ]
+
     def __str__(self):
         return f"{self.user.username if self.user else 'Anonymous'} - {self.session_id}"
+
+    @property
+    def question_text(self):
+        return self.bank_question.text if self.bank_question_id else self.question
+
+    @property
+    def improved_answer_text(self):
+        return self.improved_answer_blob.text if self.improved_answer_blob_id else self.improved_answer
+
+
+class SessionPlan(models.Model):
+    """Questions reserved for an interview session when it starts."""
+
+    session_id = models.CharField(max_length=200, unique=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
+    role = models.CharField(max_length=100, blank=True)
+    skill = models.CharField(max_length=100, blank=True)
+    level = models.CharField(max_length=50, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.session_id
+
+
+class SessionPlanItem(models.Model):
+    plan = models.ForeignKey(SessionPlan, on_delete=models.CASCADE, related_name="items")
+    position = models.PositiveIntegerField()
+    question = models.ForeignKey(Question, on_delete=models.CASCADE, related_name="+")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["plan", "position"], name="planitem_plan_position_uniq"),
+            models.UniqueConstraint(fields=["plan", "question"], name="planitem_plan_question_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.plan_id} #{self.position}"
+
+
+class ArchivedSession(models.Model):
+    """
+    A session's results moved out of InterviewResult by ``manage.py
+    archive_results``: one compressed JSON list of review rows.
+    """
+
+    session_id = models.CharField(max_length=200)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
+    codec = models.CharField(max_length=10)
+    data = models.BinaryField()
+    result_count = models.PositiveIntegerField()
+    raw_size = models.PositiveIntegerField()
+    first_at = models.DateTimeField()
+    last_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["session_id"], name="archive_session_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.session_id} ({self.result_count} results)"
+
+
+class EvaluationJob(models.Model):
+    STATUS_PENDING = "pending"
+    STATUS_RUNNING = "running"
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Pending"),
+        (STATUS_RUNNING, "Running"),
+        (STATUS_DONE, "Done"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
+    session_id = models.CharField(max_length=200)
+    question = models.TextField()
+    answer = models.TextField()
+    bank_question = models.ForeignKey(Question, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    skill = models.CharField(max_length=100, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    result = models.JSONField(null=True, blank=True)
+    error = models.JSONField(null=True, blank=True)
+    interview_result = models.ForeignKey(InterviewResult, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "created_at"], name="evaljob_status_created_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.id} ({self.status})"
+
+
+class ResumeAnalysis(models.Model):
+    content_hash = models.CharField(max_length=64, unique=True)
+    file_name = models.CharField(max_length=255, blank=True)
+    text = models.TextField(blank=True)
+    model = models.CharField(max_length=100, blank=True)
+    analysis = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.file_name or 'resume'} ({self.content_hash[:12]})"
+
+
+class UserStats(models.Model):
+    """Running totals per user, updated as results are saved."""
+
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name="interview_stats")
+    total_attempts = models.PositiveIntegerField(default=0)
+    total_score = models.PositiveIntegerField(default=0)
+    best_score = models.IntegerField(null=True, blank=True)
+    worst_score = models.IntegerField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.user.username} ({self.total_attempts} attempts)"
+
+
+class UserStatBucket(models.Model):
+    """Per-user totals grouped by skill, by day or by session."""
+
+    KIND_SKILL = "skill"
+    KIND_DAY = "day"
+    KIND_SESSION = "session"
+
+    KIND_CHOICES = [
+        (KIND_SKILL, "Skill"),
+        (KIND_DAY, "Day"),
+        (KIND_SESSION, "Session"),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    key = models.CharField(max_length=200)
+    attempts = models.PositiveIntegerField(default=0)
+    total_score = models.PositiveIntegerField(default=0)
+    first_at = models.DateTimeField(null=True, blank=True)
+    last_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "kind", "key"], name="statbucket_user_kind_key_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} {self.kind}:{self.key}"
@@ -0,0 +1,166 @@
+"""
+Background pre-generation of bank questions.
+
+get_question calls note_request() for every fully specified (role,
+skill, level). That counts demand in memory, and at most once per
+QUESTION_STOCK_CHECK_INTERVAL per combination queues a refill on a small
+background thread pool. The refill only calls the model if the bank
+holds fewer than the target number of questions. It generates questions
+through the same prompt and save_question_if_new path as the AI fallback,
+so later requests hit the bank instead of waiting on the model.
+
+Demand counts are written to QuestionDemand in one batch every
+QUESTION_DEMAND_FLUSH_INTERVAL seconds, not once per request. Counts
+not flushed yet are lost if the process exits.
+"""
+
+import logging
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import llm
+from .models import Question, QuestionDemand
+from .questions import build_question_prompt, save_question_if_new
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_pending = set()
+_lock = threading.Lock()
+
+# (role, skill, level) -> [requests, last requested at] not yet written
+_demand = {}
+# (role, skill, level) -> time.monotonic() of the last queued refill
+_checked = {}
+_flushing = False
+_last_flush = time.monotonic()
+
+
+def stock_target(role, skill, level):
+    return settings.QUESTION_STOCK_TARGETS.get(
+        f"{role}|{skill}|{level}", settings.QUESTION_STOCK_TARGET
+    )
+
+
+def stock(role, skill, level):
+    return Question.objects.filter(role=role, skill=skill, level=level).count()
+
+
+def flush_demand():
+    """Write the demand counted since the last flush. Returns how many combinations were written."""
+    global _flushing, _last_flush
+    with _lock:
+        demand = _demand.copy()
+        _demand.clear()
+        _last_flush = time.monotonic()
+
+    try:
+        if demand:
+            with transaction.atomic():
+                QuestionDemand.objects.bulk_create(
+                    [QuestionDemand(role=r, skill=s, level=l) for r, s, l in demand], ignore_conflicts=True
+                )
+                for (role, skill, level), (requests, at) in demand.items():
+                    QuestionDemand.objects.filter(role=role, skill=skill, level=level).update(
+                        requests=F("requests") + requests, last_requested_at=at
+                    )
+    finally:
+        with _lock:
+            _flushing = False
+    return len(demand)
+
+
+def refill(role, skill, level, limit=None):
+    """
+    Generate questions until the combination reaches its stock target.
+    At most ``limit`` new questions are generated per call. Returns how
+    many were added.
+    """
+    missing = stock_target(role, skill, level) - stock(role, skill, level)
+    if limit is not None:
+        missing = min(missing, limit)
+    if missing <= 0:
+        return 0
+
+    added = 0
+    # The model sometimes repeats itself; don't loop forever on duplicates
+    for _ in range(missing * 2):
+        ai = llm.chat("question", build_question_prompt(role, skill, level))
+        if save_question_if_new(ai["message"]["content"], role, skill, level):
+            added += 1
+        if added >= missing:
+            break
+
+    if added:
+        QuestionDemand.objects.filter(role=role, skill=skill, level=level).update(
+            last_generated_at=timezone.now()
+        )
+    return added
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.QUESTION_PREWARM_WORKERS,
+            thread_name_prefix="prewarm",
+        )
+    return _executor
+
+
+def _run(key):
+    try:
+        with llm.background():
+            refill(*key, limit=settings.QUESTION_PREWARM_BATCH)
+    except llm.LLMError as e:
+        logger.warning("Question pre-generation failed for %s: %s", key, e)
+    except Exception:
+        logger.exception("Question pre-generation crashed for %s", key)
+    finally:
+        with _lock:
+            _pending.discard(key)
+        connection.close()
+
+
+def _flush():
+    try:
+        flush_demand()
+    except Exception:
+        logger.exception("Writing question demand failed")
+    finally:
+        connection.close()
+
+
+def note_request(role, skill, level):
+    """Called on the request path: cheap, never blocks on the database or the model."""
+    global _flushing
+    if not (role and skill and level) or settings.QUESTION_PREWARM_WORKERS <= 0:
+        return
+
+    key = (role, skill, level)
+    now = time.monotonic()
+    with _lock:
+        counted = _demand.setdefault(key, [0, None])
+        counted[0] += 1
+        counted[1] = timezone.now()
+
+        flush = not _flushing and now - _last_flush >= settings.QUESTION_DEMAND_FLUSH_INTERVAL
+        if flush:
+            _flushing = True
+
+        check = key not in _pending and now - _checked.get(key, -math.inf) >= settings.QUESTION_STOCK_CHECK_INTERVAL
+        if check:
+            _pending.add(key)
+            _checked[key] = now
+
+    if flush:
+        _get_executor().submit(_flush)
+    if check:
+        _get_executor().submit(_run, key)
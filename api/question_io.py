@@ -0,0 +1,165 @@
+"""
+Bulk import of bank questions from CSV or JSONL.
+
+Rows are normalized like add_question does. Each chunk is checked for
+exact duplicates with one text_hash lookup, then for rewordings of stored
+questions or of earlier rows through the similarity index, and inserted
+with one bulk_create.
+"""
+
+import codecs
+import csv
+import io
+import json
+
+from django.db import transaction
+
+from . import similarity, taxonomy
+from .embedding import question_embedding
+from .models import Question, question_text_hash
+from .utils import normalize
+
+CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 20
+DECODE_CHUNK_SIZE = 64 * 1024
+FIELDS = ("text", "role", "skill", "level")
+
+
+def _check_utf8(raw):
+    """
+    Raise ValueError unless ``raw`` decodes as UTF-8, then rewind it, so a
+    bad byte fails the upload before any row is imported.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    try:
+        for block in iter(lambda: raw.read(DECODE_CHUNK_SIZE), b""):
+            decoder.decode(block)
+        decoder.decode(b"", final=True)
+    except UnicodeDecodeError as e:
+        raise ValueError(f"File is not valid UTF-8 (byte {e.start})")
+    raw.seek(0)
+
+
+def read_rows(fileobj, name):
+    """Return an iterator of ``(line_number, dict)`` for a .csv or .jsonl file."""
+    raw = getattr(fileobj, "file", fileobj)
+
+    if name.endswith((".csv", ".jsonl", ".ndjson")):
+        _check_utf8(raw)
+
+    if name.endswith(".csv"):
+        text = io.TextIOWrapper(raw, encoding="utf-8-sig", newline="")
+        reader = csv.DictReader(text)
+        return ((reader.line_num, row) for row in reader)
+
+    if name.endswith((".jsonl", ".ndjson")):
+        text = io.TextIOWrapper(raw, encoding="utf-8-sig")
+        return _jsonl_rows(text)
+
+    raise ValueError("Unsupported file format, use .csv or .jsonl")
+
+
+def _jsonl_rows(lines):
+    for number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield number, json.loads(line)
+        except ValueError as e:
+            yield number, {"__error__": f"Invalid JSON: {e}"}
+
+
+def _chunks(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def import_questions(rows, chunk_size=CHUNK_SIZE):
+    """
+    Insert new questions from ``(line_number, dict)`` rows and return a
+    report with counts and the first few row errors.
+    """
+    report = {"total": 0, "inserted": 0, "duplicates": 0, "invalid": 0, "errors": []}
+    seen = set()
+
+    def reject(number, message):
+        report["invalid"] += 1
+        if len(report["errors"]) < MAX_REPORTED_ERRORS:
+            report["errors"].append({"line": number, "error": message})
+
+    for chunk in _chunks(rows, chunk_size):
+        candidates = {}
+
+        for number, row in chunk:
+            report["total"] += 1
+
+            if not isinstance(row, dict):
+                reject(number, "Expected an object")
+                continue
+            if "__error__" in row:
+                reject(number, row["__error__"])
+                continue
+
+            bad = [f for f in FIELDS if row.get(f) is not None and not isinstance(row[f], str)]
+            if bad:
+                reject(number, f"Field {bad[0]!r} must be a string")
+                continue
+
+            text = (row.get("text") or "").strip()
+            if not text:
+                reject(number, "Question text required")
+                continue
+
+            question = Question(
+                text=text,
+                role=normalize(row.get("role")),
+                skill=normalize(row.get("skill")),
+                level=normalize(row.get("level")) or "easy",
+                text_hash=question_text_hash(text),
+                embedding=question_embedding(text),
+            )
+            key = (question.text_hash, question.role, question.skill, question.level)
+
+            if key in seen or key in candidates:
+                report["duplicates"] += 1
+                continue
+            candidates[key] = question
+
+        if not candidates:
+            continue
+
+        existing = set(
+            Question.objects.filter(text_hash__in={key[0] for key in candidates})
+            .values_list("text_hash", "role", "skill", "level")
+        )
+
+        # Rewordings of stored questions, or of rows earlier in this chunk
+        new = []
+        accepted = {}
+        for key, q in candidates.items():
+            combination = key[1:]
+            if key in existing or similarity.find_near_duplicate(q.text, *combination) is not None:
+                continue
+            if similarity.reads_like_any(q.embedding, accepted.get(combination)):
+                continue
+            accepted.setdefault(combination, []).append(q.embedding)
+            new.append(q)
+
+        report["duplicates"] += len(candidates) - len(new)
+        seen.update(candidates)
+
+        if new:
+            with transaction.atomic():
+                Question.objects.bulk_create(new)
+                # bulk_create skips the post_save signal that keeps counts current
+                taxonomy.add_question_counts([(q.role, q.skill) for q in new])
+            report["inserted"] += len(new)
+
+    return report
@@ -0,0 +1,118 @@
+import random
+
+from . import llm, similarity
+from .models import InterviewResult, Question, question_text_hash
+from .utils import normalize
+
+
+PICK_ATTEMPTS = 3
+
+
+def pick_random_question(qs):
+    """
+    Pick a random row from ``qs`` with three index lookups, however large
+    the bank is: the lowest and highest matching ids, then the first row
+    at or after a random id between them.
+
+    A row right after a gap in the ids is drawn more often than one in a
+    dense run. For choosing an interview question that is fine, and it
+    avoids counting or skipping rows. The draw is retried if rows were
+    deleted in the meantime.
+    """
+    ordered = qs.order_by("id")
+    low = ordered.values_list("id", flat=True).first()
+    if low is None:
+        return None
+    high = ordered.reverse().values_list("id", flat=True).first()
+
+    for _ in range(PICK_ATTEMPTS):
+        question = ordered.filter(id__gte=random.randint(low, high)).first()
+        if question is not None:
+            return question
+    return ordered.first()
+
+
+def save_question_if_new(text, role, skill, level):
+    text = text.strip()
+    role = normalize(role)
+    skill = normalize(skill)
+    level = normalize(level)
+
+    exists = Question.objects.filter(
+        text_hash=question_text_hash(text),
+        role=role,
+        skill=skill,
+        level=level,
+    ).exists()
+
+    # Paraphrases of a stored question count as duplicates too
+    if not exists:
+        exists = similarity.find_near_duplicate(text, role, skill, level) is not None
+
+    if not exists:
+        Question.objects.create(
+            text=text,
+            role=role,
+            skill=skill,
+            level=level
+        )
+
+    return not exists
+
+
+def bank_question_for_text(text):
+    """The bank question with exactly this text, or None for ad-hoc questions."""
+    for question in Question.objects.defer("embedding").filter(text_hash=question_text_hash(text))[:5]:
+        if question.text == text:
+            return question
+    return None
+
+
+def session_question_texts(session_id):
+    """Texts of the questions answered so far in a session."""
+    rows = InterviewResult.objects.filter(session_id=session_id).values_list("question", "bank_question__text")
+    return [bank_text or text for text, bank_text in rows]
+
+
+def find_bank_question(role, skill, level, session_id=None):
+    qs = Question.objects.defer("embedding")
+
+    if role:
+        qs = qs.filter(role=role)
+    if skill:
+        qs = qs.filter(skill=skill)
+    if level:
+        qs = qs.filter(level=level)
+
+    # Don't repeat questions already asked in this session, or close rewordings of them
+    if session_id:
+        asked = session_question_texts(session_id)
+        if similarity.available():
+            picked = similarity.pick_unlike(asked, role, skill, level)
+            if picked is not None:
+                question = qs.filter(id=picked).first()
+                if question:
+                    return question
+        qs = qs.exclude(text__in=asked)
+
+    return pick_random_question(qs)
+
+
+def build_question_prompt(role, skill, level):
+    return f"""
+    Generate ONE interview question.
+    Role: {role or 'general'}
+    Skill: {skill or 'general'}
+    Difficulty: {level or 'easy'}
+    Return ONLY the question.
+    """
+
+
+def generate_question(role, skill, level):
+    """Ask the model for a new question and add it to the bank. Raises llm.LLMError."""
+    ai = llm.chat("question", build_question_prompt(role, skill, level))
+    q_text = ai["message"]["content"].strip()
+
+    save_question_if_new(q_text, role or "general", skill or "general", level or "easy")
+
+    return q_text
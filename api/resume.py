@@ -0,0 +1,426 @@
+import hashlib
+import multiprocessing
+import os
+import queue
+import shutil
+import threading
+import time
+import zipfile
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+
+from . import llm, metrics
+from .extract import extract_text
+from .llmjson import JSONExtractError, extract_json
+from .models import ResumeAnalysis
+
+SUPPORTED_EXTENSIONS = (".pdf", ".docx")
+
+RESUME_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "ats_score": {"type": "integer", "minimum": 0, "maximum": 100},
+        "best_fit_role": {"type": "string", "default": ""},
+        "top_skills": {"type": "string", "default": ""},
+        "strengths": {"type": "string", "default": ""},
+        "weaknesses": {"type": "string", "default": ""},
+        "skills_missing": {"type": "string", "default": ""},
+        "summary": {"type": "string", "default": ""},
+    },
+    "required": ["ats_score", "best_fit_role", "top_skills", "strengths", "weaknesses", "skills_missing", "summary"],
+}
+
+
+class ResumeError(Exception):
+    def __init__(self, payload, status=500):
+        super().__init__(payload.get("error"))
+        self.payload = payload
+        self.status = status
+
+
+# ============================================================
+# TEXT EXTRACTION
+# ============================================================
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                # spawn, not fork: the parent is a threaded server holding DB connections
+                _pool = ProcessPoolExecutor(
+                    max_workers=settings.RESUME_PARSE_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+    return _pool
+
+
+def _reset_pool(pool, kill=False):
+    """
+    Retire ``pool`` so the next submit starts a fresh one. With ``kill`` its
+    worker processes are terminated, whatever they are parsing: a timed-out
+    parse would otherwise keep a worker busy and starve later uploads.
+    """
+    global _pool
+    if pool is None:
+        return
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    if kill:
+        for process in list((pool._processes or {}).values()):
+            process.terminate()
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def hash_upload(file):
+    digest = hashlib.sha256()
+    for chunk in file.chunks():
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+def submit_extraction(source, file_name):
+    """
+    Start extracting ``source`` in the worker pool and return the Future.
+    Its ``pool`` attribute is the pool it runs on (None when parsing inline).
+    """
+    args = (source, file_name, settings.RESUME_MAX_CHARS, settings.RESUME_MAX_PAGES)
+
+    if settings.RESUME_PARSE_WORKERS > 0:
+        pool = _get_pool()
+        try:
+            future = pool.submit(extract_text, *args)
+        except BrokenProcessPool:
+            _reset_pool(pool)
+            pool = _get_pool()
+            future = pool.submit(extract_text, *args)
+        future.pool = pool
+        return future
+
+    future = Future()
+    future.pool = None
+    try:
+        future.set_result(extract_text(*args))
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+
+def extraction_source(file):
+    """
+    What to hand the extractor. Large uploads already sit in a temp file
+    on disk, so we pass its path. Small ones are in memory, at most
+    FILE_UPLOAD_MAX_MEMORY_SIZE, so we pass their bytes.
+    """
+    if hasattr(file, "temporary_file_path"):
+        return file.temporary_file_path()
+    file.seek(0)
+    return file.read()
+
+
+def extract_upload(file):
+    if file.size > settings.RESUME_MAX_BYTES:
+        raise ResumeError({
+            "error": "File too large",
+            "max_bytes": settings.RESUME_MAX_BYTES,
+        }, status=413)
+
+    source = extraction_source(file)
+    deadline = time.monotonic() + settings.RESUME_PARSE_TIMEOUT
+
+    try:
+        with metrics.phase("extract_" + os.path.splitext(file.name)[1].lstrip(".").lower()):
+            for attempt in range(2):
+                future = submit_extraction(source, file.name)
+                try:
+                    return future.result(timeout=max(0, deadline - time.monotonic()))
+                except TimeoutError:
+                    _reset_pool(future.pool, kill=True)
+                    raise
+                except BrokenProcessPool:
+                    # Usually another upload's timeout killed the pool under this one
+                    _reset_pool(future.pool)
+                    if attempt:
+                        raise
+
+    except TimeoutError:
+        raise ResumeError({"error": "Timed out reading file"}, status=504)
+    except BrokenProcessPool as e:
+        raise ResumeError({"error": "Failed to read file", "details": str(e)})
+    except Exception as e:
+        raise ResumeError({"error": "Failed to read file", "details": str(e)})
+
+
+# ============================================================
+# AI ANALYSIS
+# ============================================================
+
+def build_resume_prompt(text):
+    return f"""
+You are an ATS resume analysis engine. Analyze the resume below and return a DETAILED structured JSON.
+
+Resume Text:
+{text}
+
+Your job:
+- Extract maximum information.
+- If something is missing, infer it intelligently.
+- Do NOT leave any field empty.
+- Each field must contain full, meaningful content.
+- Strengths & weaknesses must be 3–4 sentences.
+- Summary must be 3–5 recruiter-focused sentences.
+
+Return ONLY valid JSON in this exact structure:
+
+{{
+    "ats_score": number,
+    "best_fit_role": "string",
+    "top_skills": "comma-separated string",
+    "strengths": "3-4 complete sentences",
+    "weaknesses": "3-4 complete sentences",
+    "skills_missing": "comma-separated string",
+    "summary": "3-5 detailed sentences"
+}}
+
+Rules:
+- No explanations before or after the JSON.
+- JSON must be complete and valid.
+- Never return an empty key.
+- Fill in all fields even if you must infer from context.
+"""
+
+
+def parse_resume_analysis(raw):
+    """The analysis object in the model output, repaired and validated against RESUME_SCHEMA."""
+    try:
+        return extract_json(raw, RESUME_SCHEMA)
+    except JSONExtractError as e:
+        raise ResumeError({
+            "error": "AI returned invalid JSON",
+            "raw_ai_output": raw,
+            "exception": str(e)
+        })
+
+
+def analyze_text(text):
+    try:
+        ai = llm.chat("resume", build_resume_prompt(text), format=llm.json_format(RESUME_SCHEMA))
+    except llm.LLMOverloaded as e:
+        raise ResumeError(e.payload(), status=e.status)
+    except llm.LLMError as e:
+        raise ResumeError({"error": "AI model error", "details": str(e)})
+
+    with metrics.phase("parse_resume"):
+        return parse_resume_analysis(ai["message"]["content"])
+
+
+# ============================================================
+# BATCH ANALYSIS
+# ============================================================
+
+def _stage(fileobj, name, directory, index):
+    """Copy one upload/zip member into ``directory``, hashing it on the way."""
+    path = os.path.join(directory, f"{index}{os.path.splitext(name)[1]}")
+    digest = hashlib.sha256()
+    size = 0
+
+    with open(path, "wb") as out:
+        while True:
+            chunk = fileobj.read(64 * 1024)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > settings.RESUME_MAX_BYTES:
+                return {"file": name, "error": {"error": "File too large", "max_bytes": settings.RESUME_MAX_BYTES}}
+            digest.update(chunk)
+            out.write(chunk)
+
+    return {"file": name, "path": path, "hash": digest.hexdigest()}
+
+
+def _too_many_files():
+    return ResumeError({
+        "error": "Too many files",
+        "max_files": settings.RESUME_BATCH_MAX_FILES,
+    }, status=400)
+
+
+def _archive_members(zf):
+    """Zip members worth staging: supported resumes, minus folders and macOS metadata."""
+    members = []
+    for info in zf.infolist():
+        name = info.filename
+        base = os.path.basename(name)
+        if info.is_dir() or base.startswith(".") or name.startswith("__MACOSX/"):
+            continue
+        if base.endswith(SUPPORTED_EXTENSIONS):
+            members.append(info)
+    return members
+
+
+def stage_batch(files, archive, directory):
+    """
+    Copy the uploaded files and supported zip members into ``directory``
+    so the parse workers can open them by path. Returns one item per file.
+    The file count is checked before anything is written.
+    """
+    if len(files) > settings.RESUME_BATCH_MAX_FILES:
+        raise _too_many_files()
+
+    zf = None
+    members = []
+    if archive is not None:
+        try:
+            zf = zipfile.ZipFile(archive)
+        except zipfile.BadZipFile:
+            raise ResumeError({"error": "Invalid zip archive"}, status=400)
+        members = _archive_members(zf)
+        if len(files) + len(members) > settings.RESUME_BATCH_MAX_FILES:
+            zf.close()
+            raise _too_many_files()
+
+    items = []
+
+    for file in files:
+        if not file.name.endswith(SUPPORTED_EXTENSIONS):
+            items.append({"file": file.name, "error": {"error": "Unsupported file format"}})
+            continue
+        file.seek(0)
+        items.append(_stage(file, file.name, directory, len(items)))
+
+    if zf is not None:
+        try:
+            with zf:
+                for info in members:
+                    if info.file_size > settings.RESUME_MAX_BYTES:
+                        items.append({"file": info.filename, "error": {"error": "File too large", "max_bytes": settings.RESUME_MAX_BYTES}})
+                        continue
+                    with zf.open(info) as member:
+                        items.append(_stage(member, info.filename, directory, len(items)))
+        except zipfile.BadZipFile:
+            raise ResumeError({"error": "Invalid zip archive"}, status=400)
+
+    return items
+
+
+def analyze_batch(items):
+    """
+    Analyze staged items and yield one result dict per file as it finishes.
+
+    Files are parsed in parallel on the worker process pool. Model calls
+    run on at most RESUME_BATCH_LLM_CONCURRENCY threads. Files seen before,
+    including duplicates within the batch, reuse the stored analysis.
+    When the batch times out or the client goes away, parses and model
+    calls that haven't started are dropped.
+    """
+    model = llm.model_for("resume")
+    results = queue.Queue()
+    wait = settings.RESUME_PARSE_TIMEOUT + llm.timeout_for("resume")
+    stopped = threading.Event()
+
+    by_hash = {}
+    for item in items:
+        if "error" in item:
+            yield {"file": item["file"], "status": "error", "error": item["error"]}
+        else:
+            by_hash.setdefault(item["hash"], []).append(item)
+
+    stored = ResumeAnalysis.objects.in_bulk(list(by_hash), field_name="content_hash")
+
+    llm_pool = ThreadPoolExecutor(
+        max_workers=settings.RESUME_BATCH_LLM_CONCURRENCY,
+        thread_name_prefix="resume-batch",
+    )
+    extractions = []
+
+    def run_llm(content_hash, text):
+        if stopped.is_set():
+            return
+        try:
+            # Bulk work: wait behind interactive calls rather than being rejected,
+            # but not for longer than the batch waits for a result
+            with llm.background(max_wait=wait):
+                analysis = analyze_text(text)
+            results.put((content_hash, text, analysis, None))
+        except ResumeError as e:
+            results.put((content_hash, text, None, e.payload))
+        except Exception as e:
+            # Anything else would leave the batch waiting for this file until it times out
+            results.put((content_hash, text, None, {"error": "AI model error", "details": str(e)}))
+
+    def submit_llm(content_hash, text):
+        try:
+            llm_pool.submit(run_llm, content_hash, text)
+        except RuntimeError:
+            pass  # the batch already ended and shut the pool down
+
+    def on_extracted(content_hash, future):
+        if stopped.is_set() or future.cancelled():
+            return
+        try:
+            text = future.result()
+        except Exception as e:
+            results.put((content_hash, None, None, {"error": "Failed to read file", "details": str(e)}))
+        else:
+            submit_llm(content_hash, text)
+
+    pending = 0
+    try:
+        for content_hash, group in by_hash.items():
+            record = stored.get(content_hash)
+
+            if record and record.analysis is not None and record.model == model:
+                for item in group:
+                    yield {"file": item["file"], "resume_id": content_hash, "status": "ok", "analysis": record.analysis, "cached": True}
+                continue
+
+            pending += 1
+            if record:
+                submit_llm(content_hash, record.text)
+            else:
+                future = submit_extraction(group[0]["path"], group[0]["file"])
+                extractions.append(future)
+                future.add_done_callback(lambda f, h=content_hash: on_extracted(h, f))
+
+        while pending:
+            try:
+                content_hash, text, data, error = results.get(timeout=wait)
+            except queue.Empty:
+                yield {"status": "error", "error": {"error": "Timed out waiting for remaining files", "remaining": pending}}
+                return
+
+            pending -= 1
+
+            if text is not None:
+                ResumeAnalysis.objects.update_or_create(
+                    content_hash=content_hash,
+                    defaults={
+                        "file_name": by_hash[content_hash][0]["file"],
+                        "text": text,
+                        **({"analysis": data, "model": model} if data is not None else {}),
+                    },
+                )
+
+            for item in by_hash[content_hash]:
+                if error:
+                    yield {"file": item["file"], "resume_id": content_hash, "status": "error", "error": error}
+                else:
+                    yield {"file": item["file"], "resume_id": content_hash, "status": "ok", "analysis": data, "cached": False}
+
+    finally:
+        stopped.set()
+        for future in extractions:
+            future.cancel()
+        llm_pool.shutdown(wait=False, cancel_futures=True)
+
+
+def remove_staging(directory):
+    shutil.rmtree(directory, ignore_errors=True)
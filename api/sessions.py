@@ -0,0 +1,115 @@
+"""
+Interview session plans.
+
+create_plan() reserves N distinct bank questions for a session up front
+and stores them in order, so the client gets the whole interview in one
+round trip instead of calling get_question once per question. Results
+that reference a planned question by id can then be joined back to it.
+"""
+
+from django.db import transaction
+
+from . import llm, similarity
+from .models import Question, SessionPlan, SessionPlanItem, question_text_hash
+from .questions import generate_question, pick_random_question, session_question_texts
+
+
+def _bank(role, skill, level):
+    qs = Question.objects.defer("embedding")
+    if role:
+        qs = qs.filter(role=role)
+    if skill:
+        qs = qs.filter(skill=skill)
+    if level:
+        qs = qs.filter(level=level)
+    return qs
+
+
+def reserve_questions(role, skill, level, count, asked=()):
+    """
+    Up to ``count`` distinct bank questions, none of them a close rewording
+    of another or of the ``asked`` texts. Generates the shortfall when the
+    bank runs out; raises llm.LLMError only if nothing could be reserved.
+    """
+    qs = _bank(role, skill, level)
+    picked = []
+    texts = list(asked)
+
+    while len(picked) < count:
+        question = None
+        if texts and similarity.available():
+            picked_id = similarity.pick_unlike(texts, role, skill, level)
+            if picked_id is not None:
+                question = qs.filter(id=picked_id).first()
+        if question is None:
+            question = pick_random_question(qs.exclude(id__in=[q.id for q in picked]).exclude(text__in=texts))
+        if question is None:
+            break
+        picked.append(question)
+        texts.append(question.text)
+
+    # Bank exhausted: ask the model for the rest. A generated question may be
+    # a duplicate that was not stored, hence the attempt limit.
+    attempts = (count - len(picked)) * 2
+    while len(picked) < count and attempts > 0:
+        attempts -= 1
+        try:
+            text = generate_question(role, skill, level)
+        except llm.LLMError:
+            if picked:
+                break
+            raise
+        question = _bank(role or "general", skill or "general", level or "easy").filter(
+            text_hash=question_text_hash(text)
+        ).first()
+        if question is not None and question.id not in {q.id for q in picked}:
+            picked.append(question)
+
+    return picked
+
+
+def create_plan(session_id, user, role, skill, level, count):
+    """The session's plan, reserving its questions if it doesn't have one yet."""
+    plan = SessionPlan.objects.filter(session_id=session_id).first()
+    if plan is not None:
+        return plan
+
+    questions = reserve_questions(role, skill, level, count, session_question_texts(session_id))
+
+    with transaction.atomic():
+        plan, created = SessionPlan.objects.get_or_create(
+            session_id=session_id,
+            defaults={"user": user, "role": role, "skill": skill, "level": level},
+        )
+        # A concurrent start for the same session won; keep its plan
+        if created:
+            SessionPlanItem.objects.bulk_create([
+                SessionPlanItem(plan=plan, position=position, question=question)
+                for position, question in enumerate(questions, 1)
+            ])
+    return plan
+
+
+def plan_payload(plan):
+    items = (
+        plan.items.select_related("question")
+        .defer("question__embedding", "question__text_hash")
+        .order_by("position")
+    )
+    return {
+        "session_id": plan.session_id,
+        "role": plan.role,
+        "skill": plan.skill,
+        "level": plan.level,
+        "questions": [
+            {
+                "id": item.question.id,
+                "position": item.position,
+                "text": item.question.text,
+                "role": item.question.role,
+                "skill": item.question.skill,
+                "level": item.question.level,
+            }
+            for item in items
+        ],
+    }
@@ -0,0 +1,45 @@
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from . import metrics, similarity, taxonomy
+from .models import InterviewResult, Question, Role, Skill
+
+
+@receiver(post_save, sender=Question)
+def count_new_question(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        taxonomy.add_question_counts([(instance.role, instance.skill)])
+
+
+@receiver(post_save, sender=Question)
+def reindex_edited_question(sender, instance, created, **kwargs):
+    # New rows are picked up by id; an edit may have changed the text or the
+    # partition. Bump once committed, so no process rebuilds from the old rows
+    if not created:
+        transaction.on_commit(similarity.bump_version)
+
+
+@receiver(pre_delete, sender=Question)
+def keep_result_question_text(sender, instance, **kwargs):
+    # Results only reference bank questions; copy the text back before the FK is cleared
+    InterviewResult.objects.filter(bank_question=instance).update(question=instance.text)
+
+
+@receiver(post_delete, sender=Question)
+def uncount_deleted_question(sender, instance, **kwargs):
+    taxonomy.add_question_counts([(instance.role, instance.skill)], sign=-1)
+    transaction.on_commit(similarity.bump_version)
+
+
+@receiver(connection_created)
+def instrument_connection(sender, connection, **kwargs):
+    if metrics.enabled() and metrics.db_execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(metrics.db_execute_wrapper)
+
+
+@receiver([post_save, post_delete], sender=Role)
+@receiver([post_save, post_delete], sender=Skill)
+def taxonomy_changed(sender, **kwargs):
+    taxonomy.bump_version()
@@ -0,0 +1,216 @@
+"""
+In-memory nearest-neighbour index over question embeddings.
+
+Embeddings are grouped per (role, skill, level) into NumPy matrices, so a
+lookup is one matrix-vector product over the matching partitions. The
+index is built lazily on first use and kept current by loading rows with
+an id above the highest one seen, which also picks up questions added by
+other processes.
+
+Edits and deletes can't be found that way, so they bump a version number
+kept in the Django cache (see bump_version). Every process rebuilds its
+index from scratch the next time it sees a new version, or at the latest
+after QUESTION_INDEX_MAX_AGE seconds in case the cache backend isn't
+shared between processes. Bank questions are rarely edited, so this is
+cheaper than tracking each partition.
+
+NumPy is optional: without it semantic checks are skipped and callers
+fall back to exact text_hash matching.
+"""
+
+import logging
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .embedding import EMBEDDING_DIM, question_embedding
+from .models import Question
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+logger = logging.getLogger(__name__)
+
+LOAD_CHUNK_SIZE = 5000
+
+VERSION_KEY = "similarity:version"
+
+
+def available():
+    return np is not None and settings.QUESTION_SIMILARITY_ENABLED
+
+
+def as_vector(embedding):
+    return np.frombuffer(embedding, dtype=np.float32)
+
+
+class _Partition:
+    def __init__(self):
+        self.ids = np.empty(0, dtype=np.int64)
+        self.matrix = np.empty((0, EMBEDDING_DIM), dtype=np.float32)
+        self._pending_ids = []
+        self._pending = []
+
+    def add(self, qid, embedding):
+        self._pending_ids.append(qid)
+        self._pending.append(embedding)
+
+    def flush(self):
+        if not self._pending:
+            return
+        rows = np.frombuffer(b"".join(self._pending), dtype=np.float32).reshape(-1, EMBEDDING_DIM)
+        self.ids = np.concatenate([self.ids, np.asarray(self._pending_ids, dtype=np.int64)])
+        self.matrix = np.vstack([self.matrix, rows])
+        self._pending_ids = []
+        self._pending = []
+
+
+
+def current_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # Start from the clock so a restarted cache never reuses an old version
+        cache.add(VERSION_KEY, int(time.time() * 1000), None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def bump_version():
+    """Make every process rebuild its index, after questions were edited or deleted."""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, int(time.time() * 1000), None)
+
+
+class QuestionIndex:
+    def __init__(self):
+        self._partitions = {}
+        self._last_id = 0
+        self._version = None
+        self._expires = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return sum(len(p.ids) for p in self._partitions.values())
+
+    def sync(self):
+        """
+        Load questions added since the last sync, or everything again if
+        questions were edited or deleted since. Returns how many were loaded.
+        """
+        with self._lock:
+            version = current_version()
+            now = time.monotonic()
+            if version != self._version or now > self._expires:
+                self._partitions = {}
+                self._last_id = 0
+                self._version = version
+                self._expires = now + settings.QUESTION_INDEX_MAX_AGE
+
+            rows = (
+                Question.objects.filter(id__gt=self._last_id, embedding__isnull=False)
+                .order_by("id")
+                .values_list("id", "role", "skill", "level", "embedding")
+                .iterator(chunk_size=LOAD_CHUNK_SIZE)
+            )
+            loaded = 0
+            for qid, role, skill, level, embedding in rows:
+                embedding = bytes(embedding)
+                if len(embedding) == EMBEDDING_DIM * 4:
+                    self._partitions.setdefault((role, skill, level), _Partition()).add(qid, embedding)
+                    loaded += 1
+                self._last_id = qid
+
+            for partition in self._partitions.values():
+                partition.flush()
+            return loaded
+
+    def _scores(self, vectors, role, skill, level):
+        """
+        ``(ids, scores)`` for questions in the partitions matching the given
+        filters (blank = any), scored against each row of ``vectors``.
+        """
+        self.sync()
+        with self._lock:
+            parts = [
+                (p.ids, p.matrix) for (r, s, l), p in self._partitions.items()
+                if (not role or r == role) and (not skill or s == skill) and (not level or l == level)
+            ]
+        if not parts:
+            return np.empty(0, dtype=np.int64), np.empty((0, len(vectors)), dtype=np.float32)
+        # Score each partition separately rather than stacking them into one big copy
+        return (
+            np.concatenate([ids for ids, _ in parts]),
+            np.concatenate([matrix @ vectors.T for _, matrix in parts]),
+        )
+
+    def nearest(self, text, role, skill, level):
+        """``(question_id, similarity)`` of the closest stored question, or None."""
+        ids, scores = self._scores(as_vector(question_embedding(text))[None, :], role, skill, level)
+        if not len(ids):
+            return None
+        best = int(scores[:, 0].argmax())
+        return int(ids[best]), float(scores[best, 0])
+
+    def unlike(self, texts, role, skill, level, threshold, exclude_ids=()):
+        """Ids of questions whose similarity to every text in ``texts`` is below ``threshold``."""
+        asked = np.vstack([as_vector(question_embedding(t)) for t in texts])
+        ids, scores = self._scores(asked, role, skill, level)
+        if not len(ids):
+            return []
+
+        mask = scores.max(axis=1) < threshold
+        if exclude_ids:
+            mask &= ~np.isin(ids, list(exclude_ids))
+        return ids[mask].tolist()
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_index():
+    global _index
+    with _index_lock:
+        if _index is None:
+            start = time.perf_counter()
+            index = QuestionIndex()
+            index.sync()
+            logger.info("Built question index: %d vectors in %.2fs", len(index), time.perf_counter() - start)
+            _index = index
+    return _index
+
+
+def find_near_duplicate(text, role, skill, level):
+    """Id of a stored question in the same combination that reads the same, or None."""
+    if not available():
+        return None
+    hit = get_index().nearest(text, role, skill, level)
+    if hit and hit[1] >= settings.QUESTION_DUPLICATE_THRESHOLD:
+        return hit[0]
+    return None
+
+
+def reads_like_any(embedding, others):
+    """True if ``embedding`` is a near duplicate of any of the ``others`` (raw embedding bytes)."""
+    if not available() or not others:
+        return False
+    matrix = np.frombuffer(b"".join(others), dtype=np.float32).reshape(-1, EMBEDDING_DIM)
+    return float((matrix @ as_vector(embedding)).max()) >= settings.QUESTION_DUPLICATE_THRESHOLD
+
+
+def pick_unlike(asked, role, skill, level):
+    """
+    Id of a random question in the combination that isn't close to any of
+    the ``asked`` texts, or None if every candidate resembles one of them.
+    """
+    if not available() or not asked:
+        return None
+    ids = get_index().unlike(asked, role, skill, level, settings.QUESTION_SESSION_SIMILARITY)
+    return random.choice(ids) if ids else None
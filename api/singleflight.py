@@ -0,0 +1,167 @@
+"""
+Request coalescing for identical LLM calls.
+
+do(key, fn) runs fn() once for all concurrent callers with the same key.
+Within a process, the first caller runs it and the others wait for its
+result (or exception).
+
+Across processes (several gunicorn workers on one host), the runner
+also holds one slot of a byte-range lock table: a single file in
+SINGLEFLIGHT_LOCK_FILE, with keys hashed onto SINGLEFLIGHT_SLOTS bytes.
+Record locks belong to the process, not the thread, so a thread-level
+lock per slot sits in front of the file lock: two threads whose keys land
+on the same slot take turns instead of both "holding" it. A process that
+had to wait for the slot calls ``recheck()`` once it gets the slot. If
+that returns something (a bank question or a cached evaluation written
+by the other process), that result is used instead of calling the model
+again.
+"""
+
+import hashlib
+import os
+import threading
+import time
+
+from django.conf import settings
+
+from . import metrics
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows: process-local coalescing only
+    fcntl = None
+
+POLL_INTERVAL = 0.05
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+_calls = {}
+_lock = threading.Lock()
+
+_lock_fd = None
+_lock_fd_lock = threading.Lock()
+
+# slot -> threading.Lock guarding this process's use of that slot
+_slot_locks = {}
+
+_counts = {"calls": 0, "coalesced": 0, "rechecked": 0}
+
+
+def stats():
+    with _lock:
+        return dict(_counts, in_flight=len(_calls))
+
+
+@metrics.collector
+def _singleflight_metrics():
+    counts = stats()
+    return [
+        ("interview_singleflight_calls_total", "counter", "Calls through single-flight.", [
+            ({}, counts["calls"]),
+        ]),
+        ("interview_singleflight_shared_total", "counter", "Calls served by another caller's result.", [
+            ({"via": "coalesced"}, counts["coalesced"]),
+            ({"via": "recheck"}, counts["rechecked"]),
+        ]),
+    ]
+
+
+def _lock_table():
+    """One descriptor per process; closing any descriptor would drop all our record locks."""
+    global _lock_fd
+    if _lock_fd is None:
+        with _lock_fd_lock:
+            if _lock_fd is None:
+                path = str(settings.SINGLEFLIGHT_LOCK_FILE)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                _lock_fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    return _lock_fd
+
+
+def _slot(key):
+    digest = hashlib.sha1(key.encode("utf-8")).digest()
+    return int.from_bytes(digest[:4], "big") % settings.SINGLEFLIGHT_SLOTS
+
+
+def _slot_lock(slot):
+    with _lock:
+        lock = _slot_locks.get(slot)
+        if lock is None:
+            lock = _slot_locks[slot] = threading.Lock()
+        return lock
+
+
+def _run_with_slot(key, fn, recheck):
+    if fcntl is None or not settings.SINGLEFLIGHT_LOCK_FILE:
+        return fn()
+
+    fd = _lock_table()
+    slot = _slot(key)
+    thread_lock = _slot_lock(slot)
+    deadline = time.monotonic() + settings.SINGLEFLIGHT_MAX_WAIT
+
+    # Another thread here holds the slot for a different key with the same hash
+    waited = not thread_lock.acquire(blocking=False)
+    if waited and not thread_lock.acquire(timeout=settings.SINGLEFLIGHT_MAX_WAIT):
+        return fn()
+
+    try:
+        while True:
+            try:
+                fcntl.lockf(fd, fcntl.LOCK_EX | fcntl.LOCK_NB, 1, slot)
+                break
+            except OSError:
+                if time.monotonic() >= deadline:
+                    # The other process is stuck; don't let it block us forever
+                    return fn()
+                waited = True
+                time.sleep(POLL_INTERVAL)
+
+        try:
+            if waited and recheck is not None:
+                result = recheck()
+                if result is not None:
+                    with _lock:
+                        _counts["rechecked"] += 1
+                    return result
+            return fn()
+        finally:
+            fcntl.lockf(fd, fcntl.LOCK_UN, 1, slot)
+    finally:
+        thread_lock.release()
+
+
+def do(key, fn, recheck=None):
+    """Return ``fn()``, sharing one execution among concurrent callers with the same ``key``."""
+    with _lock:
+        _counts["calls"] += 1
+        call = _calls.get(key)
+        if call is not None:
+            _counts["coalesced"] += 1
+            leader = False
+        else:
+            call = _calls[key] = _Call()
+            leader = True
+
+    if not leader:
+        call.done.wait()
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    try:
+        call.result = _run_with_slot(key, fn, recheck)
+        return call.result
+    except Exception as e:
+        call.error = e
+        raise
+    finally:
+        with _lock:
+            del _calls[key]
+        call.done.set()
@@ -0,0 +1,88 @@
+import json
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+
+_DONE = object()
+
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+async def iterate_sync(iterable):
+    """
+    Async iterator over a sync ``iterable`` that may block or read the
+    database. Each step runs through sync_to_async, which under ASGI is the
+    request's own sync thread, so server-side cursors stay on one
+    connection and the event loop is never blocked.
+    """
+    iterator = iter(iterable)
+    step = sync_to_async(next)
+    try:
+        while True:
+            item = await step(iterator, _DONE)
+            if item is _DONE:
+                return
+            yield item
+    finally:
+        close = getattr(iterator, "close", None)
+        if close is not None:
+            await sync_to_async(close)()
+
+
+def streaming_response(request, content, content_type):
+    """
+    StreamingHttpResponse that streams on whichever server handles
+    ``request``. Under ASGI (see interview/asgi.py) Django buffers sync
+    iterators, so they are wrapped with iterate_sync there; under WSGI they
+    are passed through unchanged.
+    """
+    # DRF requests wrap the HttpRequest the handler built
+    if isinstance(getattr(request, "_request", request), ASGIRequest) and not hasattr(content, "__aiter__"):
+        content = iterate_sync(content)
+    return StreamingHttpResponse(content, content_type=content_type)
+
+
+class _ClosingEvents:
+    """
+    Async iterator over ``events`` that calls ``on_close`` once, when the
+    events run out or fail, or when the response is closed. Django calls
+    close() on the content even if the client went away before the first
+    event was read.
+    """
+
+    def __init__(self, events, on_close):
+        self._events = aiter(events)
+        self._on_close = on_close
+        self._closed = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return await anext(self._events)
+        except BaseException:
+            self.close()
+            raise
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            self._on_close()
+
+
+def sse_response(events, on_close=None):
+    """
+    Stream the async iterator ``events`` as server-sent events.
+    ``on_close`` runs when the stream ends, even if the client went away
+    before ``events`` was ever iterated.
+    """
+    if on_close is not None:
+        events = _ClosingEvents(events, on_close)
+    response = StreamingHttpResponse(events, content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # keep nginx from buffering the stream
+    return response
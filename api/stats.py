@@ -0,0 +1,129 @@
+"""
+Per-user dashboard rollups.
+
+record_result() updates UserStats and the skill/day/session buckets each
+time an InterviewResult is saved. The dashboard then only reads these
+small rollup rows and never scans the user's raw results.
+"""
+
+from django.db import transaction
+from django.db.models import Avg, Count, ExpressionWrapper, F, FloatField, Q
+from django.db.models.functions import Greatest, Least
+from django.utils import timezone
+
+from .models import InterviewResult, Question, UserStatBucket, UserStats, question_text_hash
+from .utils import normalize
+
+TREND_DAYS = 30
+SESSIONS_SHOWN = 3
+
+
+def skill_for_question(text):
+    """Skill of the bank question with this text, or "" for ad-hoc questions."""
+    return (
+        Question.objects.filter(text_hash=question_text_hash(text))
+        .values_list("skill", flat=True)
+        .first()
+    ) or ""
+
+
+def record_result(result, skill=None):
+    """
+    Add ``result`` to the user's rollups with one insert-if-missing and one
+    F() update per table. Missing rows are inserted empty with
+    ON CONFLICT DO NOTHING first, so concurrent writers never lose a count.
+
+    Bank questions are counted under their own skill; ``skill`` is only
+    used for ad-hoc questions.
+    """
+    if not result.user_id:
+        return
+
+    if result.bank_question_id:
+        skill = result.bank_question.skill
+    elif skill is None:
+        skill = skill_for_question(result.question)
+    else:
+        skill = normalize(skill)
+
+    user_id = result.user_id
+    score = result.score
+    at = result.created_at or timezone.now()
+
+    keys = [
+        (UserStatBucket.KIND_SKILL, skill or "general"),
+        (UserStatBucket.KIND_DAY, at.date().isoformat()),
+        (UserStatBucket.KIND_SESSION, result.session_id),
+    ]
+    matching = Q()
+    for kind, key in keys:
+        matching |= Q(kind=kind, key=key)
+
+    with transaction.atomic():
+        UserStats.objects.bulk_create(
+            [UserStats(user_id=user_id, best_score=score, worst_score=score)], ignore_conflicts=True
+        )
+        UserStats.objects.filter(user_id=user_id).update(
+            total_attempts=F("total_attempts") + 1,
+            total_score=F("total_score") + score,
+            best_score=Greatest(F("best_score"), score),
+            worst_score=Least(F("worst_score"), score),
+        )
+
+        UserStatBucket.objects.bulk_create(
+            [UserStatBucket(user_id=user_id, kind=kind, key=key, first_at=at) for kind, key in keys],
+            ignore_conflicts=True,
+        )
+        UserStatBucket.objects.filter(matching, user_id=user_id).update(
+            attempts=F("attempts") + 1,
+            total_score=F("total_score") + score,
+            last_at=at,
+        )
+
+
+def _average(total, attempts):
+    return round(total / attempts, 1) if attempts else 0
+
+
+def _bucket_rows(qs, label):
+    return [
+        {label: b.key, "attempts": b.attempts, "average_score": _average(b.total_score, b.attempts)}
+        for b in qs
+    ]
+
+
+def dashboard_payload(user):
+    stats = UserStats.objects.filter(user=user).first()
+
+    if stats is None:
+        # No rollup yet: one combined aggregate instead of separate count/avg queries
+        agg = InterviewResult.objects.filter(user=user).aggregate(total=Count("id"), avg=Avg("score"))
+        return {
+            "total_attempts": agg["total"],
+            "average_score": round(agg["avg"] or 0, 1),
+            "best_score": None,
+            "worst_score": None,
+            "skills": [],
+            "trend": [],
+            "best_sessions": [],
+            "worst_sessions": [],
+        }
+
+    buckets = UserStatBucket.objects.filter(user=user)
+    sessions = buckets.filter(kind=UserStatBucket.KIND_SESSION).annotate(
+        avg=ExpressionWrapper(F("total_score") * 1.0 / F("attempts"), output_field=FloatField())
+    )
+
+    trend = list(buckets.filter(kind=UserStatBucket.KIND_DAY).order_by("-key")[:TREND_DAYS])
+    trend.reverse()
+
+    return {
+        "total_attempts": stats.total_attempts,
+        "average_score": _average(stats.total_score, stats.total_attempts),
+        "best_score": stats.best_score,
+        "worst_score": stats.worst_score,
+        "skills": _bucket_rows(buckets.filter(kind=UserStatBucket.KIND_SKILL).order_by("key"), "skill"),
+        "trend": _bucket_rows(trend, "date"),
+        "best_sessions": _bucket_rows(sessions.order_by("-avg", "-last_at")[:SESSIONS_SHOWN], "session_id"),
+        "worst_sessions": _bucket_rows(sessions.order_by("avg", "-last_at")[:SESSIONS_SHOWN], "session_id"),
+    }
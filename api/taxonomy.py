@@ -0,0 +1,104 @@
+"""
+Role/skill taxonomy: the Role and Skill tables plus a versioned cache for
+the dropdown endpoints.
+
+Adding or removing a role or skill bumps a version number kept in the
+Django cache. Processes keep their built lists in memory and only rebuild
+them when that version changes, or at the latest after TAXONOMY_CACHE_TTL
+seconds in case the cache backend isn't shared between processes. The
+version also doubles as the ETag. Question counts change with every bank
+write, so they don't bump it and may lag by up to TAXONOMY_CACHE_TTL.
+"""
+
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+
+from .models import Role, Skill
+
+VERSION_KEY = "taxonomy:version"
+
+MODELS = {"roles": Role, "skills": Skill}
+
+_local = {}
+_lock = threading.Lock()
+
+
+def current_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # Start from the clock so a restarted cache never reuses an old ETag
+        cache.add(VERSION_KEY, int(time.time() * 1000), None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def bump_version():
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, int(time.time() * 1000), None)
+    with _lock:
+        _local.clear()
+
+
+def get_taxonomy(kind, defaults):
+    """Return ``(version, [(name, question_count), ...])`` sorted by name."""
+    version = current_version()
+    now = time.monotonic()
+
+    entry = _local.get(kind)
+    if entry and entry[0] == version and entry[1] > now:
+        return version, entry[2]
+
+    counts = {name: 0 for name in defaults}
+    counts.update(MODELS[kind].objects.values_list("name", "question_count"))
+    rows = sorted(counts.items())
+
+    with _lock:
+        _local[kind] = (version, now + settings.TAXONOMY_CACHE_TTL, rows)
+    return version, rows
+
+
+def register(roles, skills):
+    """Insert any roles/skills not stored yet. Returns True if anything was added."""
+    roles = set(roles)
+    skills = set(skills)
+
+    new_roles = roles - set(Role.objects.filter(name__in=roles).values_list("name", flat=True))
+    new_skills = skills - set(Skill.objects.filter(name__in=skills).values_list("name", flat=True))
+
+    if not new_roles and not new_skills:
+        return False
+
+    with transaction.atomic():
+        Role.objects.bulk_create([Role(name=n) for n in sorted(new_roles)], ignore_conflicts=True)
+        Skill.objects.bulk_create([Skill(name=n) for n in sorted(new_skills)], ignore_conflicts=True)
+
+    bump_version()
+    return True
+
+
+def add_question_counts(pairs, sign=1):
+    """Adjust question_count for ``(role, skill)`` pairs of added (or removed) bank questions."""
+    role_counts = Counter(role for role, _ in pairs if role)
+    skill_counts = Counter(skill for _, skill in pairs if skill)
+
+    if not role_counts and not skill_counts:
+        return
+
+    with transaction.atomic():
+        if sign > 0:
+            # Only a new role/skill changes the lists enough to need a new ETag
+            register(role_counts, skill_counts)
+
+        for name, n in role_counts.items():
+            Role.objects.filter(name=name).update(question_count=Greatest(F("question_count") + sign * n, 0))
+        for name, n in skill_counts.items():
+            Skill.objects.filter(name=name).update(question_count=Greatest(F("question_count") + sign * n, 0))
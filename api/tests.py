@@ -1,3 +1,1166 @@
-from django.test import TestCase
+import io
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+import zipfile
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+import httpx
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from docx import Document
+from docx.enum.text import WD_BREAK
+from rest_framework.test import APIClient
+
+from . import llm, metrics, prewarm, resume, similarity, singleflight, views
+from .archive import archive_sessions, stale_sessions
+from .cache import EvaluationCache, FileBackend, LocMemBackend, get_evaluation_cache
+from .evaluation import EVALUATION_SCHEMA, EvaluationError, run_evaluation, save_evaluation
+from .extract import extract_text
+from .jobs import process_job, run_pending_jobs, stream_job_events
+from .llmjson import JSONExtractError, JSONExtractor, extract_json
+from .models import ArchivedSession, EvaluationJob, Question, InterviewResult, QuestionDemand, ResumeAnalysis, Role, SessionPlan, Skill, TextBlob, UserProfile, UserStatBucket
+from .questions import build_question_prompt, pick_random_question, save_question_if_new
+from .resume import RESUME_SCHEMA, ResumeError, extract_upload
+from .serializers import UserProfileSerializer
+from .stats import record_result
+
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), "testdata", "llm_json_corpus.json")
+SCHEMAS = {"evaluate": EVALUATION_SCHEMA, "resume": RESUME_SCHEMA}
+
+
+class QueryPlanAssertions:
+    """assertUsesIndex() for TestCases that check the query plans of captured queries."""
+
+    def assertUsesIndex(self, queries, table):
+        if connection.vendor != "sqlite":
+            self.skipTest("query plan assertions are written for SQLite")
+
+        checked = 0
+        for query in queries:
+            sql = query["sql"]
+            if f'"{table}"' not in sql or not sql.lstrip().upper().startswith("SELECT"):
+                continue
+
+            with connection.cursor() as cursor:
+                cursor.execute("EXPLAIN QUERY PLAN " + sql)
+                details = [row[-1] for row in cursor.fetchall()]
+
+            for detail in details:
+                if detail.startswith(f"SCAN {table}"):
+                    self.fail(f"Full scan of {table}:\n{sql}\n{details}")
+            checked += 1
+
+        self.assertGreater(checked, 0, f"no queries against {table} were captured")
+
+
+# Background pre-generation would write to the test database from another thread
+@override_settings(QUESTION_PREWARM_WORKERS=0)
+class BankTestCase(QueryPlanAssertions, TestCase):
+    """20 bank questions and 20 results for one user across sessions s0-s3."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="planner", password="x")
+        for i in range(20):
+            Question.objects.create(
+                text=f"Question {i}",
+                role="backend developer",
+                skill="python" if i % 2 else "django",
+                level="easy",
+            )
+            InterviewResult.objects.create(
+                user=cls.user,
+                session_id=f"s{i % 4}",
+                question=f"Question {i}",
+                answer="answer",
+                score=i % 10,
+                strengths="",
+                weaknesses="",
+                improved_answer="",
+            )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+
+class QueryPlanTests(BankTestCase):
+    """
+    Regression guard for the hot-path indexes: every query these endpoints
+    run against the given table must be an index search, never a full scan.
+    """
+
+    def test_get_question_uses_index(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get("/api/get_question/", {
+                "role": "backend developer",
+                "skill": "python",
+                "level": "easy",
+                "session_id": "s1",
+            })
+        self.assertEqual(response.status_code, 200)
+        self.assertUsesIndex(ctx.captured_queries, "api_question")
+        self.assertUsesIndex(ctx.captured_queries, "api_interviewresult")
+
+    def test_duplicate_check_uses_index(self):
+        with CaptureQueriesContext(connection) as ctx:
+            save_question_if_new("  QUESTION 3 ", "backend developer", "python", "easy")
+        self.assertUsesIndex(ctx.captured_queries, "api_question")
+        self.assertEqual(Question.objects.count(), 20)
+
+    def test_dashboard_uses_index(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get("/api/dashboard/")
+        self.assertEqual(response.status_code, 200)
+        self.assertUsesIndex(ctx.captured_queries, "api_interviewresult")
+
+    def test_dashboard_rollup_uses_index(self):
+        for result in InterviewResult.objects.all():
+            record_result(result)
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get("/api/dashboard/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["total_attempts"], 20)
+        self.assertEqual(len(response.data["best_sessions"]), 3)
+        self.assertUsesIndex(ctx.captured_queries, "api_userstatbucket")
+
+    def test_session_questions_uses_index(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get("/api/session/questions/", {"session_id": "s2"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 5)
+        self.assertUsesIndex(ctx.captured_queries, "api_interviewresult")
+
+
+class SessionPlanTests(BankTestCase):
+    def test_session_start_reserves_distinct_questions(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post("/api/session/start/", {
+                "role": "backend developer",
+                "skill": "python",
+                "level": "easy",
+                "session_id": "plan-1",
+                "count": 4,
+            })
+        self.assertEqual(response.status_code, 200)
+        ids = [q["id"] for q in response.data["questions"]]
+        self.assertEqual(len(set(ids)), 4)
+        self.assertEqual([q["position"] for q in response.data["questions"]], [1, 2, 3, 4])
+        self.assertUsesIndex(ctx.captured_queries, "api_question")
+
+        # Starting the same session again returns the stored plan
+        again = self.client.post("/api/session/start/", {"session_id": "plan-1", "count": 2})
+        self.assertEqual([q["id"] for q in again.data["questions"]], ids)
+        self.assertEqual(SessionPlan.objects.count(), 1)
+
+        InterviewResult.objects.create(
+            user=self.user,
+            session_id="plan-1",
+            question="",
+            answer="answer",
+            score=5,
+            strengths="",
+            weaknesses="",
+            improved_answer="",
+            bank_question_id=ids[2],
+        )
+        with CaptureQueriesContext(connection) as ctx:
+            review = self.client.get("/api/session/questions/", {"session_id": "plan-1"})
+        self.assertEqual(review.data[0]["question_id"], ids[2])
+        self.assertEqual(review.data[0]["position"], 3)
+        self.assertEqual(review.data[0]["question"], response.data["questions"][2]["text"])
+        self.assertUsesIndex(ctx.captured_queries, "api_sessionplanitem")
+
+
+class ResultTextTests(BankTestCase):
+    def test_results_reference_bank_text(self):
+        data = {"score": 6, "strengths": "", "weaknesses": "", "improved_answer": "The full answer."}
+        first = save_evaluation(self.user, "refs", "Question 3", "a", data)
+        second = save_evaluation(self.user, "refs", "Question 5", "b", data)
+        adhoc = save_evaluation(self.user, "refs", "Something off-bank", "c", data)
+
+        self.assertEqual((first.question, first.bank_question.text), ("", "Question 3"))
+        self.assertEqual(adhoc.question, "Something off-bank")
+        self.assertEqual(first.improved_answer_blob_id, second.improved_answer_blob_id)
+        self.assertEqual(TextBlob.objects.count(), 1)
+
+        with CaptureQueriesContext(connection) as ctx:
+            review = self.client.get("/api/session/questions/", {"session_id": "refs"})
+        self.assertEqual([r["question"] for r in review.data], ["Question 3", "Question 5", "Something off-bank"])
+        self.assertEqual(review.data[0]["improved_answer"], "The full answer.")
+        # Results plus the (empty) archive lookup
+        self.assertEqual(len(ctx.captured_queries), 2)
+
+        # Deleting the bank question hands the text back to its results
+        first.bank_question.delete()
+        first.refresh_from_db()
+        self.assertEqual((first.question, first.bank_question_id), ("Question 3", None))
+
+
+class ArchiveTests(BankTestCase):
+    def test_archived_sessions_stay_reviewable(self):
+        data = {"score": 4, "strengths": "s", "weaknesses": "w", "improved_answer": "Archived answer."}
+        for text in ("Question 1", "Question 2", "Ad-hoc question"):
+            save_evaluation(self.user, "old", text, "answer", data)
+        InterviewResult.objects.filter(session_id="old").update(created_at=timezone.now() - timedelta(days=400))
+
+        before = self.client.get("/api/session/questions/", {"session_id": "old"}).data
+        dashboard = self.client.get("/api/dashboard/").data
+
+        call_command("archive_results", "--days", "365", stdout=io.StringIO())
+
+        self.assertFalse(InterviewResult.objects.filter(session_id="old").exists())
+        self.assertEqual(ArchivedSession.objects.get(session_id="old").result_count, 3)
+        self.assertFalse(TextBlob.objects.exists())
+        # Recent sessions stay in the hot table
+        self.assertEqual(InterviewResult.objects.count(), 20)
+
+        with CaptureQueriesContext(connection) as ctx:
+            after = self.client.get("/api/session/questions/", {"session_id": "old"}).data
+        self.assertEqual(after, before)
+        self.assertUsesIndex(ctx.captured_queries, "api_archivedsession")
+        self.assertEqual(self.client.get("/api/dashboard/").data, dashboard)
+
+    def test_session_written_after_listing_is_not_archived(self):
+        data = {"score": 4, "strengths": "s", "weaknesses": "w", "improved_answer": "Old answer."}
+        save_evaluation(self.user, "revived", "Question 1", "answer", data)
+        InterviewResult.objects.filter(session_id="revived").update(created_at=timezone.now() - timedelta(days=400))
+
+        cutoff = timezone.now() - timedelta(days=365)
+        batch = stale_sessions(cutoff)
+        self.assertEqual(batch, ["revived"])
+
+        # The user comes back to the session before the batch is archived
+        save_evaluation(self.user, "revived", "Question 2", "answer", data)
+
+        self.assertEqual(archive_sessions(batch, "gzip", cutoff)[:2], (0, 0))
+        self.assertEqual(InterviewResult.objects.filter(session_id="revived").count(), 2)
+        self.assertFalse(ArchivedSession.objects.exists())
+
+    def test_answer_shared_with_a_recent_result_is_kept(self):
+        data = {"score": 4, "strengths": "s", "weaknesses": "w", "improved_answer": "Shared answer."}
+        save_evaluation(self.user, "old", "Question 1", "answer", data)
+        InterviewResult.objects.filter(session_id="old").update(created_at=timezone.now() - timedelta(days=400))
+        recent = save_evaluation(self.user, "recent", "Question 1", "answer", data)
+
+        self.assertEqual(archive_sessions(["old"], "gzip")[:2], (1, 1))
+
+        recent.refresh_from_db()
+        self.assertEqual(recent.improved_answer_blob.text, "Shared answer.")
+        self.assertEqual(TextBlob.objects.count(), 1)
+
+
+class RandomPickTests(QueryPlanAssertions, TestCase):
+    def setUp(self):
+        questions = [Question.objects.create(text=f"Pick {i}", role="r", skill="s", level="easy") for i in range(40)]
+        # Leave three rows, the last one after a wide gap in the ids
+        Question.objects.filter(id__in=[q.id for q in questions[2:-1]]).delete()
+        self.qs = Question.objects.filter(role="r", skill="s", level="easy")
+
+    def test_pick_reaches_every_row(self):
+        counts = {q.id: 0 for q in self.qs}
+        with mock.patch("api.questions.random", random.Random(7)):
+            for _ in range(300):
+                counts[pick_random_question(self.qs).id] += 1
+
+        self.assertTrue(all(counts.values()), counts)
+        self.assertIsNone(pick_random_question(self.qs.filter(level="hard")))
+
+    def test_pick_is_a_fixed_number_of_index_lookups(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("query plan assertions are written for SQLite")
+
+        with CaptureQueriesContext(connection) as ctx:
+            pick_random_question(self.qs)
+
+        sqls = [q["sql"] for q in ctx.captured_queries]
+        self.assertEqual(len(sqls), 3)
+        for sql in sqls:
+            self.assertNotIn("COUNT(", sql.upper())
+            self.assertNotIn("OFFSET", sql.upper())
+            self.assertTrue(sql.rstrip().endswith("LIMIT 1"), sql)
+            with connection.cursor() as cursor:
+                cursor.execute("EXPLAIN QUERY PLAN " + sql)
+                plan = " ".join(row[-1] for row in cursor.fetchall())
+            self.assertNotIn("TEMP B-TREE", plan)
+        self.assertUsesIndex(ctx.captured_queries, "api_question")
+
+
+class StatsRollupTests(TestCase):
+    def test_rollups_are_upserted(self):
+        user = User.objects.create_user(username="rollup", password="x")
+        day = timezone.now()
+        results = [
+            InterviewResult.objects.create(user=user, session_id=session, question="Q", answer="A", score=score)
+            for session, score in [("a", 4), ("a", 8), ("b", 6)]
+        ]
+
+        for result in results:
+            with CaptureQueriesContext(connection) as ctx:
+                record_result(result, "python")
+            writes = [q["sql"] for q in ctx.captured_queries if not q["sql"].startswith(("SAVEPOINT", "RELEASE"))]
+            self.assertEqual(len(writes), 4, writes)
+
+        stats = user.interview_stats
+        self.assertEqual((stats.total_attempts, stats.total_score), (3, 18))
+        self.assertEqual((stats.best_score, stats.worst_score), (8, 4))
+
+        buckets = {(b.kind, b.key): (b.attempts, b.total_score) for b in UserStatBucket.objects.filter(user=user)}
+        self.assertEqual(buckets, {
+            ("skill", "python"): (3, 18),
+            ("day", day.date().isoformat()): (3, 18),
+            ("session", "a"): (2, 12),
+            ("session", "b"): (1, 6),
+        })
+
+    def test_bank_skill_wins_and_client_skill_is_normalized(self):
+        user = User.objects.create_user(username="skills", password="x")
+        question = Question.objects.create(text="What is a goroutine?", role="backend developer", skill="go", level="easy")
+
+        save_evaluation(user, "s", "", "A", {"score": 5}, skill="Python", bank_question=question)
+        save_evaluation(user, "s", "Tell me about yourself", "A", {"score": 3}, skill="  Python ")
+
+        skills = UserStatBucket.objects.filter(user=user, kind=UserStatBucket.KIND_SKILL)
+        self.assertEqual(dict(skills.values_list("key", "attempts")), {"go": 1, "python": 1})
+
+
+@override_settings(QUESTION_PREWARM_WORKERS=1, QUESTION_STOCK_CHECK_INTERVAL=60, QUESTION_DEMAND_FLUSH_INTERVAL=60)
+class QuestionDemandTests(TestCase):
+    def setUp(self):
+        for name, value in [("_demand", {}), ("_checked", {}), ("_pending", set()), ("_last_flush", time.monotonic())]:
+            mock.patch.object(prewarm, name, value).start()
+        self.executor = mock.patch.object(prewarm, "_get_executor").start().return_value
+        self.addCleanup(mock.patch.stopall)
+
+    def test_requests_are_counted_in_memory_and_flushed_in_batches(self):
+        with self.assertNumQueries(0):
+            for _ in range(5):
+                prewarm.note_request("backend developer", "python", "hard")
+            prewarm.note_request("backend developer", "django", "hard")
+
+        # One stock check per combination, no flush before the interval
+        self.assertEqual(self.executor.submit.call_count, 2)
+
+        self.assertEqual(prewarm.flush_demand(), 2)
+        prewarm.note_request("backend developer", "python", "hard")
+        prewarm.flush_demand()
+
+        demand = dict(QuestionDemand.objects.values_list("skill", "requests"))
+        self.assertEqual(demand, {"python": 6, "django": 1})
+        self.assertEqual(prewarm.flush_demand(), 0)
+
+    def test_flush_is_queued_once_the_interval_passes(self):
+        prewarm._last_flush -= 61
+        prewarm.note_request("backend developer", "python", "hard")
+        prewarm.note_request("backend developer", "python", "hard")
+        queued = [c.args[0] for c in self.executor.submit.call_args_list]
+        self.assertEqual(queued.count(prewarm._flush), 1)
+
+
+class TaxonomyCacheTests(TestCase):
+    def test_unchanged_list_is_not_modified(self):
+        client = APIClient()
+        first = client.get("/api/roles/")
+        self.assertEqual(first.status_code, 200)
+
+        again = client.get("/api/roles/", HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again["ETag"], first["ETag"])
+
+    def test_question_write_invalidates_the_lists(self):
+        client = APIClient()
+        roles = client.get("/api/roles/", {"counts": 1})
+        skills = client.get("/api/skills/", {"counts": 1})
+
+        Question.objects.create(text="What is a monad?", role="functional programmer", skill="haskell", level="hard")
+
+        response = client.get("/api/roles/", {"counts": 1}, HTTP_IF_NONE_MATCH=roles["ETag"])
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], roles["ETag"])
+        self.assertIn({"name": "functional programmer", "question_count": 1}, response.json())
+
+        response = client.get("/api/skills/", {"counts": 1}, HTTP_IF_NONE_MATCH=skills["ETag"])
+        self.assertEqual(response.status_code, 200)
+        self.assertIn({"name": "haskell", "question_count": 1}, response.json())
+
+    def test_saving_names_takes_the_same_queries_for_any_batch_size(self):
+        for name in ("backend developer", "data analyst"):
+            Role.objects.create(name=name)
+        Skill.objects.create(name="python")
+
+        def queries(size):
+            roles = ["Backend Developer", "data analyst"] + [f"role {size}-{i}" for i in range(size)]
+            skills = ["python"] + [f"skill {size}-{i}" for i in range(size)]
+            with mock.patch.object(views, "_known_roles", set()), mock.patch.object(views, "_known_skills", set()):
+                with CaptureQueriesContext(connection) as ctx:
+                    views.save_roles_and_skills(roles, skills)
+            return len(ctx.captured_queries)
+
+        self.assertEqual(queries(2), queries(20))
+        self.assertEqual(Role.objects.count(), 2 + 2 + 20)
+        self.assertEqual(Skill.objects.count(), 1 + 2 + 20)
+
+    def test_question_with_known_names_keeps_the_etag(self):
+        Question.objects.create(text="What is a monad?", role="functional programmer", skill="haskell", level="hard")
+        client = APIClient()
+        roles = client.get("/api/roles/")
+
+        with CaptureQueriesContext(connection) as ctx:
+            Question.objects.create(text="What is a functor?", role="functional programmer", skill="haskell", level="hard")
+        self.assertFalse([q for q in ctx.captured_queries if "INSERT" in q["sql"] and "api_role" in q["sql"]])
+
+        self.assertEqual(client.get("/api/roles/", HTTP_IF_NONE_MATCH=roles["ETag"]).status_code, 304)
+
+
+class SimilarityIndexTests(TestCase):
+    COMBINATION = ("backend developer", "python", "easy")
+
+    def setUp(self):
+        mock.patch.object(similarity, "_index", None).start()
+        self.addCleanup(mock.patch.stopall)
+
+    def _question(self, text, skill="python"):
+        return Question.objects.create(text=text, role="backend developer", skill=skill, level="easy")
+
+    def _nearest_id(self, index, text, skill="python"):
+        hit = index.nearest(text, "backend developer", skill, "easy")
+        return hit[0] if hit and hit[1] >= 0.99 else None
+
+    def test_new_questions_are_added_without_a_rebuild(self):
+        index = similarity.QuestionIndex()
+        self._question("How does the Python garbage collector handle reference cycles?")
+        index.sync()
+
+        added = self._question("What does the GIL protect in CPython?")
+        self.assertEqual(index.sync(), 1)
+        self.assertEqual(len(index), 2)
+        self.assertEqual(self._nearest_id(index, added.text), added.id)
+
+    def test_deleted_question_is_forgotten_by_every_index(self):
+        question = self._question("How does the Python garbage collector handle reference cycles?")
+        indexes = [similarity.QuestionIndex(), similarity.QuestionIndex()]
+        for index in indexes:
+            self.assertEqual(self._nearest_id(index, question.text), question.id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            question.delete()
+
+        for index in indexes:
+            self.assertIsNone(self._nearest_id(index, question.text))
+
+    def test_edited_question_is_reindexed(self):
+        question = self._question("How does the Python garbage collector handle reference cycles?")
+        index = similarity.QuestionIndex()
+        index.sync()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            question.text = "How do goroutines communicate over channels?"
+            question.skill = "go"
+            question.save()
+
+        self.assertIsNone(index.nearest("Python garbage collector reference cycles", *self.COMBINATION))
+        self.assertEqual(self._nearest_id(index, question.text, skill="go"), question.id)
+
+    @override_settings(QUESTION_INDEX_MAX_AGE=0)
+    def test_index_is_rebuilt_after_max_age_without_a_version_bump(self):
+        question = self._question("How does the Python garbage collector handle reference cycles?")
+        index = similarity.QuestionIndex()
+        index.sync()
+
+        # Deleted in another process whose version bump this one never saw
+        with mock.patch.object(similarity, "bump_version"), self.captureOnCommitCallbacks(execute=True):
+            question.delete()
+        self.assertIsNone(self._nearest_id(index, question.text))
+
+    def test_pick_unlike_skips_questions_like_the_asked_ones(self):
+        asked = self._question("How does the Python garbage collector handle reference cycles?")
+        others = {
+            self._question("What does the GIL protect in CPython?").id,
+            self._question("When would you reach for asyncio over threads?").id,
+        }
+
+        picks = {similarity.pick_unlike([asked.text], *self.COMBINATION) for _ in range(30)}
+        self.assertEqual(picks, others)
+        texts = Question.objects.values_list("text", flat=True)
+        self.assertIsNone(similarity.pick_unlike(list(texts), *self.COMBINATION))
+
+
+class QuestionImportTests(TestCase):
+    def setUp(self):
+        # Rolled-back tests leave the process-wide index ahead of reused ids
+        mock.patch.object(similarity, "_index", None).start()
+        self.addCleanup(mock.patch.stopall)
+        Question.objects.create(text="Explain how a Python decorator wraps a function.", role="backend developer",
+                                skill="python", level="medium")
+
+    def _import(self, name, content):
+        return APIClient().post("/api/admin/import-questions/", {"file": SimpleUploadedFile(name, content)})
+
+    def test_csv_rows_are_inserted_once(self):
+        content = (
+            "text,role,skill,level\n"
+            "What is a generator?,Backend Developer,Python,Easy\n"
+            "what is a generator? ,backend developer,python,easy\n"
+            "Explain how Python decorators wrap a function.,backend developer,python,medium\n"
+            ",backend developer,python,easy\n"
+        ).encode()
+        response = self._import("bank.csv", content)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data | {"errors": []}, {
+            "total": 4, "inserted": 1, "duplicates": 2, "invalid": 1, "errors": [],
+        })
+        self.assertTrue(Question.objects.filter(text="What is a generator?", role="backend developer").exists())
+
+    def test_jsonl_bad_rows_are_reported(self):
+        lines = [
+            {"text": "What is a context manager?", "skill": "python"},
+            {"text": "Explain a Python decorator, how does it wrap a function?", "role": "backend developer",
+             "skill": "python", "level": "medium"},
+            {"text": "What is a closure?", "role": ["backend"]},
+            {"text": 42},
+            ["not", "an", "object"],
+        ]
+        content = "\n".join(json.dumps(line) for line in lines) + "\n{broken\n"
+        response = self._import("bank.jsonl", content.encode())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["inserted"], 1)
+        self.assertEqual(response.data["invalid"], 4)
+        self.assertEqual([e["line"] for e in response.data["errors"]], [3, 4, 5, 6])
+
+    def test_invalid_utf8_is_rejected_before_importing(self):
+        content = b"text\nWhat is a generator?\n" + b"caf\xe9\n"
+        response = self._import("bank.csv", content)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Question.objects.count(), 1)
+
+
+class KeysetListTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(5):
+            Question.objects.create(text=f"Listed {i}", role="tester", skill="qa", level="easy")
+        for i in range(3):
+            user = User.objects.create_user(username=f"listed{i}", email=f"listed{i}@example.com")
+            UserProfile.objects.create(user=user, full_name=f"Listed {i}", mobile="555", role="student")
+        UserProfile.objects.create(full_name="No account", mobile="555")
+
+    def test_cursor_walks_every_row_once(self):
+        client = APIClient()
+        seen = []
+        params = {"limit": 2, "fields": "text"}
+        while True:
+            response = client.get("/api/admin/list-questions/", params, HTTP_ORIGIN="https://app.example.com")
+            self.assertEqual(response.status_code, 200)
+            self.assertIn("X-Next-Cursor", response["Access-Control-Expose-Headers"])
+            seen += response.json()
+            if "X-Next-Cursor" not in response:
+                break
+            params["cursor"] = response["X-Next-Cursor"]
+
+        self.assertEqual([row["text"] for row in seen], [f"Listed {i}" for i in range(5)])
+        self.assertEqual(set(seen[0]), {"id", "text"})
+
+    def test_invalid_cursor_is_rejected(self):
+        response = APIClient().get("/api/admin/list-questions/", {"cursor": "abc"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_users_keep_the_serializer_shape(self):
+        rows = APIClient().get("/api/admin/list-users/").json()
+        expected = UserProfileSerializer(UserProfile.objects.filter(user__isnull=False).order_by("id"), many=True).data
+        self.assertEqual(rows[:3], [dict(row) for row in expected])
+        # The serializer left email out for profiles without an account
+        self.assertIsNone(rows[3]["email"])
+
+
+@override_settings(LLM_BACKEND="mock", EVALUATION_WORKERS=0, QUESTION_PREWARM_WORKERS=0)
+class EvaluationJobTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="queued", password="x")
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def enqueue(self, answer="An answer"):
+        response = self.client.post("/api/evaluate/", {
+            "question": "What is a closure?", "answer": answer, "session_id": "jobs", "async": "true",
+        })
+        self.assertEqual(response.status_code, 202)
+        return response.data["job_id"]
+
+    def test_job_runs_to_done(self):
+        job_id = self.enqueue()
+        self.assertEqual(self.client.get(f"/api/evaluate/jobs/{job_id}/").data["status"], "pending")
+
+        self.assertEqual(run_pending_jobs(), 1)
+
+        payload = self.client.get(f"/api/evaluate/jobs/{job_id}/").data
+        self.assertEqual(payload["status"], "done")
+        job = EvaluationJob.objects.get(id=job_id)
+        self.assertEqual(job.interview_result.score, payload["result"]["score"])
+        self.assertEqual(job.interview_result.session_id, "jobs")
+
+    def test_queued_job_keeps_the_skill(self):
+        response = self.client.post("/api/evaluate/", {
+            "question": "What is a closure?", "answer": "An answer", "session_id": "jobs",
+            "skill": "closures", "async": "true",
+        })
+        self.assertEqual(response.status_code, 202)
+
+        run_pending_jobs()
+
+        buckets = UserStatBucket.objects.filter(user=self.user, kind=UserStatBucket.KIND_SKILL)
+        self.assertEqual(list(buckets.values_list("key", "attempts")), [("closures", 1)])
+
+    def test_failures_are_recorded(self):
+        failing_model = self.enqueue("first")
+        failing_save = self.enqueue("second")
+
+        with mock.patch("api.jobs.run_evaluation", side_effect=EvaluationError({"error": "AI model error"})):
+            process_job(failing_model)
+        with mock.patch("api.jobs.save_evaluation", side_effect=RuntimeError("disk full")):
+            process_job(failing_save)
+
+        self.assertEqual(EvaluationJob.objects.get(id=failing_model).error, {"error": "AI model error"})
+        failed = EvaluationJob.objects.get(id=failing_save)
+        self.assertEqual((failed.status, failed.error["details"]), ("failed", "disk full"))
+        self.assertFalse(InterviewResult.objects.exists())
+
+    def test_stale_running_jobs_are_reclaimed(self):
+        job_id = self.enqueue()
+        EvaluationJob.objects.filter(id=job_id).update(
+            status=EvaluationJob.STATUS_RUNNING, updated_at=timezone.now() - timedelta(hours=1)
+        )
+        fresh = self.enqueue("still running")
+        EvaluationJob.objects.filter(id=fresh).update(status=EvaluationJob.STATUS_RUNNING)
+
+        self.assertEqual(run_pending_jobs(), 1)
+        self.assertEqual(EvaluationJob.objects.get(id=job_id).status, "done")
+        self.assertEqual(EvaluationJob.objects.get(id=fresh).status, "running")
+
+    def test_stream_reports_status_then_result(self):
+        job_id = self.enqueue()
+        run_pending_jobs()
+
+        async def collect():
+            return [event async for event in stream_job_events(job_id, poll_interval=0)]
+
+        events = async_to_sync(collect)()
+        self.assertEqual([e.split("\n")[0] for e in events], ["event: status", "event: done"])
+
+
+def _sse_events(chunks):
+    events = []
+    for block in b"".join(chunks).decode().split("\n\n"):
+        if block:
+            name, data = block.split("\n", 1)
+            events.append((name[len("event: "):], json.loads(data[len("data: "):])))
+    return events
+
+
+@override_settings(LLM_BACKEND="mock", QUESTION_PREWARM_WORKERS=0)
+class StreamingTests(TestCase):
+    """Streamed bodies must be async iterators, or Django buffers them under ASGI."""
+
+    async def test_question_stream_sends_tokens_then_question(self):
+        response = await self.async_client.get(
+            "/api/get_question/stream/", {"role": "backend developer", "skill": "go", "level": "easy"}
+        )
+        self.assertTrue(response.is_async)
+        events = _sse_events([chunk async for chunk in response.streaming_content])
+
+        tokens = [data["token"] for name, data in events if name == "token"]
+        self.assertGreater(len(tokens), 1)
+        self.assertEqual(events[-1], ("question", {"text": "".join(tokens)}))
+        self.assertTrue(await Question.objects.filter(text="".join(tokens), skill="go").aexists())
+
+    async def test_evaluate_stream_saves_result(self):
+        response = await self.async_client.post(
+            "/api/evaluate/stream/",
+            {"question": "What is a closure?", "answer": "A function with its scope.", "session_id": "sse"},
+            content_type="application/json",
+        )
+        self.assertTrue(response.is_async)
+        events = _sse_events([chunk async for chunk in response.streaming_content])
+
+        name, result = events[-1]
+        self.assertEqual(name, "result")
+        saved = await InterviewResult.objects.aget(session_id="sse")
+        self.assertEqual(saved.score, result["score"])
+
+
+    async def test_stream_work_is_counted_in_the_request_log(self):
+        with self.assertLogs("api.requests", "INFO") as logs:
+            response = await self.async_client.get(
+                "/api/get_question/stream/", {"role": "backend developer", "skill": "scala", "level": "easy"}
+            )
+            [chunk async for chunk in response.streaming_content]
+
+        [line] = [json.loads(record.getMessage()) for record in logs.records]
+        # One bank lookup in the view, then the save made while streaming
+        self.assertGreater(line["db_queries"], 1)
+        self.assertIn("llm_question", line["phases_ms"])
+
+    async def test_streamed_model_call_is_counted_in_the_request_log(self):
+        params = {"role": "backend developer", "skill": "ocaml", "level": "easy"}
+        with self.assertLogs("api.requests", "INFO") as logs:
+            response = await self.async_client.get("/api/get_question/stream/", params)
+            events = _sse_events([chunk async for chunk in response.streaming_content])
+
+        [line] = [json.loads(record.getMessage()) for record in logs.records]
+        # MockBackend counts the words of the prompt and of the answer
+        prompt = build_question_prompt(*params.values())
+        text = events[-1][1]["text"]
+        self.assertEqual(line["llm_calls"], 1)
+        self.assertEqual(line["llm_tokens"], len(prompt.split()) + len(text.split()))
+
+    async def _stream_while_busy(self):
+        # The only question slot is taken, so the stream has to queue for it
+        limiter = llm.get_limiter()
+        started = limiter.acquire("question")
+        try:
+            return await self.async_client.get(
+                "/api/get_question/stream/", {"role": "backend developer", "skill": "rust", "level": "hard"}
+            )
+        finally:
+            limiter.release("question", started)
+
+    @override_settings(LLM_MAX_CONCURRENCY=1, LLM_QUEUE_LIMITS={"default": 0})
+    async def test_full_queue_answers_429_before_streaming(self):
+        response = await self._stream_while_busy()
+        self.assertEqual(response.status_code, 429)
+        self.assertGreaterEqual(int(response["Retry-After"]), 1)
+
+    @override_settings(LLM_MAX_CONCURRENCY=1, LLM_QUEUE_TIMEOUTS={"default": 0.1})
+    async def test_queue_timeout_answers_503_before_streaming(self):
+        response = await self._stream_while_busy()
+        self.assertEqual(response.status_code, 503)
+        self.assertGreaterEqual(int(response["Retry-After"]), 1)
+        self.assertEqual(response.json()["error"], "AI model busy")
+
+    async def test_evaluate_stream_rejects_a_body_that_is_not_an_object(self):
+        for body in ("[]", '"x"'):
+            response = await self.async_client.post("/api/evaluate/stream/", body, content_type="application/json")
+            self.assertEqual(response.status_code, 400)
+
+    def test_sync_bodies_are_only_wrapped_under_asgi(self):
+        Question.objects.create(text="Q", role="r", skill="s", level="easy")
+
+        response = self.client.get("/api/admin/export-questions/")
+        self.assertFalse(response.is_async)
+        self.assertEqual(len(b"".join(response.streaming_content).splitlines()), 1)
+
+        async def over_asgi():
+            response = await self.async_client.get("/api/admin/export-questions/")
+            self.assertTrue(response.is_async)
+            return [chunk async for chunk in response.streaming_content]
+
+        self.assertEqual(len(b"".join(async_to_sync(over_asgi)()).splitlines()), 1)
+
+    @override_settings(LLM_MAX_CONCURRENCY=1)
+    async def test_unread_stream_gives_its_slot_back_on_close(self):
+        response = await self.async_client.get(
+            "/api/get_question/stream/", {"role": "backend developer", "skill": "erlang", "level": "easy"}
+        )
+        self.assertEqual(llm.get_limiter().stats()["running"], 1)
+        response.close()
+        self.assertEqual(llm.get_limiter().stats()["running"], 0)
+
+    @override_settings(LLM_MAX_CONCURRENCY=1)
+    async def test_stream_gives_its_slot_back(self):
+        response = await self.async_client.get(
+            "/api/get_question/stream/", {"role": "backend developer", "skill": "elixir", "level": "easy"}
+        )
+        self.assertEqual(response.status_code, 200)
+        [chunk async for chunk in response.streaming_content]
+        self.assertEqual(llm.get_limiter().stats()["running"], 0)
+
+
+class FlakyBackend(llm.MockBackend):
+    """MockBackend that raises ``errors`` (one per call) before answering."""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def chat(self, kind, model, messages, format=None):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return super().chat(kind, model, messages, format)
+
+    async def stream(self, kind, model, messages, format=None):
+        self.calls += 1
+        async for chunk in super().stream(kind, model, messages, format):
+            if self.errors:
+                raise self.errors.pop(0)
+            yield chunk
+
+
+@override_settings(LLM_BACKEND="mock", LLM_RETRIES=2, LLM_RETRY_BACKOFF=0, LLM_MAX_CONCURRENCY=0)
+class LLMClientTests(SimpleTestCase):
+    def use(self, backend):
+        patcher = mock.patch("api.llm.get_backend", return_value=backend)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return backend
+
+    def test_backend_selection(self):
+        self.assertIsInstance(llm.get_backend(), llm.MockBackend)
+        with self.settings(LLM_BACKEND="ollama", LLM_TIMEOUTS={"default": 60, "evaluate": 7}):
+            backend = llm.get_backend()
+            self.assertIsInstance(backend, llm.OllamaBackend)
+            self.assertEqual(backend._client("evaluate")._client.timeout, httpx.Timeout(7))
+            self.assertEqual(backend._client("resume")._client.timeout, httpx.Timeout(60))
+        with self.settings(LLM_BACKEND="nope"), self.assertRaises(llm.LLMError):
+            llm.get_backend()
+
+    def test_mock_answers_are_deterministic(self):
+        first = llm.chat("evaluate", "Question: q\nAnswer: a")["message"]["content"]
+        self.assertEqual(llm.chat("evaluate", "Question: q\nAnswer: a")["message"]["content"], first)
+        self.assertIn("score", json.loads(first))
+
+    def test_transient_errors_are_retried(self):
+        backend = self.use(FlakyBackend(ConnectionError("refused"), httpx.ReadTimeout("timed out")))
+        response = llm.chat("question", "prompt")
+        self.assertTrue(response["message"]["content"])
+        self.assertEqual(backend.calls, 3)
+
+    def test_retries_are_bounded(self):
+        backend = self.use(FlakyBackend(*[httpx.ReadTimeout("timed out")] * 3))
+        with self.assertRaises(llm.LLMError):
+            llm.chat("question", "prompt")
+        self.assertEqual(backend.calls, 3)
+
+    def test_other_errors_are_not_retried(self):
+        backend = self.use(FlakyBackend(ValueError("bad request")))
+        with self.assertRaises(llm.LLMError):
+            llm.chat("question", "prompt")
+        self.assertEqual(backend.calls, 1)
+
+    def test_stream_records_the_token_counts_of_the_last_chunk(self):
+        def tokens():
+            return dict(metrics.LLM_TOKENS._values)
+
+        before = tokens()
+
+        async def collect():
+            return "".join([token async for token in llm.stream("question", "a four word prompt")])
+
+        text = async_to_sync(collect)()
+        after = tokens()
+        self.assertEqual(after[("question", "prompt")] - before.get(("question", "prompt"), 0), 4)
+        self.assertEqual(after[("question", "completion")] - before.get(("question", "completion"), 0), len(text.split()))
+
+    def test_stream_is_not_retried_after_the_first_token(self):
+        backend = self.use(FlakyBackend())
+
+        async def collect():
+            tokens = []
+            async for token in llm.stream("question", "prompt"):
+                tokens.append(token)
+                backend.errors.append(ConnectionError("dropped"))
+            return tokens
+
+        with self.assertRaises(llm.LLMError):
+            async_to_sync(collect)()
+        self.assertEqual(backend.calls, 1)
+
+
+class SingleFlightTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.enterContext(override_settings(SINGLEFLIGHT_LOCK_FILE=os.path.join(directory.name, "sf.lock")))
+        self.enterContext(mock.patch.object(singleflight, "_lock_fd", None))
+
+    def _wait_for(self, condition):
+        deadline = time.monotonic() + 5
+        while not condition():
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.01)
+
+    def test_concurrent_identical_calls_share_one_model_call(self):
+        release = threading.Event()
+        calls = []
+
+        def call_model():
+            calls.append(1)
+            release.wait(5)
+            return {"score": 7}
+
+        coalesced = singleflight.stats()["coalesced"]
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(singleflight.do("evaluate:same", call_model)))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        self._wait_for(lambda: singleflight.stats()["coalesced"] - coalesced == 4)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{"score": 7}] * 5)
+
+    @override_settings(SINGLEFLIGHT_SLOTS=1)
+    def test_keys_sharing_a_slot_take_turns_within_a_process(self):
+        release = threading.Event()
+        running = []
+
+        def first():
+            running.append("first")
+            release.wait(5)
+            running.remove("first")
+            return 1
+
+        def second():
+            overlapped = list(running)
+            return overlapped
+
+        thread = threading.Thread(target=singleflight.do, args=("a", first))
+        thread.start()
+        self._wait_for(lambda: running)
+
+        result = []
+        waiter = threading.Thread(target=lambda: result.append(singleflight.do("b", second, recheck=lambda: None)))
+        waiter.start()
+        time.sleep(0.1)
+        self.assertEqual(result, [])  # still waiting for the slot
+        release.set()
+        thread.join()
+        waiter.join()
+        self.assertEqual(result, [[]])
+
+
+class EvaluationCacheTests(SimpleTestCase):
+    def test_locmem_evicts_least_recently_used(self):
+        backend = LocMemBackend(ttl=60, max_entries=2)
+        backend.set("a", 1)
+        backend.set("b", 2)
+        backend.get("a")
+        self.assertEqual(backend.set("c", 3), 1)
+        self.assertEqual((backend.get("a"), backend.get("b"), backend.get("c")), (1, None, 3))
+
+    def test_entries_expire(self):
+        backend = LocMemBackend(ttl=60, max_entries=10)
+        backend.set("a", 1)
+        with mock.patch("api.cache.time.time", return_value=time.time() + 61):
+            self.assertIsNone(backend.get("a"))
+
+    def test_file_backend_prunes_oldest_files(self):
+        with tempfile.TemporaryDirectory() as location:
+            backend = FileBackend(ttl=60, max_entries=3, location=location)
+            backend.PRUNE_EVERY = 5
+            for i in range(5):
+                backend.set(f"k{i}", {"score": i})
+                os.utime(os.path.join(location, f"k{i}.json"), (i, i))
+            self.assertEqual(len(os.listdir(location)), 3)
+            self.assertEqual(backend.get("k4"), {"score": 4})
+            self.assertIsNone(backend.get("k0"))
+
+    def test_hits_misses_and_evictions_are_counted(self):
+        cache = EvaluationCache(LocMemBackend(ttl=60, max_entries=1))
+        self.assertIsNone(cache.get("What is X?", "It is Y."))
+        cache.set("What is X?", "It is Y.", {"score": 5})
+        # Keys ignore case and whitespace
+        self.assertEqual(cache.get("what is  X?", " it is y."), {"score": 5})
+        cache.set("Another?", "Answer.", {"score": 1})
+
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["evictions"]), (1, 1, 1))
+        self.assertEqual(stats["hit_rate"], 0.5)
+
+    @override_settings(LLM_BACKEND="mock", EVALUATION_CACHE={
+        "BACKEND": "locmem", "TTL": 60, "MAX_ENTRIES": 10, "LOCATION": "", "ALIAS": "default",
+    })
+    def test_repeat_evaluations_skip_the_model(self):
+        with mock.patch("api.evaluation.llm.chat", wraps=llm.chat) as chat:
+            first = run_evaluation("What is a closure?", "A function and its scope.")
+            again = run_evaluation("what is a closure? ", "a function and its  scope.")
+        self.assertEqual(first, again)
+        self.assertEqual(chat.call_count, 1)
+        self.assertEqual(get_evaluation_cache().stats()["hits"], 1)
+
+
+def _docx_bytes(paragraphs, table=None):
+    doc = Document()
+    for text in paragraphs:
+        doc.add_paragraph(text)
+    if table:
+        doc.add_table(rows=1, cols=1).cell(0, 0).text = table
+    out = io.BytesIO()
+    doc.save(out)
+    return out.getvalue()
+
+
+class ResumeExtractionTests(SimpleTestCase):
+    def test_docx_text_matches_python_docx(self):
+        doc = Document(io.BytesIO(_docx_bytes(["Jane Doe\tEngineer", "Python, Django"], table="In a table")))
+        run = doc.paragraphs[0].add_run(" (remote)")
+        run.add_break()
+        doc.paragraphs[0].add_run("Berlin").add_break(WD_BREAK.PAGE)
+        out = io.BytesIO()
+        doc.save(out)
+
+        expected = "".join(p.text + "\n" for p in Document(io.BytesIO(out.getvalue())).paragraphs)
+        self.assertEqual(expected, "Jane Doe\tEngineer (remote)\nBerlin\nPython, Django\n")
+        self.assertEqual(extract_text(out.getvalue(), "cv.docx"), expected)
+        self.assertEqual(extract_text(out.getvalue(), "cv.docx", max_chars=8), expected[:8])
+
+    @override_settings(RESUME_PARSE_WORKERS=1, RESUME_PARSE_TIMEOUT=1)
+    def test_timed_out_parse_frees_the_worker(self):
+        self.addCleanup(lambda: resume._reset_pool(resume._pool, kill=True))
+        upload = SimpleUploadedFile("cv.docx", _docx_bytes(["Jane Doe"]))
+
+        # A parse that never finishes holds the only worker
+        resume._get_pool().submit(time.sleep, 60)
+        with self.assertRaises(ResumeError) as ctx:
+            extract_upload(upload)
+        self.assertEqual(ctx.exception.status, 504)
+
+        self.assertEqual(extract_upload(upload), "Jane Doe\n")
+
+
+@override_settings(LLM_BACKEND="mock")
+class ResumeAnalysisReuseTests(TestCase):
+    def _analyze(self, content):
+        response = APIClient().post("/api/analyze_resume/", {"resume": SimpleUploadedFile("cv.docx", content)})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_same_file_and_model_reuse_the_stored_analysis(self):
+        # Later tests size the parse pool through settings
+        self.addCleanup(lambda: resume._reset_pool(resume._pool))
+        backend = FlakyBackend()
+        content = _docx_bytes(["Jane Doe", "Python, Django"])
+
+        with mock.patch("api.llm.get_backend", return_value=backend):
+            first = self._analyze(content)
+            self.assertEqual(self._analyze(content), first)
+            self.assertEqual(backend.calls, 1)
+
+            with self.settings(LLM_MODELS={"default": "llama3.1:8b", "resume": "another-model"}):
+                self._analyze(content)
+            self.assertEqual(backend.calls, 2)
+
+        stored = ResumeAnalysis.objects.get(content_hash=first["resume_id"])
+        self.assertEqual(stored.model, "another-model")
+
+
+class ResumeBatchTests(TestCase):
+    @override_settings(RESUME_BATCH_MAX_FILES=2)
+    def test_oversized_archive_is_rejected_before_staging(self):
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, "w") as zf:
+            for i in range(3):
+                zf.writestr(f"cv{i}.docx", _docx_bytes([f"Candidate {i}"]))
+        archive.seek(0)
+
+        with tempfile.TemporaryDirectory() as directory:
+            with self.assertRaises(ResumeError) as ctx:
+                resume.stage_batch([], archive, directory)
+            self.assertEqual(ctx.exception.status, 400)
+            self.assertEqual(os.listdir(directory), [])
+
+    @override_settings(RESUME_PARSE_TIMEOUT=1, RESUME_BATCH_LLM_CONCURRENCY=1,
+                       LLM_TIMEOUTS={"default": 0})
+    def test_timed_out_batch_drops_queued_model_calls(self):
+        items = []
+        for i in range(3):
+            content_hash = f"{i:064d}"
+            ResumeAnalysis.objects.create(content_hash=content_hash, file_name=f"cv{i}.pdf", text=f"Candidate {i}")
+            items.append({"file": f"cv{i}.pdf", "hash": content_hash})
+
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        def analyze(text):
+            release.wait(10)
+            return {}
+
+        with mock.patch("api.resume.analyze_text", side_effect=analyze) as analyze_text:
+            results = list(resume.analyze_batch(items))
+            release.set()
+            time.sleep(0.1)
+
+        self.assertEqual(results[-1]["error"]["remaining"], 3)
+        self.assertEqual(analyze_text.call_count, 1)
+
+    @override_settings(LLM_BACKEND="mock", RESUME_PARSE_TIMEOUT=5)
+    def test_unexpected_model_error_is_reported_per_file(self):
+        class BrokenBackend(llm.MockBackend):
+            def chat(self, kind, model, messages, format=None):
+                return {"done": True}  # no "message"
+
+        items = []
+        for i in range(2):
+            content_hash = f"{i:064d}"
+            ResumeAnalysis.objects.create(content_hash=content_hash, file_name=f"cv{i}.pdf", text=f"Candidate {i}")
+            items.append({"file": f"cv{i}.pdf", "hash": content_hash})
+
+        started = time.monotonic()
+        with mock.patch("api.llm.get_backend", return_value=BrokenBackend()):
+            results = list(resume.analyze_batch(items))
+
+        self.assertLess(time.monotonic() - started, 5)
+        self.assertEqual([r["status"] for r in results], ["error", "error"])
+        self.assertEqual(results[0]["error"]["error"], "AI model error")
+        self.assertFalse(ResumeAnalysis.objects.filter(analysis__isnull=False).exists())
+
+
+class LLMJSONCorpusTests(SimpleTestCase):
+    """Model outputs seen in the wild, each either recovered as expected or rejected."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        with open(CORPUS_PATH) as f:
+            cls.corpus = json.load(f)
+
+    def test_corpus(self):
+        for case in self.corpus:
+            with self.subTest(case["name"]):
+                schema = SCHEMAS[case["kind"]]
+                if case.get("error"):
+                    with self.assertRaises(JSONExtractError):
+                        extract_json(case["raw"], schema)
+                    continue
+                data = extract_json(case["raw"], schema)
+                for key, value in case["expect"].items():
+                    self.assertEqual(data[key], value)
+                self.assertLessEqual(set(schema["properties"]), set(data))
+
+    def test_streamed_chunks_match_whole_text(self):
+        stopped_early = 0
+        for case in self.corpus:
+            if case.get("error"):
+                continue
+            with self.subTest(case["name"]):
+                raw = case["raw"]
+                extractor = JSONExtractor()
+                for i in range(0, len(raw), 3):
+                    if extractor.feed(raw[i:i + 3]):
+                        stopped_early += i + 3 < len(raw)
+                        break
+                try:
+                    streamed = extractor.result()
+                except JSONExtractError:
+                    continue  # a brace in the prose; streaming callers fall back to the whole text
+                self.assertEqual(streamed, extract_json(raw))
+        self.assertGreater(stopped_early, 0)
@@ -0,0 +1,57 @@
+"""
+Content-addressed text storage.
+
+Model output such as an evaluation's improved answer is often identical
+across results for the same question. Each distinct text is stored once
+in TextBlob under its SHA-256 digest and rows reference it by id.
+"""
+
+import hashlib
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+
+from .models import InterviewResult, TextBlob
+
+DELETE_CHUNK_SIZE = 500
+
+
+def text_digest(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def store_text(text):
+    """
+    The TextBlob holding ``text``, created if needed, or None for empty text.
+
+    The row stays locked until the caller's transaction ends, so
+    delete_unused() can't remove it before the row pointing at it is saved.
+    """
+    if not text:
+        return None
+    with transaction.atomic():
+        blob, _ = TextBlob.objects.select_for_update().get_or_create(
+            digest=text_digest(text), defaults={"text": text}
+        )
+    return blob
+
+
+def delete_unused(blob_ids):
+    """
+    Delete the blobs among ``blob_ids`` that no result points at. Blobs
+    locked by store_text() for a result that is being written are skipped.
+    Returns how many were deleted.
+    """
+    blob_ids = list(blob_ids)
+    deleted = 0
+    for i in range(0, len(blob_ids), DELETE_CHUNK_SIZE):
+        with transaction.atomic():
+            unused = list(
+                TextBlob.objects.select_for_update(skip_locked=True)
+                .filter(id__in=blob_ids[i:i + DELETE_CHUNK_SIZE])
+                .annotate(used=Exists(InterviewResult.objects.filter(improved_answer_blob=OuterRef("pk"))))
+                .filter(used=False)
+                .values_list("id", flat=True)
+            )
+            deleted += TextBlob.objects.filter(id__in=unused).delete()[0]
+    return deleted
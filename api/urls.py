@@ -7,12 +7,23 @@ from .views import (
     get_roles,
     get_skills,
     get_question,
+    get_question_stream,
     evaluate_answer,
+    evaluate_answer_stream,
+    evaluation_job_status,
+    evaluation_job_stream,
     analyze_resume,
+    analyze_resume_batch,
+    get_resume_analysis,
     add_question,
     list_questions,
+    import_questions_view,
+    export_questions_view,
     list_users,
+    cache_stats,
+    llm_stats,
     get_session_questions,
+    start_session,
 )
 
 urlpatterns = [
@@ -25,15 +36,26 @@ urlpatterns = [
     path("roles/", get_roles),
     path("skills/", get_skills),
     path("get_question/", get_question),
+    path("get_question/stream/", get_question_stream),
     path("evaluate/", evaluate_answer),
+    path("evaluate/stream/", evaluate_answer_stream),
+    path("evaluate/jobs/<uuid:job_id>/", evaluation_job_status),
+    path("evaluate/jobs/<uuid:job_id>/stream/", evaluation_job_stream),
 
     # Resume Analyzer
     path("analyze_resume/", analyze_resume),
+    path("analyze_resume/batch/", analyze_resume_batch),
+    path("analyze_resume/<str:content_hash>/", get_resume_analysis),
 
     # Admin
     path("admin/add-question/", add_question),
     path("admin/list-questions/", list_questions),
+    path("admin/import-questions/", import_questions_view),
+    path("admin/export-questions/", export_questions_view),
     path("admin/list-users/", list_users),
+    path("admin/cache-stats/", cache_stats),
+    path("admin/llm-stats/", llm_stats),
+    path("session/start/", start_session),
     path("session/questions/", get_session_questions),
 
 ]
@@ -0,0 +1,2 @@
+def normalize(text):
+    return (text or "").strip().lower()
@@ -1,23 +1,69 @@
 from django.shortcuts import render
-import ollama
-import random
+from django.http import HttpResponse, JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from asgiref.sync import sync_to_async
 import json
-import PyPDF2
-from docx import Document
+import tempfile
+import uuid
+from contextlib import aclosing
 
+from django.conf import settings
 from django.contrib.auth.models import User
 from django.contrib.auth import authenticate
-from django.db.models import Avg
+from django.db.models import F
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import permission_classes
 
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework_simplejwt.tokens import RefreshToken
 
 
-from .models import UserProfile, Question, InterviewResult
+from . import llm, metrics, prewarm, singleflight, taxonomy
+from .archive import archived_rows, for_review, review_row
+from .cache import get_evaluation_cache
+from .models import (
+    UserProfile,
+    Question,
+    InterviewResult,
+    EvaluationJob,
+    ResumeAnalysis,
+)
 from .serializers import QuestionSerializer, UserProfileSerializer
+from .evaluation import (
+    EVALUATION_SCHEMA,
+    EvaluationError,
+    build_evaluation_prompt,
+    parse_evaluation,
+    resolve_bank_question,
+    run_evaluation,
+    save_evaluation,
+)
+from .resume import (
+    ResumeError,
+    analyze_batch,
+    analyze_text,
+    extract_upload,
+    hash_upload,
+    remove_staging,
+    stage_batch,
+)
+from .jobs import enqueue_evaluation, job_payload, stream_job_events
+from .listing import export_rows, keyset_list
+from .llmjson import JSONExtractError, JSONExtractor
+from .questions import (
+    build_question_prompt,
+    find_bank_question,
+    generate_question,
+    save_question_if_new,
+)
+from .question_io import import_questions, read_rows
+from .sessions import create_plan, plan_payload
+from .utils import normalize
+from .sse import sse_event, sse_response, streaming_response
+from .stats import dashboard_payload
 
 
 # ============================================================
@@ -50,60 +96,37 @@ DEFAULT_SKILLS = [
 # UTILS
 # ============================================================
 
-def normalize(text):
-    return (text or "").strip().lower()
-
-
-def save_question_if_new(text, role, skill, level):
-    text = text.strip()
-    role = normalize(role)
-    skill = normalize(skill)
-    level = normalize(level)
-
-    exists = Question.objects.filter(
-        text__iexact=text,
-        role=role,
-        skill=skill,
-        level=level,
-    ).exists()
-
-    if not exists:
-        Question.objects.create(
-            text=text,
-            role=role,
-            skill=skill,
-            level=level
-        )
+def error_response(payload, status):
+    response = Response(payload, status=status)
+    if "retry_after" in payload:
+        response["Retry-After"] = str(payload["retry_after"])
+    return response
 
 
-def save_role_if_new(role):
-    role = normalize(role)
-    if not role:
-        return
+# Roles/skills already known to be stored, so repeats skip the database
+_known_roles = set()
+_known_skills = set()
+KNOWN_TAXONOMY_LIMIT = 10000
 
-    exists = Question.objects.filter(role=role).exists()
-    if not exists:
-        Question.objects.create(
-            text=f"[auto-role:{role}]",
-            role=role,
-            skill="",
-            level="meta"
-        )
 
+def save_roles_and_skills(roles, skills):
+    """
+    Register any new roles/skills with one lookup per table and one bulk
+    insert, however many are passed in.
+    """
+    roles = {normalize(r) for r in roles} - {""} - _known_roles
+    skills = {normalize(s) for s in skills} - {""} - _known_skills
 
-def save_skill_if_new(skill):
-    skill = normalize(skill)
-    if not skill:
+    if not roles and not skills:
         return
 
-    exists = Question.objects.filter(skill=skill).exists()
-    if not exists:
-        Question.objects.create(
-            text=f"[auto-skill:{skill}]",
-            role="",
-            skill=skill,
-            level="meta"
-        )
+    taxonomy.register(roles, skills)
+
+    if len(_known_roles) + len(_known_skills) > KNOWN_TAXONOMY_LIMIT:
+        _known_roles.clear()
+        _known_skills.clear()
+    _known_roles.update(roles)
+    _known_skills.update(skills)
 
 
 # ============================================================
@@ -179,33 +202,40 @@ def get_profile(request):
 
 @api_view(["GET"])
 def dashboard_stats(request):
-    user = request.user
-
-    total = InterviewResult.objects.filter(user=user).count()
-    avg = InterviewResult.objects.filter(user=user).aggregate(avg=Avg("score"))["avg"] or 0
+    if not request.user.is_authenticated:
+        return Response({"error": "Authentication required"}, status=401)
 
-    return Response({
-        "total_attempts": total,
-        "average_score": round(avg, 1)
-    })
+    return Response(dashboard_payload(request.user))
 
 
 # ============================================================
 # DYNAMIC ROLES / SKILLS
 # ============================================================
 
+def taxonomy_response(request, kind, defaults):
+    version, rows = taxonomy.get_taxonomy(kind, defaults)
+    etag = f'"{kind}-{version}"'
+
+    if etag in request.headers.get("If-None-Match", ""):
+        response = Response(status=304)
+    elif request.GET.get("counts"):
+        response = Response([{"name": name, "question_count": n} for name, n in rows])
+    else:
+        response = Response([name for name, _ in rows])
+
+    response["ETag"] = etag
+    response["Cache-Control"] = "no-cache"
+    return response
+
+
 @api_view(["GET"])
 def get_roles(request):
-    roles = list(Question.objects.values_list("role", flat=True).distinct())
-    roles = [r for r in roles if r]
-    return Response(sorted(set(roles + DEFAULT_ROLES)))
+    return taxonomy_response(request, "roles", DEFAULT_ROLES)
 
 
 @api_view(["GET"])
 def get_skills(request):
-    skills = list(Question.objects.values_list("skill", flat=True).distinct())
-    skills = [s for s in skills if s]
-    return Response(sorted(set(skills + DEFAULT_SKILLS)))
+    return taxonomy_response(request, "skills", DEFAULT_SKILLS)
 
 
 # ============================================================
@@ -217,38 +247,32 @@ def get_question(request):
     role = normalize(request.GET.get("role"))
     skill = normalize(request.GET.get("skill"))
     level = normalize(request.GET.get("level"))
+    session_id = request.GET.get("session_id")
 
-    qs = Question.objects.all()
-
-    if role:
-        qs = qs.filter(role=role)
-    if skill:
-        qs = qs.filter(skill=skill)
-    if level:
-        qs = qs.filter(level=level)
-
-    if qs.exists():
-        return Response(QuestionSerializer(random.choice(list(qs))).data)
-
-    # AI fallback
-    prompt = f"""
-    Generate ONE interview question.
-    Role: {role or 'general'}
-    Skill: {skill or 'general'}
-    Difficulty: {level or 'easy'}
-    Return ONLY the question.
-    """
+    prewarm.note_request(role, skill, level)
 
-    ai = ollama.chat(
-        model="llama3.1:8b",
-        messages=[{"role": "user", "content": prompt}]
-    )
+    question = find_bank_question(role, skill, level, session_id)
+    if question:
+        return Response(QuestionSerializer(question).data)
 
-    q_text = ai["message"]["content"].strip()
+    # AI fallback, shared by concurrent requests for the same empty combination.
+    # Another process may have filled the bank while we waited for its call.
+    def recheck():
+        question = find_bank_question(role, skill, level, session_id)
+        return QuestionSerializer(question).data if question else None
 
-    save_question_if_new(q_text, role or "general", skill or "general", level or "easy")
+    try:
+        payload = singleflight.do(
+            f"question:{role}|{skill}|{level}",
+            lambda: {"text": generate_question(role, skill, level)},
+            recheck=recheck,
+        )
+    except llm.LLMOverloaded as e:
+        return error_response(e.payload(), e.status)
+    except llm.LLMError as e:
+        return Response({"error": "AI model error", "details": str(e)}, status=500)
 
-    return Response({"text": q_text})
+    return Response(payload)
 
 
 # ============================================================
@@ -265,121 +289,258 @@ def evaluate_answer(request):
     if not session_id:
         return Response({"error": "session_id required"}, status=400)
 
+    # Questions from the bank or a session plan can be sent by id
+    bank_question = None
+    if request.data.get("question_id"):
+        try:
+            bank_question = resolve_bank_question(request.data["question_id"])
+        except EvaluationError as e:
+            return error_response(e.payload, e.status)
+        question = bank_question.text
+
+    # Opt-in async mode: queue the evaluation and return immediately
+    if str(request.data.get("async", "")).lower() in ("1", "true", "yes"):
+        job = enqueue_evaluation(user, session_id, question, answer, bank_question, request.data.get("skill"))
+        return Response({"job_id": str(job.id), "status": job.status}, status=202)
+
+    try:
+        data = run_evaluation(question, answer)
+    except EvaluationError as e:
+        return error_response(e.payload, e.status)
+
     # ============================================================
-    # AI Prompt — Always produce FULL correct answer
+    # Save to DB
     # ============================================================
-    prompt = f"""
-You are an interview evaluator. Follow these rules STRICTLY and output ONLY VALID JSON.
+    save_evaluation(user, session_id, question, answer, data, request.data.get("skill"), bank_question)
+
+    return Response(data)
+
+
+@api_view(["GET"])
+def evaluation_job_status(request, job_id):
+    job = EvaluationJob.objects.filter(id=job_id).first()
+    if not job:
+        return Response({"error": "Job not found"}, status=404)
+
+    return Response(job_payload(job))
 
-1. If the given answer is meaningless, random, incorrect, or unrelated:
-   - score = 0
-   - strengths = "None"
-   - weaknesses = "Answer is meaningless, random, or incorrect"
-   - improved_answer = "Write the full correct and ideal answer to the question."
 
-2. If the answer is partially correct:
-   - Give a fair score between 1 and 7
-   - Identify strengths and weaknesses
-   - improved_answer must contain the correct, complete explanation.
+@api_view(["GET"])
+def evaluation_job_stream(request, job_id):
+    if not EvaluationJob.objects.filter(id=job_id).exists():
+        return Response({"error": "Job not found"}, status=404)
 
-3. If the answer is fully correct:
-   - Give a score between 8 and 10
-   - improved_answer must still give an improved, professional version.
+    return sse_response(stream_job_events(job_id))
 
-Your improved_answer MUST ALWAYS contain the full correct explanation the candidate should have given.
 
-Evaluate:
 
-Question: {question}
-Answer: {answer}
 
-Return JSON ONLY:
-{{
-  "score": number,
-  "strengths": "string",
-  "weaknesses": "string",
-  "improved_answer": "string"
-}}
-"""
+# ============================================================
+# STREAMING (ASGI) — tokens are pushed as server-sent events
+# Served incrementally only under the ASGI server, see interview/asgi.py
+# ============================================================
 
-    # Call Llama model
+async def _stream_chat(kind, prompt, collected, reservation, format=None, extractor=None):
+    async with aclosing(llm.stream(kind, prompt, format=format, reservation=reservation)) as tokens:
+        async for token in tokens:
+            if token:
+                collected.append(token)
+                yield sse_event("token", {"token": token})
+                # The JSON object is complete: stop the model rather than wait for trailing text
+                if extractor is not None and extractor.feed(token):
+                    try:
+                        extractor.result()
+                        return
+                    except JSONExtractError:
+                        # Braces in prose, not the answer; read everything and parse at the end
+                        extractor = None
+
+
+async def _reserve(kind):
+    """
+    ``(reservation, None)`` with a model slot taken before the stream starts,
+    or ``(None, response)`` with the 429/503 to send instead.
+    """
     try:
-        ai = ollama.chat(
-            model="llama3.1:8b",
-            messages=[{"role": "user", "content": prompt}]
-        )
-    except Exception as e:
-        return Response({"error": "AI model error", "details": str(e)}, status=500)
+        return await llm.reserve(kind), None
+    except llm.LLMOverloaded as e:
+        response = JsonResponse(e.payload(), status=e.status)
+        response["Retry-After"] = str(e.retry_after)
+        return None, response
 
-    # ============================================================
-    # Sanitize JSON
-    # ============================================================
-    raw = ai["message"]["content"].strip()
-    raw = raw.replace("```json", "").replace("```", "")
 
-    # Extract JSON object safely
-    start = raw.find("{")
-    end = raw.rfind("}") + 1
+async def _authenticate(request):
+    """JWT auth for the plain Django async views below (DRF doesn't wrap them)."""
+    result = await sync_to_async(JWTAuthentication().authenticate)(request)
+    return result[0] if result else None
 
-    if start == -1 or end == -1:
-        return Response({"error": "AI returned invalid JSON", "raw": raw}, status=500)
 
-    json_str = raw[start:end]
+async def get_question_stream(request):
+    if request.method != "GET":
+        return JsonResponse({"error": "Method not allowed"}, status=405)
 
-    try:
-        data = json.loads(json_str)
-    except Exception as e:
-        return Response({"error": "JSON parsing failed", "raw": raw, "details": str(e)}, status=500)
+    role = normalize(request.GET.get("role"))
+    skill = normalize(request.GET.get("skill"))
+    level = normalize(request.GET.get("level"))
+    session_id = request.GET.get("session_id")
+
+    prewarm.note_request(role, skill, level)
+    question = await sync_to_async(find_bank_question)(role, skill, level, session_id)
+
+    if question:
+        async def bank_event():
+            yield sse_event("question", QuestionSerializer(question).data)
+
+        return sse_response(bank_event())
+
+    reservation, busy = await _reserve("question")
+    if busy:
+        return busy
+
+    async def events():
+        collected = []
+        prompt = build_question_prompt(role, skill, level)
+        try:
+            async for event in _stream_chat("question", prompt, collected, reservation):
+                yield event
+        except Exception as e:
+            yield sse_event("error", {"error": "AI model error", "details": str(e)})
+            return
+
+        q_text = "".join(collected).strip()
+        await sync_to_async(save_question_if_new)(
+            q_text, role or "general", skill or "general", level or "easy"
+        )
+        yield sse_event("question", {"text": q_text})
+
+    return sse_response(events(), on_close=reservation.release)
+
+
+@csrf_exempt
+async def evaluate_answer_stream(request):
+    if request.method != "POST":
+        return JsonResponse({"error": "Method not allowed"}, status=405)
 
-    # Fix score range
     try:
-        data["score"] = max(0, min(10, int(data.get("score", 0))))
-    except:
-        data["score"] = 0
+        user = await _authenticate(request)
+    except AuthenticationFailed as e:
+        return JsonResponse({"error": str(e.detail)}, status=401)
 
-    # ============================================================
-    # Save to DB
-    # ============================================================
-    InterviewResult.objects.create(
-        user=user,
-        session_id=session_id,
-        question=question,
-        answer=answer,
-        score=data["score"],
-        strengths=data.get("strengths", ""),
-        weaknesses=data.get("weaknesses", ""),
-        improved_answer=data.get("improved_answer", ""),
-    )
+    try:
+        body = json.loads(request.body or b"{}")
+    except ValueError:
+        body = request.POST
+    if not isinstance(body, dict):
+        return JsonResponse({"error": "Expected a JSON object"}, status=400)
 
-    return Response(data)
+    question = body.get("question")
+    answer = body.get("answer")
+    session_id = body.get("session_id")
 
+    if not session_id:
+        return JsonResponse({"error": "session_id required"}, status=400)
+
+    bank_question = None
+    if body.get("question_id"):
+        try:
+            bank_question = await sync_to_async(resolve_bank_question)(body["question_id"])
+        except EvaluationError as e:
+            return JsonResponse(e.payload, status=e.status)
+        question = bank_question.text
+
+    cache = get_evaluation_cache()
+    cached = await sync_to_async(cache.get)(question, answer)
+
+    if cached is not None:
+        async def cached_event():
+            await sync_to_async(save_evaluation)(
+                user, session_id, question, answer, cached, body.get("skill"), bank_question
+            )
+            yield sse_event("result", cached)
+
+        return sse_response(cached_event())
+
+    reservation, busy = await _reserve("evaluate")
+    if busy:
+        return busy
+
+    async def events():
+        collected = []
+        try:
+            async for event in _stream_chat(
+                "evaluate",
+                build_evaluation_prompt(question, answer),
+                collected,
+                reservation,
+                format=llm.json_format(EVALUATION_SCHEMA),
+                extractor=JSONExtractor(),
+            ):
+                yield event
+        except Exception as e:
+            yield sse_event("error", {"error": "AI model error", "details": str(e)})
+            return
+
+        try:
+            data = parse_evaluation("".join(collected))
+        except EvaluationError as e:
+            yield sse_event("error", e.payload)
+            return
+
+        await sync_to_async(cache.set)(question, answer, data)
+        await sync_to_async(save_evaluation)(
+            user, session_id, question, answer, data, body.get("skill"), bank_question
+        )
+        yield sse_event("result", data)
 
+    return sse_response(events(), on_close=reservation.release)
 
 
 # ============================================================
-# SESSION REVIEW
+# SESSION START + REVIEW
 # ============================================================
 
+@api_view(["POST"])
+def start_session(request):
+    role = normalize(request.data.get("role"))
+    skill = normalize(request.data.get("skill"))
+    level = normalize(request.data.get("level"))
+    session_id = request.data.get("session_id") or uuid.uuid4().hex
+    user = request.user if request.user.is_authenticated else None
+
+    try:
+        count = int(request.data.get("count") or settings.SESSION_QUESTION_COUNT)
+    except (TypeError, ValueError):
+        return Response({"error": "count must be a number"}, status=400)
+    count = max(1, min(count, settings.SESSION_QUESTION_MAX))
+
+    prewarm.note_request(role, skill, level)
+
+    try:
+        plan = create_plan(session_id, user, role, skill, level, count)
+    except llm.LLMOverloaded as e:
+        return error_response(e.payload(), e.status)
+    except llm.LLMError as e:
+        return Response({"error": "AI model error", "details": str(e)}, status=500)
+
+    return Response(plan_payload(plan))
+
+
 @api_view(["GET"])
 def get_session_questions(request):
     session_id = request.GET.get("session_id")
 
-    attempts = InterviewResult.objects.filter(
+    attempts = for_review(InterviewResult.objects.filter(
         session_id=session_id
-    ).order_by("created_at")
-
-    return Response([
-        {
-            "question": a.question,
-            "answer": a.answer,
-            "score": a.score,
-            "strengths": a.strengths,
-            "weaknesses": a.weaknesses,
-            "improved_answer": a.improved_answer,
-            "created_at": a.created_at,
-        }
-        for a in attempts
-    ])
+    )).order_by("created_at")
+
+    rows = [review_row(a) for a in attempts]
+
+    # Older sessions may have been moved to the archive by archive_results
+    archived = archived_rows(session_id)
+    if archived:
+        rows = sorted(archived + rows, key=lambda row: row["created_at"])
+
+    return Response(rows)
 
 
 # ============================================================
@@ -392,93 +553,98 @@ def analyze_resume(request):
         return Response({"error": "Upload a resume"}, status=400)
 
     file = request.FILES["resume"]
-    text = ""
 
-    # --- FAST PDF / DOCX READER ---
+    if not file.name.endswith((".pdf", ".docx")):
+        return Response({"error": "Unsupported file format"}, status=400)
+
+    # --- SAME FILE UPLOADED BEFORE? ---
+    content_hash = hash_upload(file)
+    model = llm.model_for("resume")
+
+    stored = ResumeAnalysis.objects.filter(content_hash=content_hash).first()
+    if stored and stored.analysis is not None and stored.model == model:
+        return Response({**stored.analysis, "resume_id": content_hash})
+
+    if stored:
+        text = stored.text
+    else:
+        # --- BOUNDED PDF / DOCX READER (worker pool) ---
+        try:
+            text = extract_upload(file)
+        except ResumeError as e:
+            return Response(e.payload, status=e.status)
+
+        stored, _ = ResumeAnalysis.objects.get_or_create(
+            content_hash=content_hash,
+            defaults={"file_name": file.name, "text": text},
+        )
+
+    # --- AI ANALYSIS ---
     try:
-        if file.name.endswith(".pdf"):
-            import fitz  # PyMuPDF (fast)
-            pdf = fitz.open(stream=file.read(), filetype="pdf")
-            for page in pdf:
-                text += page.get_text() + "\n"
-
-        elif file.name.endswith(".docx"):
-            doc = Document(file)
-            for para in doc.paragraphs:
-                text += para.text + "\n"
-
-        else:
-            return Response({"error": "Unsupported file format"}, status=400)
-
-    except Exception as e:
-        return Response({"error": "Failed to read file", "details": str(e)}, status=500)
-
-    # --- LIMIT TEXT (SPEED BOOST) ---
-    text = text[:3000]  # limits AI load
-
-    # --- STRONG AI PROMPT ---
-    prompt = f"""
-You are an ATS resume analysis engine. Analyze the resume below and return a DETAILED structured JSON.
-
-Resume Text:
-{text}
-
-Your job:
-- Extract maximum information.
-- If something is missing, infer it intelligently.
-- Do NOT leave any field empty.
-- Each field must contain full, meaningful content.
-- Strengths & weaknesses must be 3–4 sentences.
-- Summary must be 3–5 recruiter-focused sentences.
-
-Return ONLY valid JSON in this exact structure:
-
-{{
-    "ats_score": number,
-    "best_fit_role": "string",
-    "top_skills": "comma-separated string",
-    "strengths": "3-4 complete sentences",
-    "weaknesses": "3-4 complete sentences",
-    "skills_missing": "comma-separated string",
-    "summary": "3-5 detailed sentences"
-}}
-
-Rules:
-- No explanations before or after the JSON.
-- JSON must be complete and valid.
-- Never return an empty key.
-- Fill in all fields even if you must infer from context.
-"""
-
-    # --- AI MODEL CALL ---
-    ai = ollama.chat(
-        model="llama3.1:8b",  # better, more detailed output
-        messages=[{"role": "user", "content": prompt}]
+        data = analyze_text(text)
+    except ResumeError as e:
+        return error_response(e.payload, e.status)
+
+    # --- SAVE SKILLS / ROLES ---
+    save_roles_and_skills(
+        [data.get("best_fit_role", "")],
+        data.get("top_skills", "").split(","),
     )
 
-    raw = ai["message"]["content"].strip()
+    stored.analysis = data
+    stored.model = model
+    stored.save(update_fields=["analysis", "model", "updated_at"])
 
-    # --- CLEAN JSON FORMAT ---
-    raw = raw.replace("```json", "").replace("```", "")
+    return Response({**data, "resume_id": content_hash})
 
-    # --- SAFE JSON PARSING ---
+
+@api_view(["POST"])
+def analyze_resume_batch(request):
+    files = request.FILES.getlist("resumes")
+    archive = request.FILES.get("archive")
+
+    if not files and archive is None:
+        return Response({"error": "Upload resumes or a zip archive"}, status=400)
+
+    staging = tempfile.mkdtemp(prefix="resume-batch-")
     try:
-        cleaned = raw[raw.find("{"):raw.rfind("}") + 1]
-        data = json.loads(cleaned)
-    except Exception as e:
-        return Response({
-            "error": "AI returned invalid JSON",
-            "raw_ai_output": raw,
-            "exception": str(e)
-        }, status=500)
+        items = stage_batch(files, archive, staging)
+    except ResumeError as e:
+        remove_staging(staging)
+        return Response(e.payload, status=e.status)
+
+    def lines():
+        roles, skills = [], []
+        counts = {"ok": 0, "error": 0}
+        try:
+            for result in analyze_batch(items):
+                counts[result["status"]] += 1
+                if result["status"] == "ok" and not result.get("cached"):
+                    roles.append(result["analysis"].get("best_fit_role", ""))
+                    skills.extend(result["analysis"].get("top_skills", "").split(","))
+                yield json.dumps(result) + "\n"
+
+            # --- SAVE SKILLS / ROLES (once for the whole batch) ---
+            save_roles_and_skills(roles, skills)
+            yield json.dumps({"status": "done", "total": len(items), **counts}) + "\n"
+        finally:
+            remove_staging(staging)
+
+    return streaming_response(request, lines(), "application/x-ndjson")
 
-    # --- SAVE SKILLS / ROLES ---
-    save_role_if_new(data.get("best_fit_role", ""))
 
-    for s in data.get("top_skills", "").split(","):
-        save_skill_if_new(s.strip())
+@api_view(["GET"])
+def get_resume_analysis(request, content_hash):
+    stored = ResumeAnalysis.objects.filter(content_hash=content_hash).first()
+    if not stored or stored.analysis is None:
+        return Response({"error": "Analysis not found"}, status=404)
 
-    return Response(data)
+    return Response({
+        **stored.analysis,
+        "resume_id": stored.content_hash,
+        "file_name": stored.file_name,
+        "analyzed_at": stored.updated_at,
+    })
 
 
 # ============================================================
@@ -505,11 +671,77 @@ def add_question(request):
     return Response({"message": "Question added"})
 
 
+@api_view(["POST"])
+def import_questions_view(request):
+    if "file" not in request.FILES:
+        return Response({"error": "Upload a .csv or .jsonl file"}, status=400)
+
+    file = request.FILES["file"]
+    try:
+        rows = read_rows(file, file.name)
+    except ValueError as e:
+        return Response({"error": str(e)}, status=400)
+
+    return Response(import_questions(rows))
+
+
+@api_view(["GET"])
+def export_questions_view(request):
+    fields = ["text", "role", "skill", "level"]
+    rows = Question.objects.order_by("id").values(*fields).iterator(chunk_size=2000)
+    export = "csv" if request.GET.get("export") == "csv" else "ndjson"
+    return export_rows(request, rows, fields, export, "questions")
+
+
+QUESTION_LIST_FIELDS = ["id", "text", "role", "skill", "level"]
+# Same columns as UserProfileSerializer, the shape list_users has always returned
+USER_LIST_FIELDS = ["id", "full_name", "mobile", "role", "email"]
+
+
 @api_view(["GET"])
 def list_questions(request):
-    return Response(list(Question.objects.all().values()))
+    qs = Question.objects.all()
+
+    for field in ("role", "skill", "level"):
+        value = request.GET.get(field)
+        if value is not None:
+            qs = qs.filter(**{field: normalize(value)})
+
+    return keyset_list(request, qs, QUESTION_LIST_FIELDS, "questions")
 
 
 @api_view(["GET"])
 def list_users(request):
-    return Response(UserProfileSerializer(UserProfile.objects.all(), many=True).data)
+    # email comes from the joined auth_user row, not a query per profile
+    qs = UserProfile.objects.annotate(email=F("user__email"))
+
+    if request.GET.get("role") is not None:
+        qs = qs.filter(role=request.GET["role"])
+
+    return keyset_list(request, qs, USER_LIST_FIELDS, "users")
+
+
+@api_view(["GET"])
+def cache_stats(request):
+    return Response({
+        "evaluation": get_evaluation_cache().stats(),
+        "singleflight": singleflight.stats(),
+    })
+
+
+@api_view(["GET"])
+def llm_stats(request):
+    limiter = llm.get_limiter()
+    return Response(limiter.stats() if limiter else {"max_concurrency": 0})
+
+
+# ============================================================
+# METRICS (Prometheus text format)
+# ============================================================
+
+def metrics_view(request):
+    token = settings.METRICS_TOKEN
+    if token and request.headers.get("Authorization") != f"Bearer {token}":
+        return HttpResponse("Unauthorized", status=401)
+
+    return HttpResponse(metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -3,6 +3,16 @@ ASGI config for interview project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+This is the entry point to deploy with: the server-sent event and export
+endpoints stream their bodies as they are produced only under ASGI. Run it
+with any ASGI server, for example::
+
+    uvicorn interview.asgi:application --workers 4
+    gunicorn interview.asgi:application -k uvicorn.workers.UvicornWorker -w 4
+
+Under WSGI (interview/wsgi.py, ``manage.py runserver``) everything else
+works the same, but streamed responses arrive in one piece at the end.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -5,6 +5,7 @@ Django settings for interview project.
 from pathlib import Path
 from datetime import timedelta
 import os
+import sys
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -42,6 +43,7 @@ INSTALLED_APPS = [
 # 🔧 MIDDLEWARE
 # ================================
 MIDDLEWARE = [
+    "api.middleware.MetricsMiddleware",  # first, so it times everything below
     "django.middleware.security.SecurityMiddleware",
     "corsheaders.middleware.CorsMiddleware",  # must stay near top
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -70,17 +72,70 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = "interview.wsgi.application"
+# Streaming endpoints (SSE and NDJSON/CSV exports) only stream under ASGI,
+# e.g. `uvicorn interview.asgi:application`; WSGI servers and runserver
+# deliver them in one piece once complete. See interview/asgi.py.
+ASGI_APPLICATION = "interview.asgi.application"
 
 # ================================
 # 🗄 DATABASE
 # ================================
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
-    }
+# DB_ENGINE=sqlite (default) or postgres.
+DB_ENGINE = os.environ.get("DB_ENGINE", "sqlite")
+
+# Applied on every new SQLite connection. WAL lets readers run alongside
+# the writer, busy_timeout makes a blocked writer wait instead of failing
+# with "database is locked", and synchronous=NORMAL is safe under WAL.
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "busy_timeout": int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", "15000")),
+    "synchronous": "NORMAL",
+    "mmap_size": int(os.environ.get("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+    "cache_size": -20000,  # KiB
+    "temp_store": "MEMORY",
 }
 
+if DB_ENGINE == "postgres":
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": os.environ.get("DB_NAME", "interview"),
+            "USER": os.environ.get("DB_USER", "interview"),
+            "PASSWORD": os.environ.get("DB_PASSWORD", ""),
+            "HOST": os.environ.get("DB_HOST", "localhost"),
+            "PORT": os.environ.get("DB_PORT", "5432"),
+            # Keep connections open between requests; check them before reuse
+            "CONN_MAX_AGE": int(os.environ.get("DB_CONN_MAX_AGE", "60")),
+            "CONN_HEALTH_CHECKS": True,
+            "OPTIONS": {
+                "connect_timeout": int(os.environ.get("DB_CONNECT_TIMEOUT", "5")),
+            },
+        }
+    }
+    # Or a psycopg 3 pool shared by the process's threads (needs psycopg[pool]);
+    # Django requires CONN_MAX_AGE = 0 with it
+    if os.environ.get("DB_POOL", "False") == "True":
+        DATABASES["default"]["CONN_MAX_AGE"] = 0
+        DATABASES["default"]["OPTIONS"]["pool"] = {
+            "min_size": int(os.environ.get("DB_POOL_MIN_SIZE", "2")),
+            "max_size": int(os.environ.get("DB_POOL_MAX_SIZE", "10")),
+            "timeout": int(os.environ.get("DB_POOL_TIMEOUT", "10")),
+        }
+else:
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": os.environ.get("DB_NAME", BASE_DIR / "db.sqlite3"),
+            "OPTIONS": {
+                "init_command": "; ".join(f"PRAGMA {k}={v}" for k, v in SQLITE_PRAGMAS.items()),
+                # Take the write lock at BEGIN so busy_timeout applies, instead of
+                # failing when a read transaction later tries to upgrade
+                "transaction_mode": "IMMEDIATE",
+                "timeout": int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", "15000")) / 1000,
+            },
+        }
+    }
+
 # ================================
 # 🔑 PASSWORD VALIDATION
 # ================================
@@ -110,6 +165,9 @@ STATIC_ROOT = BASE_DIR / "staticfiles"
 # ================================
 CORS_ALLOW_ALL_ORIGINS = True  # works for dev & ngrok
 
+# Let browser clients read the keyset pagination cursor (see api/listing.py)
+CORS_EXPOSE_HEADERS = ["X-Next-Cursor"]
+
 CSRF_TRUSTED_ORIGINS = [
     "https://*.vercel.app",
     "https://*.ngrok-free.dev",
@@ -131,3 +189,197 @@ SIMPLE_JWT = {
 }
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
+
+# ================================
+# 🤖 LLM BACKEND
+# ================================
+# "ollama" talks to a real server; "mock" returns deterministic canned
+# output so tests and load tests run without one.
+LLM_BACKEND = os.environ.get("LLM_BACKEND", "ollama")
+OLLAMA_HOST = os.environ.get("OLLAMA_HOST", "http://localhost:11434")
+LLM_MAX_CONNECTIONS = int(os.environ.get("LLM_MAX_CONNECTIONS", "10"))
+
+# Per call type: "question" (get_question), "evaluate" (evaluate_answer),
+# "resume" (analyze_resume). "default" covers anything not listed.
+LLM_MODELS = {
+    "default": os.environ.get("LLM_MODEL", "llama3.1:8b"),
+    "question": os.environ.get("LLM_QUESTION_MODEL", os.environ.get("LLM_MODEL", "llama3.1:8b")),
+    "evaluate": os.environ.get("LLM_EVALUATE_MODEL", os.environ.get("LLM_MODEL", "llama3.1:8b")),
+    "resume": os.environ.get("LLM_RESUME_MODEL", os.environ.get("LLM_MODEL", "llama3.1:8b")),
+}
+
+# Seconds
+LLM_TIMEOUTS = {
+    "default": 60,
+    "question": 30,
+    "evaluate": 120,
+    "resume": 180,
+}
+
+LLM_RETRIES = int(os.environ.get("LLM_RETRIES", "2"))
+LLM_RETRY_BACKOFF = float(os.environ.get("LLM_RETRY_BACKOFF", "0.5"))
+
+# Output constraint for calls that expect JSON (evaluate, resume): "schema"
+# sends the endpoint's JSON schema as Ollama's format (Ollama 0.5+), "json"
+# only forces valid JSON, "" leaves the output unconstrained.
+LLM_JSON_FORMAT = os.environ.get("LLM_JSON_FORMAT", "schema")
+
+# Admission control, per process. At most LLM_MAX_CONCURRENCY calls run at
+# once (0 disables the limiter), each kind capped by LLM_CONCURRENCY. Free
+# slots go to the lowest LLM_PRIORITIES value first. A kind with
+# LLM_QUEUE_LIMITS callers already waiting answers 429, and a caller still
+# waiting after LLM_QUEUE_TIMEOUTS seconds gets 503, both with Retry-After.
+# Every worker process has its own limiter and queue, so the model server
+# can see up to LLM_MAX_CONCURRENCY times the number of workers at once.
+LLM_MAX_CONCURRENCY = int(os.environ.get("LLM_MAX_CONCURRENCY", "4"))
+LLM_CONCURRENCY = {
+    "default": 2,
+    "question": 2,
+    "evaluate": 4,
+    "resume": int(os.environ.get("LLM_RESUME_CONCURRENCY", "1")),
+}
+LLM_PRIORITIES = {
+    "default": 5,
+    "evaluate": 0,
+    "question": 1,
+    "resume": 9,
+}
+LLM_QUEUE_LIMITS = {
+    "default": 10,
+    "question": 20,
+    "evaluate": 20,
+    "resume": 5,
+}
+LLM_QUEUE_TIMEOUTS = {
+    "default": 30,
+    "question": 15,
+    "evaluate": 30,
+    "resume": 60,
+}
+
+# Identical concurrent LLM calls share one request. The lock table file
+# coordinates processes on the same host; set it to "" for per-process only.
+SINGLEFLIGHT_LOCK_FILE = os.environ.get("SINGLEFLIGHT_LOCK_FILE", str(BASE_DIR / "cache" / "singleflight.lock"))
+SINGLEFLIGHT_SLOTS = 4096
+SINGLEFLIGHT_MAX_WAIT = int(os.environ.get("SINGLEFLIGHT_MAX_WAIT", "300"))
+
+# ================================
+# 🏷 ROLES / SKILLS
+# ================================
+# Upper bound on how stale /api/roles/ and /api/skills/ can be in a
+# process when the Django cache isn't shared between processes.
+TAXONOMY_CACHE_TTL = int(os.environ.get("TAXONOMY_CACHE_TTL", "60"))
+
+# ================================
+# 🗃 EVALUATION CACHE
+# ================================
+# BACKEND: "locmem" (per process), "file" (LOCATION dir, shared by all
+# processes on the host), "django" (the Django cache named by ALIAS) or "none".
+EVALUATION_CACHE = {
+    "BACKEND": os.environ.get("EVALUATION_CACHE_BACKEND", "locmem"),
+    "TTL": int(os.environ.get("EVALUATION_CACHE_TTL", str(7 * 24 * 3600))),
+    "MAX_ENTRIES": int(os.environ.get("EVALUATION_CACHE_MAX_ENTRIES", "10000")),
+    "LOCATION": os.environ.get("EVALUATION_CACHE_LOCATION", str(BASE_DIR / "cache" / "evaluations")),
+    "ALIAS": "default",
+}
+
+# ================================
+# 📄 RESUME PARSING
+# ================================
+RESUME_MAX_BYTES = int(os.environ.get("RESUME_MAX_BYTES", str(10 * 1024 * 1024)))
+RESUME_MAX_PAGES = int(os.environ.get("RESUME_MAX_PAGES", "20"))
+RESUME_MAX_CHARS = 3000  # text sent to the model
+# Worker processes for PDF/DOCX parsing; 0 parses inline in the request
+RESUME_PARSE_WORKERS = int(os.environ.get("RESUME_PARSE_WORKERS", "2"))
+RESUME_PARSE_TIMEOUT = int(os.environ.get("RESUME_PARSE_TIMEOUT", "20"))
+RESUME_BATCH_MAX_FILES = int(os.environ.get("RESUME_BATCH_MAX_FILES", "500"))
+RESUME_BATCH_LLM_CONCURRENCY = int(os.environ.get("RESUME_BATCH_LLM_CONCURRENCY", "2"))
+
+# ================================
+# 🔥 QUESTION PRE-GENERATION
+# ================================
+# Bank questions to keep per (role, skill, level). Override single
+# combinations with "role|skill|level" keys, e.g. {"backend developer|python|hard": 50}.
+QUESTION_STOCK_TARGET = int(os.environ.get("QUESTION_STOCK_TARGET", "20"))
+QUESTION_STOCK_TARGETS = {}
+# Background threads topping up stock; 0 disables pre-generation on requests
+QUESTION_PREWARM_WORKERS = int(os.environ.get("QUESTION_PREWARM_WORKERS", "1"))
+# Max questions generated per refill, so one combination can't hog the model
+QUESTION_PREWARM_BATCH = int(os.environ.get("QUESTION_PREWARM_BATCH", "5"))
+# Seconds between stock checks for one combination, per process
+QUESTION_STOCK_CHECK_INTERVAL = float(os.environ.get("QUESTION_STOCK_CHECK_INTERVAL", "60"))
+# Request counts are kept in memory and written to QuestionDemand this often
+QUESTION_DEMAND_FLUSH_INTERVAL = float(os.environ.get("QUESTION_DEMAND_FLUSH_INTERVAL", "30"))
+
+# ================================
+# 🧭 QUESTION SIMILARITY
+# ================================
+# Hashed n-gram embeddings (api/embedding.py) searched with NumPy. Cosine
+# similarity at or above QUESTION_DUPLICATE_THRESHOLD makes a new question a
+# duplicate of a stored one; within a session, questions at or above
+# QUESTION_SESSION_SIMILARITY to an already asked one are skipped.
+QUESTION_SIMILARITY_ENABLED = os.environ.get("QUESTION_SIMILARITY_ENABLED", "True") == "True"
+QUESTION_DUPLICATE_THRESHOLD = float(os.environ.get("QUESTION_DUPLICATE_THRESHOLD", "0.85"))
+QUESTION_SESSION_SIMILARITY = float(os.environ.get("QUESTION_SESSION_SIMILARITY", "0.7"))
+# Upper bound on how long a process keeps an index that misses edits and
+# deletes made elsewhere, when the Django cache isn't shared between processes.
+QUESTION_INDEX_MAX_AGE = int(os.environ.get("QUESTION_INDEX_MAX_AGE", "300"))
+
+# ================================
+# 🗂 INTERVIEW SESSIONS
+# ================================
+# Questions reserved by POST /api/session/start/ when the client doesn't ask
+# for a count, and the most it may ask for
+SESSION_QUESTION_COUNT = int(os.environ.get("SESSION_QUESTION_COUNT", "5"))
+SESSION_QUESTION_MAX = int(os.environ.get("SESSION_QUESTION_MAX", "20"))
+
+# ================================
+# 🧊 RESULT ARCHIVE
+# ================================
+# `python manage.py archive_results` moves sessions whose last result is
+# older than RESULT_ARCHIVE_AFTER_DAYS into compressed ArchivedSession rows.
+# RESULT_ARCHIVE_CODEC: "gzip", or "zstd" with the zstandard package installed.
+RESULT_ARCHIVE_AFTER_DAYS = int(os.environ.get("RESULT_ARCHIVE_AFTER_DAYS", "180"))
+RESULT_ARCHIVE_CODEC = os.environ.get("RESULT_ARCHIVE_CODEC", "gzip")
+
+# ================================
+# 🤖 ASYNC EVALUATION
+# ================================
+# Threads that run queued evaluations in-process. Set to 0 to leave jobs
+# for `python manage.py run_evaluation_worker` instead. The in-process pool
+# doesn't survive a restart: jobs it hadn't finished are only picked up
+# again by the worker command, so run it whenever jobs must not be lost.
+EVALUATION_WORKERS = int(os.environ.get("EVALUATION_WORKERS", "2"))
+# Seconds a job may stay "running" before the worker command assumes its
+# runner died and queues it again. Keep it above the evaluate timeout.
+EVALUATION_JOB_TIMEOUT = int(os.environ.get("EVALUATION_JOB_TIMEOUT", "900"))
+
+# ================================
+# 📈 METRICS / REQUEST LOG
+# ================================
+# Prometheus text at /metrics. Set METRICS_TOKEN to require
+# "Authorization: Bearer <token>" on scrapes.
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "True") == "True"
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+
+# One JSON line per request on the "api.requests" logger, off under
+# "manage.py test" unless REQUEST_LOG_LEVEL is set
+TESTING = sys.argv[1:2] == ["test"]
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {
+        "plain": {"format": "%(message)s"},
+    },
+    "handlers": {
+        "requests": {"class": "logging.StreamHandler", "formatter": "plain"},
+    },
+    "loggers": {
+        "api.requests": {
+            "handlers": ["requests"],
+            "level": os.environ.get("REQUEST_LOG_LEVEL", "WARNING" if TESTING else "INFO"),
+            "propagate": False,
+        },
+    },
+}